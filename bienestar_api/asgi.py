@@ -6,6 +6,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bienestar_api.settings')
+# Las lecturas de carreras, anuncios y perfil se atienden como corrutinas
+os.environ.setdefault('VISTAS_ASINCRONAS', 'True')
+# Pool de conexiones o conexiones sin persistencia (settings.DATABASES)
+os.environ.setdefault('SERVIDOR_ASGI', 'True')
 
 application = get_asgi_application()
 
@@ -0,0 +1,107 @@
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+
+def renderizar(response):
+    """
+    Renderizar en el event loop: Django renderiza las respuestas diferidas
+    en el hilo de las vistas síncronas, que es lo que se quiere evitar.
+    """
+    if not isinstance(response, Response):
+        return response
+    response.render()
+    renderizada = HttpResponse(response.content, status=response.status_code)
+    for clave, valor in response.items():
+        renderizada[clave] = valor
+    renderizada.cookies = response.cookies
+    return renderizada
+
+
+class LecturaAsincronaMixin:
+    """
+    Lecturas de un ViewSet atendidas en el event loop del servidor ASGI.
+
+    DRF solo tiene vistas síncronas y bajo ASGI Django las ejecuta completas
+    en un único hilo, así que los requests se atienden de a uno. Con
+    ``VISTAS_ASINCRONAS`` (activo en asgi.py) los GET de las acciones de
+    ``acciones_asincronas`` corren como corrutinas: autenticación, permisos y
+    armado de la consulta en un solo paso síncrono, y las lecturas con el ORM
+    asíncrono. Los demás métodos siguen por la vista síncrona de siempre, y
+    con WSGI nada cambia.
+    """
+
+    # acción -> corrutina que la atiende; recibe (request, queryset, *args, **kwargs)
+    acciones_asincronas = {'list': 'alist', 'retrieve': 'aretrieve'}
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        vista = super().as_view(actions, **initkwargs)
+        accion = actions.get('get')
+        if not getattr(settings, 'VISTAS_ASINCRONAS', False) or accion not in cls.acciones_asincronas:
+            return vista
+        actions.setdefault('head', accion)
+        vista_sincrona = sync_to_async(vista)
+
+        async def vista_asincrona(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await vista_sincrona(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = actions
+            self.request = request
+            return await self.adespachar(request, *args, **kwargs)
+
+        update_wrapper(vista_asincrona, vista)
+        del vista_asincrona.__wrapped__
+        # Para quien necesite atender la acción desde otro hilo (contenido/bootstrap.py)
+        vista_asincrona.vista_sincrona = vista
+        return csrf_exempt(vista_asincrona)
+
+    async def adespachar(self, request, *args, **kwargs):
+        """APIView.dispatch con la corrutina de la acción como handler"""
+        self.args = args
+        self.kwargs = kwargs
+        # Las acciones asíncronas cargan con el ORM asíncrono lo que necesitan:
+        # la autenticación se queda con los claims del token
+        self.acciones_usuario_completo = ()
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            queryset = await sync_to_async(self.preparar_lectura)(request, *args, **kwargs)
+            handler = getattr(self, self.acciones_asincronas[self.action])
+            response = await handler(request, queryset, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return renderizar(self.response)
+
+    def preparar_lectura(self, request, *args, **kwargs):
+        """Parte síncrona: autenticación, permisos, throttling y la consulta filtrada"""
+        self.initial(request, *args, **kwargs)
+        return self.filter_queryset(self.get_queryset())
+
+    async def alist(self, request, queryset, *args, **kwargs):
+        if self.paginator is not None:
+            pagina = await self.paginator.apaginate_queryset(queryset, request, view=self)
+            if pagina is not None:
+                return self.get_paginated_response(self.get_serializer(pagina, many=True).data)
+        return Response(self.get_serializer([fila async for fila in queryset], many=True).data)
+
+    async def aretrieve(self, request, queryset, *args, **kwargs):
+        return Response(self.get_serializer(await self.aget_object(queryset)).data)
+
+    async def aget_object(self, queryset):
+        """get_object con el ORM asíncrono"""
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            objeto = await queryset.aget(**{self.lookup_field: self.kwargs[lookup]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(self.request, objeto)
+        return objeto
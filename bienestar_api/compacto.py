@@ -0,0 +1,220 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Campos cuyo to_representation devuelve tal cual el valor que entrega la base de datos
+IDENTIDAD = (
+    serializers.IntegerField, serializers.CharField, serializers.EmailField, serializers.URLField,
+    serializers.SlugField, serializers.BooleanField,
+)
+
+
+class NoCompilable(Exception):
+    """El serializer tiene campos que la ruta compacta no sabe convertir"""
+
+
+class Conversor:
+    """
+    Serializer de solo lectura compilado a funciones sobre filas de
+    ``.values()``: mismas claves, mismo orden y mismos valores que
+    ``serializer.data``, sin instanciar modelos ni serializers por fila.
+
+    Cada extractor recibe la fila y la zona horaria del request, que se
+    resuelve una vez por listado y no una vez por fecha como en DRF. Los
+    SerializerMethodField se declaran en el serializer con
+    ``metodos_compactos = {campo: (columnas, funcion)}``, donde ``funcion``
+    recibe los valores de esas columnas. Con ``campos`` solo se compilan
+    (y se leen de la base de datos) esos campos del primer nivel.
+    """
+
+    def __init__(self, serializer_class, campos=None):
+        self.columnas = []
+        self.extractores = self.compilar(serializer_class(), '', campos)
+
+    def compilar(self, serializer, prefijo, campos=None):
+        modelo = serializer.Meta.model
+        metodos = getattr(serializer, 'metodos_compactos', {})
+        extractores = []
+        for campo in serializer._readable_fields:
+            if campos is not None and campo.field_name not in campos:
+                continue
+            if isinstance(campo, serializers.SerializerMethodField):
+                if campo.field_name not in metodos:
+                    raise NoCompilable(f'{type(serializer).__name__}.{campo.field_name}')
+                columnas, funcion = metodos[campo.field_name]
+                extractor = self.metodo([self.columna(prefijo + columna) for columna in columnas], funcion)
+            elif len(campo.source_attrs) != 1:
+                raise NoCompilable(f'{type(serializer).__name__}.{campo.field_name}')
+            else:
+                try:
+                    campo_modelo = modelo._meta.get_field(campo.source)
+                except FieldDoesNotExist:
+                    raise NoCompilable(f'{type(serializer).__name__}.{campo.field_name}')
+                extractor = self.extractor(campo, campo_modelo, prefijo)
+            extractores.append((campo.field_name, extractor))
+        return extractores
+
+    def extractor(self, campo, campo_modelo, prefijo):
+        if isinstance(campo, serializers.ModelSerializer) and campo_modelo.many_to_one:
+            # Anidado: None si la FK es nula (LEFT JOIN sin fila), igual que DRF
+            anidado = f'{prefijo}{campo.source}__'
+            existe = self.columna(anidado + campo_modelo.target_field.attname)
+            extractores = self.compilar(campo, anidado)
+            return lambda fila, zona: None if fila[existe] is None else {
+                nombre: extractor(fila, zona) for nombre, extractor in extractores
+            }
+        if campo_modelo.is_relation:
+            if type(campo) is not serializers.PrimaryKeyRelatedField or campo.pk_field is not None \
+                    or not campo_modelo.many_to_one:
+                raise NoCompilable(campo.field_name)
+            columna = self.columna(prefijo + campo_modelo.attname)
+            return lambda fila, zona: fila[columna]
+        columna = self.columna(prefijo + campo_modelo.attname)
+        if type(campo) in IDENTIDAD or self.sin_conversion(campo):
+            return lambda fila, zona: fila[columna]
+        representar = campo.to_representation
+        formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+        if type(campo) is serializers.DateTimeField and formato and formato.lower() == ISO_8601 \
+                and not hasattr(campo, 'timezone'):
+            return self.fecha_hora(columna, representar)
+
+        def convertir(fila, zona):
+            valor = fila[columna]
+            return None if valor is None else representar(valor)
+        return convertir
+
+    @staticmethod
+    def sin_conversion(campo):
+        if type(campo) is serializers.JSONField:
+            return not campo.binary
+        if type(campo) is serializers.BigIntegerField:
+            return not getattr(campo, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING)
+        # Con claves de texto, ChoiceField devuelve el mismo valor que está en la base de datos
+        return type(campo) is serializers.ChoiceField and all(isinstance(clave, str) for clave in campo.choices)
+
+    @staticmethod
+    def fecha_hora(columna, representar):
+        """DateTimeField.to_representation en formato ISO 8601 con la zona ya resuelta"""
+        def convertir(fila, zona):
+            valor = fila[columna]
+            if valor is None:
+                return None
+            if zona is None or valor.tzinfo is None:
+                return representar(valor)
+            texto = valor.astimezone(zona).isoformat()
+            return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+        return convertir
+
+    @staticmethod
+    def metodo(columnas, funcion):
+        return lambda fila, zona: funcion(*[fila[columna] for columna in columnas])
+
+    def columna(self, nombre):
+        if nombre not in self.columnas:
+            self.columnas.append(nombre)
+        return nombre
+
+    def lista(self, filas):
+        extractores = self.extractores
+        zona = timezone.get_current_timezone() if settings.USE_TZ else None
+        return [{nombre: extractor(fila, zona) for nombre, extractor in extractores} for fila in filas]
+
+
+_conversores = {}
+_campos_legibles = {}
+
+
+def conversor_para(serializer_class, campos=None):
+    """Conversor compilado (una vez por clase y proyección) o None si el serializer no se puede compilar"""
+    clave = (serializer_class, campos)
+    if clave not in _conversores:
+        try:
+            _conversores[clave] = Conversor(serializer_class, campos)
+        except NoCompilable:
+            _conversores[clave] = None
+    return _conversores[clave]
+
+
+def campos_legibles(serializer_class):
+    if serializer_class not in _campos_legibles:
+        _campos_legibles[serializer_class] = tuple(campo.field_name for campo in serializer_class()._readable_fields)
+    return _campos_legibles[serializer_class]
+
+
+class ListaCompactaMixin:
+    """
+    Listados servidos con ``.values()`` y un Conversor en lugar de
+    instanciar el modelo y el serializer por cada fila. La respuesta es la
+    misma; ``LISTAS_COMPACTAS=False`` vuelve a la ruta de DRF.
+
+    Con ``proyeccion_param`` (p. ej. ``'fields'``), ``?fields=id,email``
+    devuelve solo esos campos y la consulta lee solo sus columnas.
+    """
+
+    proyeccion_param = None
+
+    def campos_pedidos(self):
+        """Campos de la proyección en el orden del serializer, o None si se piden todos"""
+        if self.proyeccion_param is None or self.request.method not in ('GET', 'HEAD'):
+            return None
+        valor = self.request.query_params.get(self.proyeccion_param, '')
+        pedidos = {campo.strip() for campo in valor.split(',') if campo.strip()}
+        if not pedidos:
+            return None
+        disponibles = campos_legibles(self.get_serializer_class())
+        desconocidos = pedidos.difference(disponibles)
+        if desconocidos:
+            raise ValidationError({self.proyeccion_param: f'Campos desconocidos: {", ".join(sorted(desconocidos))}'})
+        return tuple(campo for campo in disponibles if campo in pedidos)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.campos_pedidos()
+        if campos is not None:
+            fields = serializer.child.fields if isinstance(serializer, serializers.ListSerializer) else serializer.fields
+            for nombre in [nombre for nombre, campo in fields.items() if not campo.write_only and nombre not in campos]:
+                fields.pop(nombre)
+        return serializer
+
+    def conversor_lista(self):
+        if not getattr(settings, 'LISTAS_COMPACTAS', True):
+            return None
+        return conversor_para(self.get_serializer_class(), self.campos_pedidos())
+
+    def filas(self, queryset, conversor):
+        """Solo las columnas del serializer y las del orden (que usa la paginación por cursor)"""
+        ordering = getattr(self.paginator, 'get_ordering', lambda queryset: [])(queryset)
+        extra = [campo.lstrip('-') for campo in ordering if campo.lstrip('-') not in conversor.columnas]
+        return queryset.values(*conversor.columnas, *extra)
+
+    def serializar_lista(self, queryset):
+        """Datos de ``many=True`` para un listado sin paginar"""
+        conversor = self.conversor_lista()
+        if conversor is None:
+            return self.get_serializer(queryset, many=True).data
+        return conversor.lista(self.filas(queryset, conversor))
+
+    def list(self, request, *args, **kwargs):
+        conversor = self.conversor_lista()
+        if conversor is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filas(self.filter_queryset(self.get_queryset()), conversor)
+        pagina = self.paginate_queryset(queryset)
+        if pagina is not None:
+            return self.get_paginated_response(conversor.lista(pagina))
+        return Response(conversor.lista(queryset))
+
+    async def alist(self, request, queryset, *args, **kwargs):
+        conversor = self.conversor_lista()
+        if conversor is None:
+            return await super().alist(request, queryset, *args, **kwargs)
+        queryset = self.filas(queryset, conversor)
+        if self.paginator is not None:
+            pagina = await self.paginator.apaginate_queryset(queryset, request, view=self)
+            if pagina is not None:
+                return self.get_paginated_response(conversor.lista(pagina))
+        return Response(conversor.lista([fila async for fila in queryset]))
@@ -0,0 +1,68 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from contenido.metricas import registro
+
+BUCKETS_CONEXION = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+conexiones_obtenidas = registro.contador(
+    'bienestar_db_conexiones_total', 'Conexiones abiertas o tomadas del pool', ('alias', 'origen')
+)
+espera_conexion = registro.histograma(
+    'bienestar_db_conexion_espera_segundos',
+    'Tiempo hasta tener una conexión: handshake de una conexión nueva o espera en el pool',
+    ('alias', 'origen'), BUCKETS_CONEXION,
+)
+
+
+def estadisticas_pools():
+    """Estadísticas de psycopg_pool sumadas entre los pools del proceso"""
+    totales = {}
+    for pool in list(base.DatabaseWrapper._connection_pools.values()):
+        for clave, valor in pool.get_stats().items():
+            totales[clave] = totales.get(clave, 0) + valor
+    return totales
+
+
+def _en_uso():
+    estadisticas = estadisticas_pools()
+    return estadisticas.get('pool_size', 0) - estadisticas.get('pool_available', 0)
+
+
+registro.medidor(
+    'bienestar_db_pool_conexiones', 'Conexiones abiertas por el pool',
+    lambda: estadisticas_pools().get('pool_size', 0)
+)
+registro.medidor('bienestar_db_pool_en_uso', 'Conexiones del pool prestadas en este momento', _en_uso)
+registro.medidor(
+    'bienestar_db_pool_esperando', 'Solicitudes esperando una conexión libre del pool',
+    lambda: estadisticas_pools().get('requests_waiting', 0)
+)
+registro.medidor(
+    'bienestar_db_pool_errores_total', 'Solicitudes al pool que terminaron en timeout o error',
+    lambda: estadisticas_pools().get('requests_errors', 0), tipo='counter'
+)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Backend de PostgreSQL de Django que mide cuánto cuesta obtener cada
+    conexión, sea abriéndola (handshake y autenticación) o tomándola del
+    pool de psycopg cuando ``OPTIONS['pool']`` está configurado.
+    """
+
+    def get_new_connection(self, conn_params):
+        origen = 'pool' if self.pool else 'directa'
+        inicio = time.perf_counter()
+        try:
+            conexion = super().get_new_connection(conn_params)
+        except Exception:
+            # Una réplica que no acepta conexiones deja de recibir lecturas
+            from bienestar_api.replicas import salud
+
+            salud.fallo(self.alias)
+            raise
+        espera_conexion.observar(time.perf_counter() - inicio, self.alias, origen)
+        conexiones_obtenidas.inc(self.alias, origen)
+        return conexion
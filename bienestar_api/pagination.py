@@ -0,0 +1,197 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre el orden estable de la vista más ``id``.
+
+    Cada página filtra por los valores de la última fila vista en lugar de
+    usar OFFSET, por lo que el costo por página no depende de la profundidad.
+    El total (COUNT) solo se calcula con ``?total=true``. Si se envía
+    ``?page=N`` se usa la paginación por número de página anterior.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    total_query_param = 'total'
+    page_query_param = 'page'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.usar_legado(request):
+            return self.legado.paginate_queryset(queryset, request, view)
+        self.configurar(queryset, request)
+        self.total = queryset.count() if self.get_incluir_total(request) else None
+        consulta, posicion, reverso = self.consulta_pagina(queryset, request)
+        return self.cerrar_pagina(list(consulta), posicion, reverso)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset con el ORM asíncrono"""
+        if self.usar_legado(request):
+            return await sync_to_async(self.legado.paginate_queryset)(queryset, request, view)
+        self.configurar(queryset, request)
+        self.total = await queryset.acount() if self.get_incluir_total(request) else None
+        consulta, posicion, reverso = self.consulta_pagina(queryset, request)
+        return self.cerrar_pagina([fila async for fila in consulta], posicion, reverso)
+
+    def usar_legado(self, request):
+        self.request = request
+        self.legado = None
+        if self.page_query_param in request.query_params:
+            self.legado = PageNumberPagination()
+            self.legado.page_size = self.get_page_size(request)
+        return self.legado is not None
+
+    def configurar(self, queryset, request):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.campos = [self.get_campo(queryset, campo.lstrip('-')) for campo in self.ordering]
+        self.atributos = [
+            getattr(campo, 'attname', None) or nombre.lstrip('-') for campo, nombre in zip(self.campos, self.ordering)
+        ]
+        self.nombres = [nombre.lstrip('-') for nombre in self.ordering]
+
+    def consulta_pagina(self, queryset, request):
+        """Consulta de la página pedida (una fila de más para saber si hay siguiente)"""
+        posicion, reverso = self.decode_cursor(request)
+        ordering = self.invertir(self.ordering) if reverso else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if posicion is not None:
+            queryset = queryset.filter(self.filtro_despues_de(ordering, posicion))
+        return queryset[:self.page_size + 1], posicion, reverso
+
+    def cerrar_pagina(self, resultados, posicion, reverso):
+        hay_mas = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        if reverso:
+            resultados.reverse()
+            self.has_next, self.has_previous = posicion is not None, hay_mas
+        else:
+            self.has_next, self.has_previous = hay_mas, posicion is not None
+
+        self.primero = self.valores(resultados[0]) if resultados else None
+        self.ultimo = self.valores(resultados[-1]) if resultados else None
+        return resultados
+
+    def get_paginated_response(self, data):
+        if self.legado is not None:
+            return self.legado.get_paginated_response(data)
+        respuesta = OrderedDict()
+        if self.total is not None:
+            respuesta['count'] = self.total
+        respuesta['next'] = self.get_next_link()
+        respuesta['previous'] = self.get_previous_link()
+        respuesta['results'] = data
+        return Response(respuesta)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            valor = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(valor, self.max_page_size))
+
+    def get_incluir_total(self, request):
+        return request.query_params.get(self.total_query_param, '').lower() in ('1', 'true', 'si', 'sí')
+
+    def get_ordering(self, queryset):
+        """Orden de la consulta (o del modelo) con ``id`` como desempate"""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering or [])
+        ordering = [campo for campo in ordering if isinstance(campo, str) and campo.lstrip('-') != '?']
+        if not any(campo.lstrip('-') in ('id', 'pk') for campo in ordering):
+            descendente = bool(ordering) and ordering[0].startswith('-')
+            ordering.append('-id' if descendente else 'id')
+        return [campo.replace('pk', 'id') if campo.lstrip('-') == 'pk' else campo for campo in ordering]
+
+    @staticmethod
+    def get_campo(queryset, nombre):
+        """Campo del modelo o, para anotaciones (p. ej. ``rank``), su output_field"""
+        if nombre in queryset.query.annotations:
+            return queryset.query.annotations[nombre].output_field
+        return queryset.model._meta.get_field(nombre)
+
+    @staticmethod
+    def invertir(ordering):
+        return [campo[1:] if campo.startswith('-') else f'-{campo}' for campo in ordering]
+
+    @staticmethod
+    def filtro_despues_de(ordering, posicion):
+        """(a > x) OR (a = x AND b > y) OR ... respetando la dirección de cada campo"""
+        filtro = Q()
+        iguales = Q()
+        for campo, valor in zip(ordering, posicion):
+            nombre = campo.lstrip('-')
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            filtro |= iguales & Q(**{f'{nombre}__{operador}': valor})
+            iguales &= Q(**{nombre: valor})
+        return filtro
+
+    def valores(self, instancia):
+        if isinstance(instancia, dict):
+            # Filas de .values() (ListaCompactaMixin)
+            return [instancia[nombre] for nombre in self.nombres]
+        return [getattr(instancia, atributo) for atributo in self.atributos]
+
+    def decode_cursor(self, request):
+        codificado = request.query_params.get(self.cursor_query_param)
+        if not codificado:
+            return None, False
+        try:
+            datos = json.loads(b64decode(codificado.encode('ascii')).decode('utf-8'))
+            valores = datos['v']
+            if len(valores) != len(self.campos):
+                raise ValueError
+            posicion = [campo.to_python(valor) for campo, valor in zip(self.campos, valores)]
+            return posicion, bool(datos.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, valores, reverso):
+        # isoformat completo: DjangoJSONEncoder trunca los microsegundos y el cursor debe ser exacto
+        datos = json.dumps({'v': valores, 'r': int(reverso)}, default=self.serializar_valor, separators=(',', ':'))
+        codificado = b64encode(datos.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, codificado)
+
+    @staticmethod
+    def serializar_valor(valor):
+        if hasattr(valor, 'isoformat'):
+            return valor.isoformat()
+        return str(valor)
+
+    def get_next_link(self):
+        if not self.has_next or self.ultimo is None:
+            return None
+        return self.encode_cursor(self.ultimo, reverso=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.primero is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.primero, reverso=True)
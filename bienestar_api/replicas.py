@@ -0,0 +1,297 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from contenido.metricas import registro
+from contenido.middleware import InstrumentacionMiddleware
+
+# Retraso de replicación en segundos: 0 en la principal y en una réplica que ya
+# aplicó todo lo recibido (sin escrituras recientes el timestamp envejece solo).
+# NULL si la réplica no está recibiendo WAL: con el receptor desconectado lo
+# recibido también está aplicado, pero la réplica puede estar muy atrasada. Sin
+# pg_read_all_stats el status se ve NULL y solo se verifica que el receptor exista.
+SQL_RETRASO = {
+    'postgresql': (
+        'SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 '
+        "WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE COALESCE(status, 'streaming') = 'streaming') "
+        'THEN NULL '
+        'WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+    ),
+}
+
+lecturas = registro.contador(
+    'bienestar_db_lecturas_total', 'Requests de lectura por base de datos elegida y motivo', ('alias', 'motivo')
+)
+
+
+def replicas():
+    """Alias de las réplicas de lectura configuradas"""
+    return getattr(settings, 'REPLICAS_LECTURA', ())
+
+
+class EstadoSolicitud:
+    """Lo que el enrutador sabe del request en curso"""
+
+    __slots__ = ('replica', 'escribio', 'primaria')
+
+    def __init__(self):
+        self.replica = None  # réplica elegida para las lecturas del request
+        self.escribio = False
+        self.primaria = 0  # bloques en_primaria() abiertos
+
+
+_solicitud = ContextVar('bienestar_db_solicitud', default=None)
+
+
+class SaludReplicas:
+    """
+    Disponibilidad y retraso de cada réplica, por proceso. Cada una se revisa
+    a lo sumo cada ``REPLICAS_INTERVALO_SALUD`` segundos, en el request que
+    la necesita, con una consulta que mide el retraso de replicación. Las que
+    no responden o van más atrasadas que ``REPLICAS_RETRASO_MAXIMO`` quedan
+    fuera hasta la próxima revisión; un error al conectarse
+    (bienestar_api.db) las saca de inmediato.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estado = {}  # alias -> (disponible, retraso, revisada)
+        self._revisando = set()
+
+    def disponibles(self):
+        intervalo = getattr(settings, 'REPLICAS_INTERVALO_SALUD', 5.0)
+        maximo = getattr(settings, 'REPLICAS_RETRASO_MAXIMO', 5.0)
+        ahora = time.monotonic()
+        elegibles = []
+        for alias in replicas():
+            estado = self._estado.get(alias)
+            if estado is None or ahora - estado[2] >= intervalo:
+                # Si otro hilo la está revisando, se usa el último estado conocido
+                estado = self.revisar(alias) or estado
+            if estado is not None and estado[0] and estado[1] <= maximo:
+                elegibles.append(alias)
+        return elegibles
+
+    def revisar(self, alias):
+        """Consultar el retraso de la réplica; None si otro hilo ya la está revisando"""
+        with self._lock:
+            if alias in self._revisando:
+                return None
+            self._revisando.add(alias)
+        try:
+            conexion = connections[alias]
+            try:
+                with conexion.cursor() as cursor:
+                    cursor.execute(SQL_RETRASO.get(conexion.vendor, 'SELECT 0'))
+                    retraso = cursor.fetchone()[0]
+                # Sin receptor de WAL la réplica queda fuera hasta la próxima revisión
+                estado = (retraso is not None, float(retraso or 0), time.monotonic())
+            except DatabaseError:
+                try:
+                    conexion.close()
+                except DatabaseError:
+                    pass
+                estado = (False, 0.0, time.monotonic())
+            with self._lock:
+                self._estado[alias] = estado
+            return estado
+        finally:
+            with self._lock:
+                self._revisando.discard(alias)
+
+    def fallo(self, alias):
+        """Sacar la réplica hasta la próxima revisión"""
+        if alias in replicas():
+            with self._lock:
+                self._estado[alias] = (False, 0.0, time.monotonic())
+
+    def estadisticas(self):
+        with self._lock:
+            return {alias: (disponible, retraso) for alias, (disponible, retraso, _) in self._estado.items()}
+
+
+salud = SaludReplicas()
+registro.medidor(
+    'bienestar_db_replica_disponible', 'Réplica disponible para lecturas según la última revisión',
+    lambda: {(alias,): int(disponible) for alias, (disponible, _) in salud.estadisticas().items()},
+    etiquetas=('alias',),
+)
+registro.medidor(
+    'bienestar_db_replica_retraso_segundos', 'Retraso de replicación medido en la última revisión',
+    lambda: {(alias,): retraso for alias, (_, retraso) in salud.estadisticas().items()},
+    etiquetas=('alias',),
+)
+
+
+def _clave_escritura(usuario_id):
+    return f'replicas:escritura:{usuario_id}'
+
+
+def marcar_escritura(usuario_id):
+    """Mantener al usuario en la base principal durante la ventana de escritura"""
+    cache.set(_clave_escritura(usuario_id), 1, getattr(settings, 'REPLICAS_VENTANA_ESCRITURA', 10))
+
+
+async def amarcar_escritura(usuario_id):
+    await cache.aset(_clave_escritura(usuario_id), 1, getattr(settings, 'REPLICAS_VENTANA_ESCRITURA', 10))
+
+
+def elegir_replica(usuario):
+    """Elegir la réplica que atiende las lecturas del request en curso"""
+    estado = _solicitud.get()
+    if estado is None or not replicas():
+        return None
+    if usuario.is_authenticated and cache.get(_clave_escritura(usuario.pk)):
+        lecturas.inc(DEFAULT_DB_ALIAS, 'escritura_reciente')
+        return None
+    disponibles = salud.disponibles()
+    if not disponibles:
+        lecturas.inc(DEFAULT_DB_ALIAS, 'sin_replica')
+        return None
+    estado.replica = random.choice(disponibles)
+    lecturas.inc(estado.replica, 'replica')
+    return estado.replica
+
+
+@contextmanager
+def en_primaria():
+    """Leer de la base principal dentro del bloque, p. ej. al llenar un caché compartido"""
+    estado = _solicitud.get()
+    if estado is None:
+        yield
+        return
+    estado.primaria += 1
+    try:
+        yield
+    finally:
+        estado.primaria -= 1
+
+
+@contextmanager
+def solicitud_anidada():
+    """
+    Estado propio para una sub-solicitud atendida dentro de otra (las
+    secciones de /api/bootstrap/, que corren en paralelo): cada una elige su
+    réplica sin pisar la de las demás, y si escribe, la solicitud que la
+    contiene queda marcada como escritora.
+    """
+    padre = _solicitud.get()
+    if padre is None:
+        yield None
+        return
+    estado = EstadoSolicitud()
+    estado.escribio = padre.escribio
+    estado.primaria = padre.primaria
+    token = _solicitud.set(estado)
+    try:
+        yield estado
+    finally:
+        _solicitud.reset(token)
+        if estado.escribio:
+            padre.escribio = True
+
+
+class EnrutadorReplicas:
+    """
+    DATABASE_ROUTERS: las lecturas van a la réplica elegida para el request
+    (LecturaReplicaMixin) hasta que el request escribe; las escrituras y
+    todo lo que corre fuera de un request (comandos, hilos en segundo plano)
+    van a la base principal.
+    """
+
+    def db_for_read(self, model, **hints):
+        estado = _solicitud.get()
+        if estado is None or estado.replica is None or estado.escribio or estado.primaria:
+            return None
+        return estado.replica
+
+    def db_for_write(self, model, **hints):
+        estado = _solicitud.get()
+        if estado is not None:
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Una réplica tiene las mismas filas que la principal
+        bases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+
+class ReplicasMiddleware:
+    """
+    Abre el estado del enrutador para cada request y, si el request escribió
+    en la base principal, deja a su usuario en ella durante
+    ``REPLICAS_VENTANA_ESCRITURA`` segundos (en el caché, compartido entre
+    procesos). Sin réplicas configuradas no se instala.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        estado = EstadoSolicitud()
+        token = _solicitud.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _solicitud.reset(token)
+        usuario_id = self.escritor(request, estado)
+        if usuario_id is not None:
+            marcar_escritura(usuario_id)
+        return response
+
+    async def __acall__(self, request):
+        estado = EstadoSolicitud()
+        token = _solicitud.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _solicitud.reset(token)
+        usuario_id = self.escritor(request, estado)
+        if usuario_id is not None:
+            await amarcar_escritura(usuario_id)
+        return response
+
+    @staticmethod
+    def escritor(request, estado):
+        """ID del usuario autenticado si el request escribió"""
+        if not estado.escribio:
+            return None
+        return InstrumentacionMiddleware.get_usuario_id(request)
+
+
+class LecturaReplicaMixin:
+    """
+    Lecturas (GET, HEAD, OPTIONS) de un ViewSet atendidas por una réplica
+    disponible, salvo para el usuario que escribió hace menos de
+    ``REPLICAS_VENTANA_ESCRITURA`` segundos: ese sigue leyendo de la
+    principal y ve lo que acaba de crear. Autenticación, permisos y
+    throttling se resuelven antes, en la principal.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            elegir_replica(request.user)
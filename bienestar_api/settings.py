@@ -1,3 +1,4 @@
+from importlib.util import find_spec
 from pathlib import Path
 import os
 from decouple import config
@@ -20,12 +21,15 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',  # Rotación de refresh (purgar_tokens limpia los vencidos)
     'corsheaders',
     'usuarios',
     'contenido',
 ]
 
 MIDDLEWARE = [
+    'contenido.middleware.InstrumentacionMiddleware',  # Métricas y log muestreado de requests
+    'bienestar_api.replicas.ReplicasMiddleware',  # Solo con DB_REPLICAS
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -34,7 +38,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'contenido.middleware.LoggingMiddleware',  # Middleware personalizado
 ]
 
 ROOT_URLCONF = 'bienestar_api.urls'
@@ -56,19 +59,95 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'bienestar_api.wsgi.application'
+ASGI_APPLICATION = 'bienestar_api.asgi.application'
+# Lecturas de carreras, anuncios y perfil como vistas asíncronas (asgi.py lo activa)
+VISTAS_ASINCRONAS = config('VISTAS_ASINCRONAS', default=False, cast=bool)
+
+# Listados de carreras y anuncios con .values() y conversores precompilados
+# en vez de ModelSerializer por fila (bienestar_api/compacto.py)
+LISTAS_COMPACTAS = config('LISTAS_COMPACTAS', default=True, cast=bool)
 
 # Database
+# Conexiones persistentes por hilo (DB_CONN_MAX_AGE segundos, verificadas antes
+# de reutilizarlas) o, con DB_POOL, el pool de psycopg 3. Con ASGI (asgi.py
+# define SERVIDOR_ASGI) cada hilo del executor retendría su propia conexión
+# ociosa, así que ahí el valor por defecto es el pool si psycopg_pool está
+# instalado y, si no, conexiones sin persistencia, como recomienda Django.
+# El backend agrega métricas de conexiones y del pool en /metrics.
+SERVIDOR_ASGI = config('SERVIDOR_ASGI', default=False, cast=bool)
+DB_POOL = config('DB_POOL', default=SERVIDOR_ASGI and find_spec('psycopg_pool') is not None, cast=bool)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'bienestar_api.db',
         'NAME': config('DB_NAME', default='bienestar_digital'),
         'USER': config('DB_USER', default='postgres'),
         'PASSWORD': config('DB_PASSWORD', default='postgres'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # El pool no admite conexiones persistentes: cada request devuelve la suya
+        'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=0 if SERVIDOR_ASGI else 60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {
+            'pool': {
+                'min_size': config('DB_POOL_MIN', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX', default=10, cast=int),
+                'timeout': config('DB_POOL_TIMEOUT', default=10.0, cast=float),
+            },
+        } if DB_POOL else {},
     }
 }
 
+# Réplicas de lectura: DB_REPLICAS="host[:puerto][/base],..." agrega los alias
+# replica1, replica2... con las credenciales de la principal. Los GET de
+# carreras, anuncios y usuarios se leen de una réplica disponible y al día
+# (bienestar_api/replicas.py), salvo para quien escribió hace menos de
+# REPLICAS_VENTANA_ESCRITURA segundos. Para probar con dos bases locales:
+# createdb -T bienestar_digital bienestar_replica y
+# DB_REPLICAS=localhost/bienestar_replica (verificar_replicas lo comprueba).
+REPLICAS_LECTURA = []
+for _numero, _destino in enumerate(
+    [destino.strip() for destino in config('DB_REPLICAS', default='').split(',') if destino.strip()], 1
+):
+    _direccion, _, _base = _destino.partition('/')
+    _host, _, _puerto = _direccion.partition(':')
+    DATABASES[f'replica{_numero}'] = {
+        **DATABASES['default'],
+        'HOST': _host or DATABASES['default']['HOST'],
+        'PORT': _puerto or DATABASES['default']['PORT'],
+        'NAME': _base or DATABASES['default']['NAME'],
+        # Una réplica caída no debe retener el request más que esto
+        'OPTIONS': {**DATABASES['default']['OPTIONS'], 'connect_timeout': config('DB_REPLICA_TIMEOUT', default=2, cast=int)},
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICAS_LECTURA.append(f'replica{_numero}')
+DATABASE_ROUTERS = ['bienestar_api.replicas.EnrutadorReplicas']
+# Segundos que un usuario sigue leyendo de la principal después de escribir;
+# conviene que supere REPLICAS_RETRASO_MAXIMO + REPLICAS_INTERVALO_SALUD
+REPLICAS_VENTANA_ESCRITURA = config('REPLICAS_VENTANA_ESCRITURA', default=10, cast=int)
+# Una réplica más atrasada que esto (segundos) deja de recibir lecturas
+REPLICAS_RETRASO_MAXIMO = config('REPLICAS_RETRASO_MAXIMO', default=5.0, cast=float)
+# Cada cuánto se revisa la disponibilidad y el retraso de cada réplica
+REPLICAS_INTERVALO_SALUD = config('REPLICAS_INTERVALO_SALUD', default=5.0, cast=float)
+
+# Cache: Redis en producción (REDIS_URL), memoria local en desarrollo y pruebas
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Duración máxima de las entradas del feed de anuncios en caché (segundos)
+ANUNCIOS_FEED_CACHE_TTL = config('ANUNCIOS_FEED_CACHE_TTL', default=300, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -100,7 +179,7 @@ AUTH_USER_MODEL = 'usuarios.Usuario'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'usuarios.authentication.JWTAutenticacionRapida',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -108,7 +187,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'bienestar_api.renderers.JSONRapidoRenderer',  # orjson si está instalado
     ),
 }
 
@@ -120,8 +199,74 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_USER_CLASS': 'usuarios.authentication.UsuarioToken',
+    'TOKEN_REFRESH_SERIALIZER': 'usuarios.serializers.TokenRefreshRevocadoSerializer',
 }
 
+# Contador de vistas de anuncios (flush por lotes)
+VISTAS_FLUSH_INTERVALO = config('VISTAS_FLUSH_INTERVALO', default=5.0, cast=float)
+VISTAS_FLUSH_MAXIMO = config('VISTAS_FLUSH_MAXIMO', default=1000, cast=int)
+
+# Escritura asíncrona de logs de auditoría
+AUDITORIA_ASINCRONA = config('AUDITORIA_ASINCRONA', default=True, cast=bool)
+AUDITORIA_TAMANO_LOTE = config('AUDITORIA_TAMANO_LOTE', default=100, cast=int)
+AUDITORIA_INTERVALO = config('AUDITORIA_INTERVALO', default=1.0, cast=float)
+AUDITORIA_CAPACIDAD_COLA = config('AUDITORIA_CAPACIDAD_COLA', default=10000, cast=int)
+
+# Particionado y retención de logs de auditoría
+AUDITORIA_PARTICIONES_FUTURAS = config('AUDITORIA_PARTICIONES_FUTURAS', default=3, cast=int)
+AUDITORIA_RETENCION_MESES = config('AUDITORIA_RETENCION_MESES', default=12, cast=int)
+AUDITORIA_DIRECTORIO_ARCHIVO = config('AUDITORIA_DIRECTORIO_ARCHIVO', default=os.path.join(BASE_DIR, 'archivo', 'auditoria'))
+
+# Programador de publicación de anuncios (PUBLICACION_AUTOMATICA=False si se
+# ejecuta publicar_programados desde cron)
+PUBLICACION_AUTOMATICA = config('PUBLICACION_AUTOMATICA', default=True, cast=bool)
+PUBLICACION_INTERVALO = config('PUBLICACION_INTERVALO', default=60.0, cast=float)
+
+# Canal de eventos de anuncios en tiempo real (SSE, solo con ASGI)
+TIEMPO_REAL_BROKER = config('TIEMPO_REAL_BROKER', default='redis' if REDIS_URL else 'local')
+TIEMPO_REAL_COLA = config('TIEMPO_REAL_COLA', default=16, cast=int)
+TIEMPO_REAL_HISTORIAL = config('TIEMPO_REAL_HISTORIAL', default=256, cast=int)
+TIEMPO_REAL_LATIDO = config('TIEMPO_REAL_LATIDO', default=20, cast=int)
+
+# Eventos de vista y resúmenes de analítica de anuncios
+ANALITICA_ASINCRONA = config('ANALITICA_ASINCRONA', default=True, cast=bool)
+ANALITICA_TAMANO_LOTE = config('ANALITICA_TAMANO_LOTE', default=500, cast=int)
+ANALITICA_RETENCION_EVENTOS_DIAS = config('ANALITICA_RETENCION_EVENTOS_DIAS', default=7, cast=int)
+ANALITICA_RETENCION_HORAS_DIAS = config('ANALITICA_RETENCION_HORAS_DIAS', default=30, cast=int)
+
+# Máximo de resultados de la búsqueda de carreras en el respaldo FTS5 (SQLite)
+BUSQUEDA_MAXIMO_RESULTADOS = config('BUSQUEDA_MAXIMO_RESULTADOS', default=500, cast=int)
+
+# Importación masiva de usuarios (IMPORTACION_PROCESOS=0 usa todos los núcleos)
+IMPORTACION_TAMANO_LOTE = config('IMPORTACION_TAMANO_LOTE', default=500, cast=int)
+IMPORTACION_PROCESOS = config('IMPORTACION_PROCESOS', default=0, cast=int)
+# Sin avance guardado en este tiempo, una importación en_proceso se considera
+# abandonada y puede reanudarse (debe superar lo que tarda un lote)
+IMPORTACION_LATIDO_MAXIMO = config('IMPORTACION_LATIDO_MAXIMO', default=600, cast=int)
+
+# Verificación de claves al iniciar sesión: hilos del pool de hashing
+# (0 = un hilo por núcleo) y logins en curso antes de responder 503
+# (0 = 16 por hilo)
+LOGIN_HILOS_HASH = config('LOGIN_HILOS_HASH', default=0, cast=int)
+LOGIN_CAPACIDAD_HASH = config('LOGIN_CAPACIDAD_HASH', default=0, cast=int)
+
+# Hilos por proceso que calculan en paralelo las secciones de /api/bootstrap/;
+# cada uno mantiene su propia conexión a la base de datos
+BOOTSTRAP_HILOS = config('BOOTSTRAP_HILOS', default=8, cast=int)
+
+# Sincronización incremental de carreras y anuncios (GET .../sync/?token=):
+# cada sincronización vuelve a revisar SINCRONIZACION_MARGEN segundos hacia
+# atrás (mayor que el desfase entre relojes y que la transacción de escritura
+# más larga); los tokens más antiguos que la retención reciben el catálogo
+# completo (purgar_eliminaciones borra las eliminaciones vencidas)
+SINCRONIZACION_MARGEN = config('SINCRONIZACION_MARGEN', default=120, cast=int)
+SINCRONIZACION_RETENCION_DIAS = config('SINCRONIZACION_RETENCION_DIAS', default=30, cast=int)
+SINCRONIZACION_LIMITE = config('SINCRONIZACION_LIMITE', default=500, cast=int)
+
+# Filas que trae cada ida a la base de datos al exportar en streaming
+EXPORTACION_TAMANO_LOTE = config('EXPORTACION_TAMANO_LOTE', default=2000, cast=int)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -130,6 +275,11 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Instrumentación de requests
+INSTRUMENTACION_MUESTREO = config('INSTRUMENTACION_MUESTREO', default=0.01, cast=float)
+INSTRUMENTACION_UMBRAL_LENTO = config('INSTRUMENTACION_UMBRAL_LENTO', default=1.0, cast=float)
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -143,7 +293,7 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            '()': 'contenido.middleware.ArchivoEnColaHandler',
             'filename': os.path.join(BASE_DIR, 'logs', 'bienestar.log'),
             'formatter': 'verbose',
         },
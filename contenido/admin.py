@@ -27,10 +27,10 @@ class CarreraAdmin(admin.ModelAdmin):
 
 @admin.register(Anuncio)
 class AnuncioAdmin(admin.ModelAdmin):
-    list_display = ['titulo', 'tipo', 'creado_por', 'activo', 'veces_visto', 'creado_en']
-    list_filter = ['tipo', 'activo', 'creado_en']
+    list_display = ['titulo', 'tipo', 'creado_por', 'activo', 'visible', 'veces_visto', 'creado_en']
+    list_filter = ['tipo', 'activo', 'visible', 'creado_en']
     search_fields = ['titulo', 'contenido']
-    readonly_fields = ['creado_en', 'actualizado_en', 'veces_visto']
+    readonly_fields = ['creado_en', 'actualizado_en', 'veces_visto', 'visible']
     
     fieldsets = (
         ('Información', {
@@ -40,7 +40,7 @@ class AnuncioAdmin(admin.ModelAdmin):
             'fields': ('link_zoom', 'link_encuesta', 'link_recurso')
         }),
         ('Control', {
-            'fields': ('creado_por', 'activo', 'fecha_publicacion', 'fecha_expiracion')
+            'fields': ('creado_por', 'activo', 'visible', 'fecha_publicacion', 'fecha_expiracion')
         }),
         ('Estadísticas', {
             'fields': ('veces_visto', 'creado_en', 'actualizado_en')
@@ -54,6 +54,9 @@ class LogAuditoriaAdmin(admin.ModelAdmin):
     list_filter = ['accion', 'modelo', 'timestamp']
     search_fields = ['usuario__email', 'modelo', 'objeto_id']
     readonly_fields = ['usuario', 'modelo', 'objeto_id', 'accion', 'detalles', 'ip_address', 'timestamp']
+    list_select_related = ['usuario']
+    # Evita el COUNT(*) sobre toda la tabla al filtrar
+    show_full_result_count = False
     
     def has_add_permission(self, request):
         return False
@@ -0,0 +1,170 @@
+import atexit
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .auditoria import EscritorEnLotes
+from .metricas import registro
+
+logger = logging.getLogger('contenido')
+
+escritor_eventos = EscritorEnLotes(
+    'EventoVista', 'eventos de vista',
+    tamano_lote=getattr(settings, 'ANALITICA_TAMANO_LOTE', 500),
+    intervalo=getattr(settings, 'ANALITICA_INTERVALO', 1.0),
+    capacidad=getattr(settings, 'ANALITICA_CAPACIDAD_COLA', 10000),
+    asincrono=getattr(settings, 'ANALITICA_ASINCRONA', True),
+)
+registro.medidor(
+    'bienestar_eventos_vista_cola', 'Eventos de vista en cola de escritura', escritor_eventos.pendientes
+)
+
+TAMANO_LOTE_PODA = 5000
+
+
+def registrar_evento_vista(anuncio_id, usuario):
+    """Encolar el evento de vista con el usuario y su curso"""
+    from .models import EventoVista
+
+    autenticado = usuario is not None and usuario.is_authenticated
+    evento = EventoVista(
+        anuncio_id=anuncio_id,
+        usuario_id=usuario.pk if autenticado else None,
+        curso=(getattr(usuario, 'curso', None) or '') if autenticado else '',
+    )
+    escritor_eventos.registrar(evento)
+    return evento
+
+
+def inicio_de_hora(fecha):
+    return timezone.localtime(fecha).replace(minute=0, second=0, microsecond=0)
+
+
+def inicio_de_dia(fecha):
+    return timezone.localtime(fecha).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _reemplazar_resumenes(periodo, truncar, desde):
+    """Recalcular desde los eventos los resúmenes del periodo a partir de ``desde``"""
+    from .models import EventoVista, ResumenVistas
+
+    filas = (
+        EventoVista.objects.filter(timestamp__gte=desde)
+        .annotate(inicio=truncar('timestamp'))
+        .values('anuncio_id', 'inicio', 'curso')
+        .annotate(vistas=Count('id'), usuarios_unicos=Count('usuario', distinct=True))
+        .order_by()
+    )
+    resumenes = [ResumenVistas(periodo=periodo, **fila) for fila in filas.iterator()]
+    with transaction.atomic():
+        ResumenVistas.objects.filter(periodo=periodo, inicio__gte=desde).delete()
+        ResumenVistas.objects.bulk_create(resumenes, batch_size=1000)
+    return len(resumenes)
+
+
+def resumir_vistas():
+    """
+    Actualizar los resúmenes por hora y por día. Se recalculan completos los
+    periodos desde la última hora ya resumida (y su día), de modo que volver
+    a ejecutarlo es idempotente y recoge los eventos que llegaron tarde.
+    """
+    from .models import EventoVista, ResumenVistas
+
+    escritor_eventos.flush()
+    ultima = ResumenVistas.objects.filter(periodo='hora').order_by('-inicio').values_list('inicio', flat=True).first()
+    if ultima is None:
+        ultima = EventoVista.objects.aggregate(primero=Min('timestamp'))['primero']
+        if ultima is None:
+            return 0, 0
+    horas = _reemplazar_resumenes('hora', TruncHour, inicio_de_hora(ultima))
+    dias = _reemplazar_resumenes('dia', TruncDay, inicio_de_dia(ultima))
+    return horas, dias
+
+
+def podar(retencion_dias=None, retencion_horas_dias=None):
+    """Eliminar los eventos crudos ya resumidos y los resúmenes por hora antiguos"""
+    from .models import EventoVista, ResumenVistas
+
+    ahora = timezone.now()
+    retencion_dias = retencion_dias or getattr(settings, 'ANALITICA_RETENCION_EVENTOS_DIAS', 7)
+    retencion_horas_dias = retencion_horas_dias or getattr(settings, 'ANALITICA_RETENCION_HORAS_DIAS', 30)
+    # Nunca se borran eventos del día que todavía se recalcula
+    ultima = ResumenVistas.objects.filter(periodo='hora').order_by('-inicio').values_list('inicio', flat=True).first()
+    corte = ahora - timedelta(days=retencion_dias)
+    corte = min(corte, inicio_de_dia(ultima)) if ultima is not None else None
+    eventos = 0
+    if corte is not None:
+        antiguos = EventoVista.objects.filter(timestamp__lt=corte)
+        while True:
+            ids = list(antiguos.values_list('id', flat=True)[:TAMANO_LOTE_PODA])
+            if not ids:
+                break
+            eventos += EventoVista.objects.filter(id__in=ids).delete()[0]
+    horas, _ = ResumenVistas.objects.filter(
+        periodo='hora', inicio__lt=ahora - timedelta(days=retencion_horas_dias)
+    ).delete()
+    return eventos, horas
+
+
+def estadisticas_anuncio(anuncio, dias=30, horas=48):
+    """Vistas del anuncio por día, por hora y por curso leídas solo de los resúmenes"""
+    from .models import ResumenVistas
+
+    ahora = timezone.now()
+    resumenes = ResumenVistas.objects.filter(anuncio=anuncio)
+    por_dia = defaultdict(lambda: {'vistas': 0, 'usuarios_unicos': 0})
+    por_curso = defaultdict(int)
+    for fila in resumenes.filter(periodo='dia', inicio__gte=inicio_de_dia(ahora - timedelta(days=dias - 1))).values(
+        'inicio', 'curso', 'vistas', 'usuarios_unicos'
+    ):
+        dia = por_dia[timezone.localtime(fila['inicio']).date()]
+        dia['vistas'] += fila['vistas']
+        dia['usuarios_unicos'] += fila['usuarios_unicos']
+        por_curso[fila['curso']] += fila['vistas']
+    por_hora = (
+        resumenes.filter(periodo='hora', inicio__gte=inicio_de_hora(ahora - timedelta(hours=horas - 1)))
+        .values('inicio').annotate(vistas=Sum('vistas')).order_by('inicio')
+    )
+    return {
+        'anuncio': anuncio.pk,
+        'titulo': anuncio.titulo,
+        'tipo': anuncio.tipo,
+        'total_vistas': anuncio.total_vistas(),
+        'vistas_periodo': sum(por_curso.values()),
+        'por_curso': [
+            {'curso': curso or None, 'vistas': vistas}
+            for curso, vistas in sorted(por_curso.items(), key=lambda item: -item[1])
+        ],
+        'por_dia': [{'fecha': fecha, **valores} for fecha, valores in sorted(por_dia.items())],
+        'por_hora': [{'inicio': fila['inicio'], 'vistas': fila['vistas']} for fila in por_hora],
+    }
+
+
+def estadisticas_generales(dias=30):
+    """Vistas de todos los anuncios por tipo y por curso en los últimos días"""
+    from .models import ResumenVistas
+
+    diarios = ResumenVistas.objects.filter(
+        periodo='dia', inicio__gte=inicio_de_dia(timezone.now() - timedelta(days=dias - 1))
+    )
+    por_tipo = diarios.values('anuncio__tipo').annotate(vistas=Sum('vistas')).order_by('-vistas')
+    por_curso = diarios.values('curso').annotate(vistas=Sum('vistas')).order_by('-vistas')
+    return {
+        'dias': dias,
+        'por_tipo': [{'tipo': fila['anuncio__tipo'], 'vistas': fila['vistas']} for fila in por_tipo],
+        'por_curso': [{'curso': fila['curso'] or None, 'vistas': fila['vistas']} for fila in por_curso],
+    }
+
+
+@atexit.register
+def _flush_al_salir():
+    try:
+        escritor_eventos.detener()
+    except Exception:
+        logger.exception('No se pudieron escribir los eventos de vista pendientes al salir')
@@ -5,6 +5,16 @@ class ContenidoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contenido'
     verbose_name = 'Contenido'
+    
+    def ready(self):
+        # Registrar las señales que invalidan el caché del feed de anuncios,
+        # reprograman la publicación, emiten los eventos en tiempo real,
+        # mantienen el índice de recomendaciones y registran las eliminaciones
+        from . import cache, publicacion, recomendaciones, sincronizacion, tiempo_real  # noqa: F401
+        # Índice de texto completo de carreras (columna tsvector en PostgreSQL, FTS5 en SQLite)
+        from django.db.models.signals import post_migrate
+        from .busqueda import preparar_indice
+        post_migrate.connect(preparar_indice, sender=self)
 
 
 
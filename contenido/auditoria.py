@@ -0,0 +1,176 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+
+from .metricas import registro
+
+logger = logging.getLogger('contenido')
+
+# Marca en la cola para que el hilo deje de esperar el resto del lote
+_FIN = object()
+
+
+class EscritorEnLotes:
+    """
+    Escribe registros de un modelo fuera del ciclo del request.
+
+    Los registros se encolan en una cola acotada y un hilo en segundo plano
+    los inserta con bulk_create en lotes. Si la cola está llena el registro
+    se escribe de forma síncrona, de modo que nunca se descarta. Al salir,
+    ``detener`` espera a que el hilo escriba el lote que tiene tomado y
+    luego vacía la cola.
+    """
+
+    def __init__(self, modelo, descripcion, tamano_lote=100, intervalo=1.0, capacidad=10000, asincrono=True):
+        self.modelo = modelo
+        self.descripcion = descripcion
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.capacidad = capacidad
+        self.asincrono = asincrono
+        self._cola = queue.Queue(maxsize=self.capacidad)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._hilo = None
+        self._detenido = threading.Event()
+
+    def registrar(self, instancia):
+        """Encolar una instancia sin guardar; escribe en línea si la cola está llena"""
+        if not self.asincrono or self._detenido.is_set():
+            self._guardar([instancia])
+            return
+        try:
+            self._cola.put_nowait(instancia)
+        except queue.Full:
+            logger.warning('Cola de %s llena, escribiendo de forma síncrona', self.descripcion)
+            self._guardar([instancia])
+            return
+        self._asegurar_hilo()
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def flush(self):
+        """Vaciar la cola completa; devuelve la cantidad de registros escritos"""
+        escritos = 0
+        with self._flush_lock:
+            while True:
+                lote = self._tomar_lote(bloquear=False)
+                if not lote:
+                    return escritos
+                self._guardar(lote)
+                escritos += len(lote)
+
+    def detener(self):
+        """Terminar el hilo con su lote escrito y vaciar la cola; lo que llegue después se escribe en línea"""
+        self._detenido.set()
+        hilo = self._hilo
+        if hilo is not None and hilo.is_alive():
+            try:
+                self._cola.put_nowait(_FIN)
+            except queue.Full:
+                pass  # con la cola llena el hilo completa su lote sin esperar
+            hilo.join()
+        return self.flush()
+
+    def _tomar_lote(self, bloquear):
+        lote = []
+        limite = time.monotonic() + self.intervalo
+        while len(lote) < self.tamano_lote:
+            try:
+                if bloquear:
+                    espera = limite - time.monotonic()
+                    if espera <= 0:
+                        break
+                    instancia = self._cola.get(timeout=espera)
+                else:
+                    instancia = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if instancia is _FIN:
+                break
+            lote.append(instancia)
+        return lote
+
+    def _guardar(self, lote):
+        modelo = apps.get_model('contenido', self.modelo)
+        try:
+            modelo.objects.bulk_create(lote, batch_size=self.tamano_lote)
+            return
+        except Exception:
+            logger.exception('Falló la escritura en lote de %s %s, reintentando uno a uno', len(lote), self.descripcion)
+        # Aislar los registros defectuosos para no perder el resto del lote
+        for instancia in lote:
+            try:
+                instancia.save()
+            except Exception:
+                logger.exception('No se pudo guardar %s en %s', instancia, self.descripcion)
+
+    def _asegurar_hilo(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self._ejecutar, name=f'escritor-{self.modelo.lower()}', daemon=True)
+            self._hilo.start()
+
+    def _ejecutar(self):
+        while not self._detenido.is_set():
+            lote = self._tomar_lote(bloquear=True)
+            if not lote:
+                continue
+            try:
+                with self._flush_lock:
+                    self._guardar(lote)
+            finally:
+                close_old_connections()
+
+
+class EscritorAuditoria(EscritorEnLotes):
+    """Escritor de LogAuditoria configurado con los ajustes AUDITORIA_*"""
+
+    def __init__(self, tamano_lote=None, intervalo=None, capacidad=None, asincrono=None):
+        super().__init__(
+            'LogAuditoria', 'logs de auditoría',
+            tamano_lote=tamano_lote or getattr(settings, 'AUDITORIA_TAMANO_LOTE', 100),
+            intervalo=intervalo if intervalo is not None else getattr(settings, 'AUDITORIA_INTERVALO', 1.0),
+            capacidad=capacidad or getattr(settings, 'AUDITORIA_CAPACIDAD_COLA', 10000),
+            asincrono=asincrono if asincrono is not None else getattr(settings, 'AUDITORIA_ASINCRONA', True),
+        )
+
+
+escritor_auditoria = EscritorAuditoria()
+registro.medidor(
+    'bienestar_auditoria_cola', 'Logs de auditoría en cola de escritura', escritor_auditoria.pendientes
+)
+
+
+def registrar_auditoria(usuario, modelo, objeto_id, accion, detalles=None, ip_address=None):
+    """Registrar una acción en el log de auditoría sin bloquear el request"""
+    from .models import LogAuditoria
+
+    log = LogAuditoria(
+        usuario=usuario if usuario is not None and usuario.is_authenticated else None,
+        modelo=modelo,
+        objeto_id=str(objeto_id),
+        accion=accion,
+        detalles=detalles if detalles is not None else {},
+        ip_address=ip_address,
+    )
+    escritor_auditoria.registrar(log)
+    return log
+
+
+@atexit.register
+def _flush_al_salir():
+    try:
+        escritor_auditoria.detener()
+    except Exception:
+        logger.exception('No se pudieron escribir los logs de auditoría pendientes al salir')
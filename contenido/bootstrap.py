@@ -0,0 +1,145 @@
+import contextvars
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse, QueryDict
+from django.urls import resolve, reverse
+
+from bienestar_api.renderers import JSONRapidoRenderer
+from bienestar_api.replicas import solicitud_anidada
+
+from .metricas import registro
+
+logger = logging.getLogger('contenido')
+
+# (sección, nombre de la ruta, query string): cada sección es la respuesta de ese endpoint
+SECCIONES = (
+    ('usuario', 'usuario-perfil', ''),
+    ('anuncios', 'anuncio-list', ''),
+    ('carreras', 'carrera-list', 'total=true'),
+)
+
+# Headers del request original que no pasan a las secciones
+HEADERS_OMITIDOS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'CONTENT_LENGTH', 'CONTENT_TYPE')
+
+duracion_secciones = registro.histograma(
+    'bienestar_bootstrap_seccion_segundos', 'Tiempo de cada sección de /api/bootstrap/', ('seccion',)
+)
+
+
+class ArmadorBootstrap:
+    """
+    Arma /api/bootstrap/ atendiendo cada sección con la vista de su
+    endpoint (permisos, caché del feed, listas compactas y réplicas
+    incluidos), en paralelo: la primera en el hilo del request y las demás
+    en un pool de ``BOOTSTRAP_HILOS`` hilos. Cada hilo del pool conserva su
+    conexión a la base de datos según CONN_MAX_AGE, como un worker más, y
+    cada sección tiene su propio estado de réplicas. Las respuestas ya
+    renderizadas se concatenan sin volver a decodificarlas.
+    """
+
+    def __init__(self, hilos=None):
+        self.hilos = hilos or getattr(settings, 'BOOTSTRAP_HILOS', 8)
+        self._pool = None
+        self._vistas = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.hilos, thread_name_prefix='bootstrap')
+        return self._pool
+
+    def vistas(self):
+        """(sección, ruta, query string, vista síncrona, ResolverMatch) de cada sección"""
+        if self._vistas is None:
+            vistas = []
+            for seccion, nombre, consulta in SECCIONES:
+                ruta = reverse(nombre)
+                match = resolve(ruta)
+                # Con VISTAS_ASINCRONAS la ruta apunta a la corrutina; aquí se usa la vista síncrona
+                vistas.append((seccion, ruta, consulta, getattr(match.func, 'vista_sincrona', match.func), match))
+            self._vistas = vistas
+        return self._vistas
+
+    def armar(self, request, tokens=None):
+        """
+        Respuesta con las secciones y, en el login, los tokens. Una sección
+        que falla queda en null y su código de estado en ``errores``; si es
+        el perfil por un problema de autenticación, se devuelve esa respuesta.
+        """
+        autorizacion = f'Bearer {tokens["access"]}' if tokens else request.META.get('HTTP_AUTHORIZATION', '')
+        tareas = [
+            (seccion, vista, self.subrequest(request, ruta, consulta, match, autorizacion))
+            for seccion, ruta, consulta, vista, match in self.vistas()
+        ]
+        futuros = [
+            self.pool.submit(contextvars.copy_context().run, self.atender, seccion, vista, sub)
+            for seccion, vista, sub in tareas[1:]
+        ]
+        resultados = [self.atender(*tareas[0], en_pool=False)] + [futuro.result() for futuro in futuros]
+
+        partes = []
+        if tokens:
+            partes.append(JSONRapidoRenderer().render(tokens)[1:-1])
+        errores = {}
+        for (seccion, _, _), (estado, contenido) in zip(tareas, resultados):
+            if seccion == 'usuario' and estado in (401, 403):
+                return HttpResponse(contenido, status=estado, content_type='application/json')
+            if 200 <= estado < 300 and contenido:
+                partes.append(b'"%s":%s' % (seccion.encode(), contenido))
+            else:
+                partes.append(b'"%s":null' % seccion.encode())
+                errores[seccion] = estado
+        if errores:
+            partes.append(b'"errores":' + JSONRapidoRenderer().render(errores))
+        respuesta = HttpResponse(b'{' + b','.join(partes) + b'}', content_type='application/json')
+        respuesta['Cache-Control'] = 'no-store'
+        return respuesta
+
+    @staticmethod
+    def subrequest(request, ruta, consulta, match, autorizacion):
+        """GET a ``ruta`` con las credenciales del request original"""
+        sub = copy.copy(request)
+        sub.META = {clave: valor for clave, valor in request.META.items() if clave not in HEADERS_OMITIDOS}
+        sub.META.update({
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': consulta,
+            'HTTP_ACCEPT': 'application/json', 'HTTP_AUTHORIZATION': autorizacion,
+        })
+        sub.method = 'GET'
+        sub.path = sub.path_info = ruta
+        sub.GET = QueryDict(consulta)
+        sub.POST = QueryDict()
+        sub.resolver_match = match
+        sub.__dict__.pop('user', None)
+        return sub
+
+    @staticmethod
+    def atender(seccion, vista, sub, en_pool=True):
+        """(código de estado, cuerpo JSON) de la vista de la sección"""
+        inicio = time.perf_counter()
+        if en_pool:
+            close_old_connections()
+        try:
+            with solicitud_anidada():
+                respuesta = vista(sub)
+                if hasattr(respuesta, 'render'):
+                    respuesta.render()
+            return respuesta.status_code, respuesta.content
+        except Exception:
+            logger.exception('Error en la sección %s de /api/bootstrap/', seccion)
+            return 500, None
+        finally:
+            if en_pool:
+                close_old_connections()
+            duracion_secciones.observar(time.perf_counter() - inicio, seccion)
+
+
+armador = ArmadorBootstrap()
@@ -0,0 +1,133 @@
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Carrera
+
+logger = logging.getLogger('contenido')
+
+# Campos indexados y su peso en el ranking (A es el más relevante)
+CAMPOS_BUSQUEDA = [
+    ('nombre', 'A'),
+    ('areas_interes', 'B'),
+    ('habilidades_necesarias', 'B'),
+    ('descripcion', 'C'),
+    ('campo_laboral', 'C'),
+]
+TABLA_FTS = f'{Carrera._meta.db_table}_fts'
+COLUMNA_VECTOR = 'vector_busqueda'
+INDICE_GIN = f'{Carrera._meta.db_table}_busqueda_gin'
+
+
+def preparar_indice(using='default', **kwargs):
+    """
+    Crear el índice de búsqueda de carreras (se ejecuta tras migrate).
+
+    PostgreSQL: columna tsvector generada con configuración 'spanish' e índice
+    GIN; la base de datos la mantiene al insertar o actualizar.
+    SQLite: tabla virtual FTS5 mantenida por triggers.
+    """
+    from django.db import connections
+
+    conexion = connections[using]
+    tabla = conexion.ops.quote_name(Carrera._meta.db_table)
+    with conexion.cursor() as cursor:
+        if conexion.vendor == 'postgresql':
+            vector = ' || '.join(
+                f"setweight(to_tsvector('spanish'::regconfig, coalesce({conexion.ops.quote_name(campo)}, '')), '{peso}')"
+                for campo, peso in CAMPOS_BUSQUEDA
+            )
+            cursor.execute(
+                f'ALTER TABLE {tabla} ADD COLUMN IF NOT EXISTS {COLUMNA_VECTOR} tsvector '
+                f'GENERATED ALWAYS AS ({vector}) STORED'
+            )
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {INDICE_GIN} ON {tabla} USING gin ({COLUMNA_VECTOR})')
+        elif conexion.vendor == 'sqlite':
+            columnas = ', '.join(campo for campo, _ in CAMPOS_BUSQUEDA)
+            nuevos = ', '.join(f'new.{campo}' for campo, _ in CAMPOS_BUSQUEDA)
+            viejos = ', '.join(f'old.{campo}' for campo, _ in CAMPOS_BUSQUEDA)
+            cursor.execute(f"SELECT 1 FROM sqlite_master WHERE name = '{TABLA_FTS}'")
+            existia = cursor.fetchone() is not None
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5({columnas}, '
+                f"content={tabla}, content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON {tabla} BEGIN '
+                f'INSERT INTO {TABLA_FTS}(rowid, {columnas}) VALUES (new.id, {nuevos}); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON {tabla} BEGIN '
+                f"INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); END"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au AFTER UPDATE ON {tabla} BEGIN '
+                f"INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); "
+                f'INSERT INTO {TABLA_FTS}(rowid, {columnas}) VALUES (new.id, {nuevos}); END'
+            )
+            if not existia:
+                cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')")
+
+
+def buscar_carreras(queryset, texto):
+    """Filtrar carreras por texto y anotar ``rank`` (mayor es más relevante)"""
+    texto = texto.strip()
+    if not texto:
+        return queryset
+    if connection.vendor == 'postgresql':
+        return _buscar_postgresql(queryset, texto)
+    if connection.vendor == 'sqlite':
+        return _buscar_sqlite(queryset, texto)
+    filtro = Q()
+    for campo, _ in CAMPOS_BUSQUEDA:
+        filtro |= Q(**{f'{campo}__icontains': texto})
+    return queryset.filter(filtro).annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+def _buscar_postgresql(queryset, texto):
+    tabla = connection.ops.quote_name(Carrera._meta.db_table)
+    consulta = "websearch_to_tsquery('spanish'::regconfig, %s)"
+    return queryset.filter(
+        RawSQL(f'{tabla}.{COLUMNA_VECTOR} @@ {consulta}', [texto], output_field=BooleanField())
+    ).annotate(
+        rank=RawSQL(f'ts_rank_cd({tabla}.{COLUMNA_VECTOR}, {consulta})::double precision', [texto],
+                    output_field=FloatField())
+    )
+
+
+def _buscar_sqlite(queryset, texto):
+    # Cada palabra como término literal con prefijo, para no interpretar la sintaxis de FTS5
+    terminos = ' '.join('"{}"*'.format(palabra.replace('"', '""')) for palabra in texto.split())
+    pesos = ', '.join({'A': '10.0', 'B': '4.0', 'C': '1.0'}[peso] for _, peso in CAMPOS_BUSQUEDA)
+    limite = getattr(settings, 'BUSQUEDA_MAXIMO_RESULTADOS', 500)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, -bm25({TABLA_FTS}, {pesos}) FROM {TABLA_FTS} '
+            f'WHERE {TABLA_FTS} MATCH %s ORDER BY 2 DESC LIMIT %s',
+            [terminos, limite],
+        )
+        puntajes = dict(cursor.fetchall())
+    if not puntajes:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+    return queryset.filter(pk__in=puntajes).annotate(
+        rank=Case(
+            *[When(pk=pk, then=Value(puntaje)) for pk, puntaje in puntajes.items()],
+            output_field=FloatField(),
+        )
+    )
+
+
+class BusquedaCarreraFilter(BaseFilterBackend):
+    """Búsqueda de texto completo con ``?q=``; los resultados se ordenan por relevancia"""
+
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        texto = request.query_params.get(self.search_param, '')
+        if not texto.strip():
+            return queryset
+        return buscar_carreras(queryset, texto).order_by('-rank', 'nombre', 'id')
@@ -0,0 +1,134 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from bienestar_api.renderers import JSONRapidoRenderer
+from bienestar_api.replicas import en_primaria
+
+from .metricas import registro
+from .models import Anuncio
+
+CLAVE_VERSION = 'anuncios:feed:version'
+
+
+class ContadorCache:
+    """Contadores de aciertos y fallos del caché del feed (por proceso)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def registrar(self, acierto):
+        with self._lock:
+            if acierto:
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+            }
+
+
+contador_cache = ContadorCache()
+registro.medidor(
+    'bienestar_feed_cache_aciertos_total', 'Aciertos del caché del feed de anuncios',
+    lambda: contador_cache.aciertos, tipo='counter'
+)
+registro.medidor(
+    'bienestar_feed_cache_fallos_total', 'Fallos del caché del feed de anuncios',
+    lambda: contador_cache.fallos, tipo='counter'
+)
+
+
+def version_feed():
+    """Versión actual del contenido del feed"""
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        # Partir desde la hora actual evita reutilizar versiones si la clave fue desalojada
+        cache.add(CLAVE_VERSION, int(time.time() * 1000), None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+async def aversion_feed():
+    version = await cache.aget(CLAVE_VERSION)
+    if version is None:
+        await cache.aadd(CLAVE_VERSION, int(time.time() * 1000), None)
+        version = await cache.aget(CLAVE_VERSION)
+    return version
+
+
+def invalidar_feed():
+    """Incrementar la versión del feed; las entradas anteriores quedan inalcanzables"""
+    try:
+        return cache.incr(CLAVE_VERSION)
+    except ValueError:
+        version_feed()
+        return cache.incr(CLAVE_VERSION)
+
+
+def respuesta_feed(request, generar):
+    """
+    Servir el feed desde el caché o generarlo y guardarlo ya renderizado.
+
+    ``generar`` devuelve la Response de DRF que se calcularía sin caché.
+    """
+    clave = f'anuncios:feed:{version_feed()}:{request.get_full_path()}'
+    contenido = cache.get(clave)
+    if contenido is not None:
+        contador_cache.registrar(acierto=True)
+        return _respuesta_cacheada(contenido, 'HIT')
+
+    contador_cache.registrar(acierto=False)
+    # Se genera desde la principal: una réplica atrasada dejaría en caché, bajo
+    # la versión nueva, el feed anterior al cambio que la invalidó
+    with en_primaria():
+        respuesta = generar()
+    if respuesta.status_code != 200:
+        return respuesta
+    contenido = JSONRapidoRenderer().render(respuesta.data)
+    # El programador de publicación invalida el feed cuando llega una fecha programada
+    cache.set(clave, contenido, getattr(settings, 'ANUNCIOS_FEED_CACHE_TTL', 300))
+    return _respuesta_cacheada(contenido, 'MISS')
+
+
+async def arespuesta_feed(request, agenerar):
+    """respuesta_feed para las vistas asíncronas; ``agenerar`` es una corrutina"""
+    clave = f'anuncios:feed:{await aversion_feed()}:{request.get_full_path()}'
+    contenido = await cache.aget(clave)
+    if contenido is not None:
+        contador_cache.registrar(acierto=True)
+        return _respuesta_cacheada(contenido, 'HIT')
+
+    contador_cache.registrar(acierto=False)
+    with en_primaria():
+        respuesta = await agenerar()
+    if respuesta.status_code != 200:
+        return respuesta
+    contenido = JSONRapidoRenderer().render(respuesta.data)
+    await cache.aset(clave, contenido, getattr(settings, 'ANUNCIOS_FEED_CACHE_TTL', 300))
+    return _respuesta_cacheada(contenido, 'MISS')
+
+
+def _respuesta_cacheada(contenido, estado):
+    respuesta = HttpResponse(contenido, content_type='application/json')
+    respuesta['X-Cache'] = estado
+    return respuesta
+
+
+@receiver(post_save, sender=Anuncio)
+@receiver(post_delete, sender=Anuncio)
+def _invalidar_por_cambio(sender, **kwargs):
+    # Las vistas llegan con UPDATE sin señales: ContadorVistas.flush invalida el feed
+    invalidar_feed()
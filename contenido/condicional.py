@@ -0,0 +1,155 @@
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def validadores(request, *partes):
+    """ETag débil y Last-Modified (el primer valor) a partir de valores baratos de obtener"""
+    ultima_modificacion = partes[0]
+    firma = '|'.join(str(parte) for parte in (request.get_full_path(), request.user.es_profesor()) + partes)
+    etag = f'W/"{hashlib.md5(firma.encode("utf-8")).hexdigest()}"'
+    return etag, ultima_modificacion.timestamp() if ultima_modificacion else None
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified para list y retrieve.
+
+    Los validadores salen de las claves de la página pedida (la misma consulta
+    con LIMIT que usa la paginación por cursor) o de la fila pedida, por lo
+    que un If-None-Match vigente se responde con 304 sin serializar el
+    cuerpo. Solo cuando la respuesta depende del listado completo (``?total``,
+    ``?page=N`` o sin paginación) se usa una agregación sobre todas las filas
+    (máximo actualizado_en, cantidad e id máximo).
+
+    Los listados no envían Last-Modified: el máximo actualizado_en no cambia
+    al borrar o desactivar una fila que no es la última. ``campo_contador``
+    es un campo que se actualiza sin tocar actualizado_en (veces_visto, con
+    F()); su valor persistido entra en el ETag, y con él tampoco el detalle
+    envía Last-Modified. Solo se usa estado de la base de datos, así que
+    todos los procesos calculan el mismo ETag.
+    """
+
+    campo_modificacion = 'actualizado_en'
+    campo_contador = None
+
+    def agregaciones_lista(self):
+        agregaciones = {'modificacion': Max(self.campo_modificacion), 'cantidad': Count('pk'), 'ultimo': Max('pk')}
+        if self.campo_contador:
+            agregaciones['contador'] = Sum(self.campo_contador)
+        return agregaciones
+
+    def validadores_de_lista(self, request, datos):
+        etag, _ = validadores(
+            request, datos['modificacion'], datos['cantidad'], datos['ultimo'], datos.get('contador'),
+        )
+        return etag, None
+
+    def validadores_de_fila(self, request, fila):
+        if fila is None:
+            return None, None
+        etag, ultima_modificacion = validadores(request, *fila)
+        return etag, None if self.campo_contador else ultima_modificacion
+
+    def validadores_de_pagina(self, request, claves):
+        etag, _ = validadores(request, None, *claves)
+        return etag, None
+
+    def campos_detalle(self):
+        return (self.campo_modificacion, 'pk') + ((self.campo_contador,) if self.campo_contador else ())
+
+    def consulta_claves_pagina(self, request, queryset):
+        """Claves de las filas de la página pedida, o None si el validador debe cubrir todo el listado"""
+        paginador = self.paginator
+        if not hasattr(paginador, 'consulta_pagina') or paginador.usar_legado(request) \
+                or paginador.get_incluir_total(request):
+            return None
+        paginador.configurar(queryset, request)
+        # Incluye la fila de más que decide si hay página siguiente
+        consulta, _, _ = paginador.consulta_pagina(queryset, request)
+        return consulta.values_list(*self.campos_detalle())
+
+    def validadores_lista(self, request, queryset):
+        claves = self.consulta_claves_pagina(request, queryset)
+        if claves is not None:
+            return self.validadores_de_pagina(request, list(claves))
+        return self.validadores_de_lista(request, queryset.order_by().aggregate(**self.agregaciones_lista()))
+
+    async def avalidadores_lista(self, request, queryset):
+        claves = self.consulta_claves_pagina(request, queryset)
+        if claves is not None:
+            return self.validadores_de_pagina(request, [fila async for fila in claves])
+        return self.validadores_de_lista(request, await queryset.order_by().aaggregate(**self.agregaciones_lista()))
+
+    def validadores_detalle(self, request, queryset):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        fila = queryset.order_by().filter(
+            **{self.lookup_field: self.kwargs[lookup]}
+        ).values_list(*self.campos_detalle()).first()
+        return self.validadores_de_fila(request, fila)
+
+    async def avalidadores_detalle(self, request, queryset):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        fila = await queryset.order_by().filter(
+            **{self.lookup_field: self.kwargs[lookup]}
+        ).values_list(*self.campos_detalle()).afirst()
+        return self.validadores_de_fila(request, fila)
+
+    def respuesta_condicional(self, request, etag, ultima_modificacion, generar):
+        if etag is not None:
+            respuesta = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+            if respuesta is not None:
+                return self.agregar_validadores(respuesta, etag, ultima_modificacion)
+        respuesta = generar()
+        if etag is not None and respuesta.status_code == 200:
+            self.agregar_validadores(respuesta, etag, ultima_modificacion)
+        return respuesta
+
+    async def arespuesta_condicional(self, request, etag, ultima_modificacion, agenerar):
+        if etag is not None:
+            respuesta = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+            if respuesta is not None:
+                return self.agregar_validadores(respuesta, etag, ultima_modificacion)
+        respuesta = await agenerar()
+        if etag is not None and respuesta.status_code == 200:
+            self.agregar_validadores(respuesta, etag, ultima_modificacion)
+        return respuesta
+
+    @staticmethod
+    def agregar_validadores(respuesta, etag, ultima_modificacion):
+        respuesta['ETag'] = etag
+        if ultima_modificacion is not None:
+            respuesta['Last-Modified'] = http_date(ultima_modificacion)
+        # El contenido depende del rol: revalidar siempre y no compartir entre usuarios
+        patch_cache_control(respuesta, private=True, no_cache=True)
+        patch_vary_headers(respuesta, ['Authorization'])
+        return respuesta
+
+    def list(self, request, *args, **kwargs):
+        etag, ultima_modificacion = self.validadores_lista(request, self.filter_queryset(self.get_queryset()))
+        return self.respuesta_condicional(
+            request, etag, ultima_modificacion, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        etag, ultima_modificacion = self.validadores_detalle(request, self.filter_queryset(self.get_queryset()))
+        return self.respuesta_condicional(
+            request, etag, ultima_modificacion,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+    async def alist(self, request, queryset, *args, **kwargs):
+        etag, ultima_modificacion = await self.avalidadores_lista(request, queryset)
+        return await self.arespuesta_condicional(
+            request, etag, ultima_modificacion,
+            lambda: super(ConditionalGetMixin, self).alist(request, queryset, *args, **kwargs)
+        )
+
+    async def aretrieve(self, request, queryset, *args, **kwargs):
+        etag, ultima_modificacion = await self.avalidadores_detalle(request, queryset)
+        return await self.arespuesta_condicional(
+            request, etag, ultima_modificacion,
+            lambda: super(ConditionalGetMixin, self).aretrieve(request, queryset, *args, **kwargs)
+        )
@@ -0,0 +1,166 @@
+import csv
+import json
+import zlib
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Anuncio, LogAuditoria
+from .vistas import contador_vistas
+
+FORMATOS = ('csv', 'jsonl')
+TIPOS_CONTENIDO = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson; charset=utf-8'}
+
+CAMPOS_AUDITORIA = ('id', 'timestamp', 'usuario_id', 'usuario_email', 'modelo', 'objeto_id', 'accion', 'detalles', 'ip_address')
+CAMPOS_ANUNCIOS = (
+    'id', 'titulo', 'tipo', 'activo', 'creado_por_email', 'creado_en',
+    'fecha_publicacion', 'fecha_expiracion', 'veces_visto',
+)
+
+# Tamaño aproximado de cada trozo enviado al cliente
+TAMANO_TROZO = 64 * 1024
+
+
+def _fecha(valor, fin_del_dia=False):
+    fecha = parse_datetime(valor)
+    if fecha is None:
+        dia = parse_date(valor)
+        if dia is None:
+            raise ValueError(f'Fecha inválida: {valor}')
+        fecha = datetime.combine(dia, time.max if fin_del_dia else time.min)
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
+def filtros_auditoria(usuario=None, modelo=None, accion=None, desde=None, hasta=None):
+    """Traducir los parámetros de exportación a filtros del ORM; ValueError si alguno es inválido"""
+    filtros = {}
+    if usuario:
+        if str(usuario).isdigit():
+            filtros['usuario_id'] = int(usuario)
+        else:
+            filtros['usuario__email'] = usuario
+    if modelo:
+        filtros['modelo'] = modelo
+    if accion:
+        accion = accion.upper()
+        if accion not in dict(LogAuditoria.ACCION_CHOICES):
+            raise ValueError(f'Acción inválida: {accion}')
+        filtros['accion'] = accion
+    if desde:
+        filtros['timestamp__gte'] = _fecha(desde)
+    if hasta:
+        filtros['timestamp__lte'] = _fecha(hasta, fin_del_dia=True)
+    return filtros
+
+
+def filas_auditoria(**parametros):
+    """Logs de auditoría leídos con un cursor del lado del servidor"""
+    queryset = LogAuditoria.objects.filter(**filtros_auditoria(**parametros)).order_by('timestamp', 'id')
+    return queryset.values(
+        'id', 'timestamp', 'usuario_id', 'modelo', 'objeto_id', 'accion', 'detalles', 'ip_address',
+        usuario_email=F('usuario__email'),
+    ).iterator(chunk_size=getattr(settings, 'EXPORTACION_TAMANO_LOTE', 2000))
+
+
+def filas_anuncios():
+    """Estadísticas de vistas por anuncio, incluidas las vistas aún no persistidas"""
+    queryset = Anuncio.objects.order_by('id').values(
+        'id', 'titulo', 'tipo', 'activo', 'creado_en', 'fecha_publicacion', 'fecha_expiracion', 'veces_visto',
+        creado_por_email=F('creado_por__email'),
+    )
+    for fila in queryset.iterator(chunk_size=getattr(settings, 'EXPORTACION_TAMANO_LOTE', 2000)):
+        fila['veces_visto'] += contador_vistas.pendientes(fila['id'])
+        yield fila
+
+
+class _Codificador(DjangoJSONEncoder):
+    """Como DjangoJSONEncoder, pero sin truncar los microsegundos"""
+
+    def default(self, valor):
+        if isinstance(valor, datetime):
+            return valor.isoformat()
+        return super().default(valor)
+
+
+class _Linea:
+    """Destino de csv.writer que devuelve la línea en vez de escribirla"""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_csv(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return valor
+
+
+def lineas(filas, formato, campos):
+    """Serializar las filas una a una como texto CSV (con encabezado) o JSONL"""
+    if formato == 'csv':
+        escritor = csv.writer(_Linea())
+        yield escritor.writerow(campos)
+        for fila in filas:
+            yield escritor.writerow([_valor_csv(fila[campo]) for campo in campos])
+    else:
+        codificador = _Codificador(ensure_ascii=False)
+        for fila in filas:
+            yield codificador.encode({campo: fila[campo] for campo in campos}) + '\n'
+
+
+def exportar(filas, formato, campos, comprimir=False):
+    """
+    Iterador de bytes con la exportación completa. Las líneas se agrupan en
+    trozos de ~64 KB y, si se pide, se comprimen en gzip de forma incremental,
+    de modo que la memoria usada no depende de la cantidad de filas.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato no soportado: {formato}')
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None
+    trozo, tamano = [], 0
+    for linea in lineas(filas, formato, campos):
+        trozo.append(linea)
+        tamano += len(linea)
+        if tamano >= TAMANO_TROZO:
+            datos = ''.join(trozo).encode('utf-8')
+            trozo, tamano = [], 0
+            if compresor is not None:
+                datos = compresor.compress(datos)
+            if datos:
+                yield datos
+    datos = ''.join(trozo).encode('utf-8')
+    if compresor is not None:
+        datos = compresor.compress(datos) + compresor.flush()
+    if datos:
+        yield datos
+
+
+async def aexportar(trozos):
+    """
+    Los trozos de ``exportar`` como iterador asíncrono, para ASGI: con un
+    iterador síncrono Django junta la respuesta completa en memoria antes
+    de enviarla. Cada trozo se produce en el hilo síncrono del request, el
+    mismo en que se abrió el cursor.
+    """
+    siguiente = sync_to_async(next)
+    try:
+        while True:
+            trozo = await siguiente(trozos, None)
+            if trozo is None:
+                return
+            yield trozo
+    finally:
+        await sync_to_async(trozos.close)()
+
+
+def nombre_archivo(nombre, formato, comprimir=False):
+    return f'{nombre}_{timezone.now():%Y%m%d%H%M%S}.{formato}' + ('.gz' if comprimir else '')
@@ -0,0 +1,89 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contenido import rendimiento
+
+
+class Command(BaseCommand):
+    help = (
+        'Suite de rendimiento: micro-benchmarks de serializers y permisos y escenarios de extremo a '
+        'extremo (login, feed, detalle, registrar_vista, escritura_admin) contra un servidor en '
+        'ejecución (--url) o el handler WSGI del proceso. Guarda los resultados en JSON y puede '
+        'compararlos con los de otro commit, fallando si alguna métrica empeora más del umbral'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suites', default='micro,e2e', help='micro, e2e o ambas separadas por comas')
+        parser.add_argument('--escenarios', default=','.join(rendimiento.Escenarios.NOMBRES))
+        parser.add_argument('--url', help='Servidor a probar, p. ej. http://localhost:8000 (por defecto, en proceso)')
+        parser.add_argument('--solicitudes', type=int, default=500, help='Solicitudes por escenario')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Clientes concurrentes por escenario')
+        parser.add_argument('--repeticiones', type=int, default=200, help='Llamadas por micro-benchmark')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--comparar', help='Resultados JSON de referencia (p. ej. del commit base)')
+        parser.add_argument('--umbral', type=float, default=0.15, help='Empeoramiento tolerado (0.15 = 15%%)')
+        parser.add_argument('--umbral-p99', type=float, default=None, help='Umbral para p99 (por defecto, --umbral)')
+
+    def handle(self, *args, **options):
+        suites = {suite.strip() for suite in options['suites'].split(',') if suite.strip()}
+        if not suites or suites - {'micro', 'e2e'}:
+            raise CommandError('--suites admite micro y e2e')
+        escenarios = [nombre.strip() for nombre in options['escenarios'].split(',') if nombre.strip()]
+        desconocidos = set(escenarios) - set(rendimiento.Escenarios.NOMBRES)
+        if desconocidos:
+            raise CommandError(f'Escenarios desconocidos: {", ".join(sorted(desconocidos))}')
+        base = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as archivo:
+                    base = json.load(archivo)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'No se pudo leer {options["comparar"]}: {error}')
+
+        metricas = {}
+        if 'micro' in suites:
+            for nombre, valores in rendimiento.micro_benchmarks(options['repeticiones']).items():
+                metricas[f'micro.{nombre}'] = valores
+                self.mostrar(f'micro.{nombre}', valores)
+        if 'e2e' in suites:
+            cliente = rendimiento.ClienteHTTP(options['url']) if options['url'] else rendimiento.ClienteEnProceso()
+            try:
+                suite = rendimiento.Escenarios(cliente, options['semilla'])
+            except ValueError as error:
+                raise CommandError(str(error))
+            for nombre in escenarios:
+                valores = suite.ejecutar(nombre, options['solicitudes'], options['concurrencia'])
+                metricas[f'e2e.{nombre}'] = valores
+                self.mostrar(f'e2e.{nombre}', valores)
+
+        parametros = {
+            clave: options[clave]
+            for clave in ('suites', 'escenarios', 'url', 'solicitudes', 'concurrencia', 'repeticiones', 'semilla')
+        }
+        resultados = rendimiento.resultados(metricas, parametros)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Resultados guardados en {options["salida"]}')
+
+        if base is not None:
+            filas = rendimiento.comparar(resultados, base, options['umbral'], options['umbral_p99'])
+            self.stdout.write(f'\nComparación con {options["comparar"]} ({base["entorno"].get("commit") or "sin commit"}):')
+            for nombre, campo, anterior, actual, cambio, regresion in filas:
+                marca = self.style.ERROR('REGRESIÓN') if regresion else 'ok'
+                self.stdout.write(
+                    f'{nombre:<36} {campo:<10} {anterior:>10.2f} -> {actual:>10.2f} {cambio:>+8.1%}  {marca}'
+                )
+            regresiones = sum(1 for fila in filas if fila[-1])
+            if regresiones:
+                raise CommandError(f'{regresiones} métricas empeoraron más del umbral')
+            self.stdout.write(self.style.SUCCESS('Sin regresiones'))
+
+    def mostrar(self, nombre, valores):
+        errores = f' - {valores["errores"]} errores' if valores.get('errores') else ''
+        self.stdout.write(
+            f'{nombre:<36} {valores["throughput"]:>9.0f}/s  p50 {valores["p50"]:>8.2f} ms  '
+            f'p95 {valores["p95"]:>8.2f} ms  p99 {valores["p99"]:>8.2f} ms{errores}'
+        )
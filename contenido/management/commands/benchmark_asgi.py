@@ -0,0 +1,136 @@
+import asyncio
+import importlib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncRequestFactory, RequestFactory
+from django.urls import clear_url_caches
+
+from usuarios.serializers import CustomTokenObtainPairSerializer
+
+RUTAS = {
+    'carreras': '/api/carreras/',
+    'anuncios': '/api/anuncios/',
+    'perfil': '/api/auth/usuarios/perfil/',
+}
+# asgi-sync: vistas de DRF ejecutadas por Django en su hilo de vistas síncronas
+MODOS = ('wsgi', 'asgi-sync', 'asgi')
+
+
+def cargar_vistas(asincronas):
+    """Volver a armar las URLs con las vistas asíncronas activadas o no"""
+    settings.VISTAS_ASINCRONAS = asincronas
+    for modulo in ('contenido.urls', 'usuarios.urls', settings.ROOT_URLCONF):
+        if modulo in sys.modules:
+            importlib.reload(sys.modules[modulo])
+    clear_url_caches()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara en el proceso el throughput y la latencia de cola de las lecturas de carreras, '
+        'anuncios y perfil con muchos clientes concurrentes: handler WSGI (N hilos de worker), '
+        'handler ASGI con las vistas síncronas de DRF y handler ASGI con las vistas asíncronas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rutas', default=','.join(RUTAS), help=f'Subconjunto de: {", ".join(RUTAS)}')
+        parser.add_argument('--concurrencia', default='1,32,256', help='Clientes concurrentes, separados por comas')
+        parser.add_argument('--solicitudes', type=int, default=2000, help='Solicitudes por ruta y nivel')
+        parser.add_argument('--hilos', type=int, default=8, help='Hilos de worker del modo WSGI')
+        parser.add_argument('--usuario', help='Email del usuario autenticado (por defecto, el primer estudiante)')
+
+    def handle(self, *args, **options):
+        rutas = [ruta.strip() for ruta in options['rutas'].split(',') if ruta.strip()]
+        desconocidas = set(rutas) - set(RUTAS)
+        if desconocidas:
+            raise CommandError(f'Rutas desconocidas: {", ".join(sorted(desconocidas))}')
+        try:
+            niveles = [int(nivel) for nivel in options['concurrencia'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrencia debe ser una lista de enteros')
+
+        Usuario = get_user_model()
+        usuarios = Usuario.objects.filter(is_active=True)
+        usuario = (
+            usuarios.filter(email=options['usuario']).first() if options['usuario']
+            else usuarios.filter(rol='estudiante').first()
+        )
+        if usuario is None:
+            raise CommandError('No se encontró el usuario para autenticar las solicitudes')
+        token = str(CustomTokenObtainPairSerializer.get_token(usuario).access_token)
+
+        self.stdout.write(
+            f'{"ruta":<10} {"modo":<9} {"clientes":>8} {"req/s":>9} '
+            f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errores":>8}'
+        )
+        original = getattr(settings, 'VISTAS_ASINCRONAS', False)
+        try:
+            for nombre in rutas:
+                for clientes in niveles:
+                    for modo in MODOS:
+                        cargar_vistas(modo == 'asgi')
+                        resultado = asyncio.run(self.medir(modo, RUTAS[nombre], token, clientes, options))
+                        self.stdout.write(
+                            f'{nombre:<10} {modo:<9} {clientes:>8} {resultado["throughput"]:>9.0f} '
+                            f'{resultado["p50"]:>8.1f} {resultado["p95"]:>8.1f} {resultado["p99"]:>8.1f} '
+                            f'{resultado["errores"]:>8}'
+                        )
+        finally:
+            cargar_vistas(original)
+
+    async def medir(self, modo, ruta, token, clientes, options):
+        cabeceras = {'Authorization': f'Bearer {token}'}
+        total = options['solicitudes']
+        if modo == 'wsgi':
+            handler, fabrica = WSGIHandler(), RequestFactory()
+            hilos = ThreadPoolExecutor(options['hilos'])
+            loop = asyncio.get_running_loop()
+
+            def atender_sincrono():
+                return handler.get_response(fabrica.get(ruta, headers=cabeceras))
+
+            async def atender():
+                return await loop.run_in_executor(hilos, atender_sincrono)
+        else:
+            handler, fabrica = ASGIHandler(), AsyncRequestFactory()
+
+            async def atender():
+                return await handler.get_response_async(fabrica.get(ruta, headers=cabeceras))
+
+        latencias, errores, restantes = [], [0], [total]
+
+        async def cliente():
+            while restantes[0] > 0:
+                restantes[0] -= 1
+                inicio = time.perf_counter()
+                response = await atender()
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                if response.status_code != 200:
+                    errores[0] += 1
+
+        # Calentamiento: conexiones abiertas y cachés cargados antes de medir
+        for _ in range(5):
+            await atender()
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(clientes)))
+        duracion = time.perf_counter() - inicio
+        if modo == 'wsgi':
+            hilos.submit(connections.close_all).result()
+            hilos.shutdown()
+        latencias = np.array(latencias)
+        return {
+            'throughput': total / duracion,
+            'p50': np.percentile(latencias, 50),
+            'p95': np.percentile(latencias, 95),
+            'p99': np.percentile(latencias, 99),
+            'errores': errores[0],
+        }
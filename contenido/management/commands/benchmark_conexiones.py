@@ -0,0 +1,117 @@
+import threading
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+MODOS = ('sin-persistencia', 'persistente', 'pool')
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el costo por request de abrir una conexión nueva en cada request, de las conexiones '
+        'persistentes y del pool de psycopg, con varios hilos atendiendo requests simulados contra '
+        'la base de datos configurada (p. ej. un PostgreSQL local que haga de producción)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests simulados por modo')
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--modos', default=','.join(MODOS), help=f'Subconjunto de: {", ".join(MODOS)}')
+        parser.add_argument('--consulta', default='SELECT 1', help='Consulta que ejecuta cada request')
+        parser.add_argument('--pool-max', type=int, default=None, help='Tamaño máximo del pool (por defecto, --hilos)')
+
+    def handle(self, *args, **options):
+        modos = [modo.strip() for modo in options['modos'].split(',') if modo.strip()]
+        if set(modos) - set(MODOS):
+            raise CommandError(f'Modos desconocidos: {", ".join(sorted(set(modos) - set(MODOS)))}')
+        base = connections[DEFAULT_DB_ALIAS].settings_dict
+        self.stdout.write(f'Base de datos: {base["ENGINE"]} {base["HOST"] or ""} {base["NAME"]}')
+        self.stdout.write(
+            f'{"modo":<17} {"req/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"conexiones nuevas":>18}'
+        )
+        for modo in modos:
+            if modo == 'pool' and connections[DEFAULT_DB_ALIAS].vendor != 'postgresql':
+                self.stdout.write(f'{modo:<17} omitido: el pool requiere PostgreSQL con psycopg 3')
+                continue
+            alias = self.crear_alias(modo, options)
+            try:
+                resultado = self.medir(alias, options)
+            finally:
+                if modo == 'pool':
+                    connections[alias].close_pool()
+                del connections.settings[alias]
+            self.stdout.write(
+                f'{modo:<17} {resultado["throughput"]:>9.0f} {resultado["p50"]:>8.2f} '
+                f'{resultado["p99"]:>8.2f} {resultado["nuevas"]:>18}'
+            )
+
+    def crear_alias(self, modo, options):
+        """Alias temporal con la misma base de datos y la gestión de conexiones del modo"""
+        ajustes = dict(connections[DEFAULT_DB_ALIAS].settings_dict)
+        ajustes['OPTIONS'] = {clave: valor for clave, valor in ajustes['OPTIONS'].items() if clave != 'pool'}
+        ajustes['CONN_MAX_AGE'] = 60 if modo == 'persistente' else 0
+        ajustes['CONN_HEALTH_CHECKS'] = True
+        if modo == 'pool':
+            maximo = options['pool_max'] or options['hilos']
+            ajustes['OPTIONS']['pool'] = {'min_size': min(2, maximo), 'max_size': maximo}
+        alias = f'benchmark-{modo}'
+        connections.settings[alias] = connections.configure_settings({DEFAULT_DB_ALIAS: ajustes})[DEFAULT_DB_ALIAS]
+        return alias
+
+    def medir(self, alias, options):
+        latencias = []
+        nuevas = [0]
+        lock = threading.Lock()
+        restantes = [options['requests']]
+
+        def contar(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    nuevas[0] += 1
+
+        def atender():
+            # Mismo ciclo que un request real: las señales cierran las conexiones
+            # vencidas (o las devuelven al pool) al empezar y al terminar
+            while True:
+                with lock:
+                    if restantes[0] <= 0:
+                        break
+                    restantes[0] -= 1
+                inicio = time.perf_counter()
+                request_started.send(sender=self.__class__)
+                try:
+                    with connections[alias].cursor() as cursor:
+                        cursor.execute(options['consulta'])
+                        cursor.fetchall()
+                finally:
+                    request_finished.send(sender=self.__class__)
+                latencia = (time.perf_counter() - inicio) * 1000
+                with lock:
+                    latencias.append(latencia)
+            connections[alias].close()
+
+        connection_created.connect(contar)
+        try:
+            hilos = [threading.Thread(target=atender) for _ in range(options['hilos'])]
+            inicio = time.perf_counter()
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            duracion = time.perf_counter() - inicio
+        finally:
+            connection_created.disconnect(contar)
+
+        pool = connections[alias].pool if connections[alias].vendor == 'postgresql' else None
+        latencias = np.array(latencias)
+        return {
+            'throughput': options['requests'] / duracion,
+            'p50': np.percentile(latencias, 50),
+            'p99': np.percentile(latencias, 99),
+            # Con el pool, connection_created se emite en cada préstamo: contar las conexiones físicas
+            'nuevas': pool.get_stats().get('connections_num', 0) if pool is not None else nuevas[0],
+        }
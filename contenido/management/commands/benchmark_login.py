@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from contenido import rendimiento
+from usuarios.login import verificador
+
+
+def nucleos():
+    """Núcleos que el proceso puede usar (respeta taskset y los límites del contenedor)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Tormenta de inicios de sesión con los estudiantes de generar_datos: muchos clientes '
+        'concurrentes piden tokens a /api/auth/login/ y luego rotan los refresh obtenidos en '
+        '/api/token/refresh/. Informa tokens emitidos por segundo y por núcleo, latencias y '
+        'logins rechazados por saturación del pool de hashing'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Servidor a probar, p. ej. http://localhost:8000 (por defecto, en proceso)')
+        parser.add_argument('--solicitudes', type=int, default=1000, help='Inicios de sesión de la tormenta')
+        parser.add_argument('--concurrencia', type=int, default=64, help='Clientes concurrentes')
+        parser.add_argument('--nucleos', type=int, default=None, help='Núcleos del servidor (por defecto, los de este proceso)')
+        parser.add_argument('--sin-refresh', action='store_true', help='Medir solo el login, sin rotar los refresh')
+
+    def handle(self, *args, **options):
+        if options['solicitudes'] < 1 or options['concurrencia'] < 1:
+            raise CommandError('--solicitudes y --concurrencia deben ser mayores que cero')
+        emails = list(
+            get_user_model().objects.filter(
+                email__endswith=f'@{rendimiento.DOMINIO}', rol='estudiante', is_active=True
+            ).order_by('id').values_list('email', flat=True)
+        )
+        if not emails:
+            raise CommandError('Faltan datos: ejecute generar_datos antes del benchmark')
+        cliente = rendimiento.ClienteHTTP(options['url']) if options['url'] else rendimiento.ClienteEnProceso()
+        cores = options['nucleos'] or nucleos()
+        if not options['url']:
+            self.stdout.write(f'Pool de hashing: {verificador.hilos} hilos, capacidad {verificador.capacidad}')
+        self.stdout.write(f'Núcleos: {cores}, estudiantes: {len(emails)}')
+        self.stdout.write(
+            f'{"fase":<8} {"tokens/s":>9} {"por núcleo":>10} {"p50 ms":>8} {"p99 ms":>8} '
+            f'{"503":>6} {"errores":>8}'
+        )
+
+        refresh = []
+
+        def login(i):
+            email = emails[i % len(emails)]
+            estado, cuerpo = cliente.solicitar('POST', '/api/auth/login/', {'email': email, 'password': rendimiento.CLAVE})
+            if estado == 200:
+                refresh.append(json.loads(cuerpo)['refresh'])
+            return estado
+
+        def rotar(i):
+            return cliente.solicitar('POST', '/api/token/refresh/', {'refresh': refresh[i]})[0]
+
+        fases = [('login', login, options['solicitudes'])]
+        if not options['sin_refresh']:
+            fases.append(('refresh', rotar, None))
+        for nombre, funcion, total in fases:
+            resultado = self.tormenta(funcion, total if total is not None else len(refresh), options['concurrencia'])
+            self.stdout.write(
+                f'{nombre:<8} {resultado["throughput"]:>9.1f} {resultado["throughput"] / cores:>10.1f} '
+                f'{resultado["p50"]:>8.1f} {resultado["p99"]:>8.1f} {resultado["saturados"]:>6} '
+                f'{resultado["errores"]:>8}'
+            )
+
+    def tormenta(self, funcion, total, concurrencia):
+        """Todos los clientes arrancan a la vez y se reparten ``total`` solicitudes"""
+        latencias, emitidos, saturados, errores = [], [0], [0], [0]
+        lock = threading.Lock()
+        siguiente = [0]
+        largada = threading.Barrier(concurrencia + 1)
+
+        def trabajar():
+            largada.wait()
+            while True:
+                with lock:
+                    if siguiente[0] >= total:
+                        return
+                    i = siguiente[0]
+                    siguiente[0] += 1
+                inicio = time.perf_counter()
+                try:
+                    estado = funcion(i)
+                except OSError:
+                    estado = None
+                latencia = (time.perf_counter() - inicio) * 1000
+                with lock:
+                    latencias.append(latencia)
+                    if estado == 200:
+                        emitidos[0] += 1
+                    elif estado == 503:
+                        saturados[0] += 1
+                    else:
+                        errores[0] += 1
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(concurrencia)]
+        for hilo in hilos:
+            hilo.start()
+        largada.wait()
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+        if not latencias:
+            return {'throughput': 0.0, 'p50': 0.0, 'p99': 0.0, 'saturados': 0, 'errores': 0}
+        return {
+            'throughput': emitidos[0] / duracion,
+            **rendimiento._percentiles(latencias),
+            'saturados': saturados[0],
+            'errores': errores[0],
+        }
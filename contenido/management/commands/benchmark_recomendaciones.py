@@ -0,0 +1,78 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from contenido.recomendaciones import MotorRecomendaciones, tokenizar
+
+AREAS = (
+    'tecnologia matematicas fisica quimica biologia salud arte musica diseno deporte educacion '
+    'derecho economia administracion comunicacion idiomas historia filosofia psicologia medio ambiente '
+    'agricultura construccion mecanica electricidad informatica programacion datos finanzas turismo cocina'
+).split()
+HABILIDADES = (
+    'analisis logica creatividad empatia liderazgo comunicacion trabajo equipo organizacion paciencia '
+    'precision calculo escritura oratoria negociacion observacion investigacion resolucion problemas '
+    'destreza manual sintesis memoria adaptabilidad responsabilidad'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark del motor de recomendaciones con un catálogo sintético (no usa la base de datos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--carreras', type=int, default=50000, help='Tamaño del catálogo sintético')
+        parser.add_argument('--consultas', type=int, default=1000, help='Consultas concurrentes')
+        parser.add_argument('--hilos', type=int, default=32, help='Hilos que ejecutan las consultas')
+        parser.add_argument('--k', type=int, default=10, help='Carreras recomendadas por consulta')
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['carreras'] < 1 or options['consultas'] < 1 or options['hilos'] < 1:
+            raise CommandError('--carreras, --consultas y --hilos deben ser mayores que cero')
+        azar = random.Random(options['semilla'])
+
+        def documento():
+            areas = ' '.join(azar.sample(AREAS, 3))
+            habilidades = ' '.join(azar.sample(HABILIDADES, 4))
+            return tokenizar(areas) * 2 + tokenizar(habilidades) * 2 + tokenizar(f'carrera {areas.split()[0]}')
+
+        documentos = [(i, documento()) for i in range(1, options['carreras'] + 1)]
+        consultas = [
+            tokenizar(' '.join(azar.sample(AREAS, 2) + azar.sample(HABILIDADES, 2)))
+            for _ in range(options['consultas'])
+        ]
+
+        motor = MotorRecomendaciones()
+        inicio = time.perf_counter()
+        motor.construir(documentos)
+        motor.recomendar(consultas[0], options['k'])
+        construccion = time.perf_counter() - inicio
+        self.stdout.write(f'Índice de {options["carreras"]:,} carreras construido en {construccion:.2f}s')
+
+        inicio = time.perf_counter()
+        motor.actualizar(1, documento())
+        motor.recomendar(consultas[0], options['k'])
+        self.stdout.write(f'Actualización de una carrera y re-ensamblado: {(time.perf_counter() - inicio) * 1000:.1f} ms')
+
+        def medir(tokens):
+            t0 = time.perf_counter()
+            motor.recomendar(tokens, options['k'])
+            return time.perf_counter() - t0
+
+        secuencial = np.array([medir(tokens) for tokens in consultas[:100]]) * 1000
+        self.stdout.write(
+            f'Secuencial: p50 {np.percentile(secuencial, 50):.2f} ms - p99 {np.percentile(secuencial, 99):.2f} ms'
+        )
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['hilos']) as ejecutor:
+            latencias = np.array(list(ejecutor.map(medir, consultas))) * 1000
+        total = time.perf_counter() - inicio
+        self.stdout.write(
+            f'{options["consultas"]:,} consultas con {options["hilos"]} hilos en {total:.2f}s '
+            f'({options["consultas"] / total:,.0f} consultas/s) - '
+            f'p50 {np.percentile(latencias, 50):.2f} ms - p99 {np.percentile(latencias, 99):.2f} ms'
+        )
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from bienestar_api.compacto import conversor_para
+from bienestar_api.renderers import JSONRapidoRenderer, orjson
+from contenido import rendimiento
+from contenido.models import Anuncio, Carrera
+from contenido.serializers import AnuncioSerializer, CarreraSerializer
+
+MODELOS = {
+    'anuncios': (Anuncio.objects.select_related('creado_por').order_by('-creado_en', '-id'), AnuncioSerializer),
+    'carreras': (Carrera.objects.select_related('creado_por').order_by('nombre', 'id'), CarreraSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el listado con ModelSerializer y JSONRenderer contra la ruta compacta (.values(), '
+        'conversor precompilado y orjson) para páginas de 20, 100 y 1000 filas: consulta, '
+        'serialización y render. Verifica que ambas rutas produzcan los mismos bytes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', default='20,100,1000', help='Tamaños de página, separados por comas')
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--modelos', default=','.join(MODELOS), help=f'Subconjunto de: {", ".join(MODELOS)}')
+
+    def handle(self, *args, **options):
+        try:
+            tamanos = [int(tamano) for tamano in options['filas'].split(',')]
+        except ValueError:
+            raise CommandError('--filas debe ser una lista de enteros')
+        modelos = [modelo.strip() for modelo in options['modelos'].split(',') if modelo.strip()]
+        if set(modelos) - set(MODELOS):
+            raise CommandError(f'Modelos desconocidos: {", ".join(sorted(set(modelos) - set(MODELOS)))}')
+        if orjson is None:
+            self.stdout.write('orjson no está instalado: la ruta compacta usa el json de la biblioteca estándar')
+
+        self.stdout.write(
+            f'{"modelo":<9} {"filas":>6} {"drf ms":>9} {"compacta ms":>12} {"aceleración":>12}'
+        )
+        for nombre in modelos:
+            queryset, serializer_class = MODELOS[nombre]
+            conversor = conversor_para(serializer_class)
+            if conversor is None:
+                raise CommandError(f'{serializer_class.__name__} no se puede compilar a la ruta compacta')
+            disponibles = queryset.count()
+            for tamano in tamanos:
+                if disponibles < tamano:
+                    self.stdout.write(
+                        f'{nombre:<9} {tamano:>6} omitido: hay {disponibles} filas (generar_datos --{nombre} {tamano})'
+                    )
+                    continue
+                pagina = queryset[:tamano]
+
+                def drf():
+                    return JSONRenderer().render(serializer_class(list(pagina), many=True).data)
+
+                def compacta():
+                    return JSONRapidoRenderer().render(conversor.lista(pagina.values(*conversor.columnas)))
+
+                if drf() != compacta():
+                    raise CommandError(f'{nombre} ({tamano} filas): las dos rutas no producen los mismos bytes')
+                antes = rendimiento.medir_funcion(drf, options['repeticiones'], calentamiento=3)
+                despues = rendimiento.medir_funcion(compacta, options['repeticiones'], calentamiento=3)
+                self.stdout.write(
+                    f'{nombre:<9} {tamano:>6} {antes["p50"]:>9.2f} {despues["p50"]:>12.2f} '
+                    f'{antes["p50"] / despues["p50"]:>11.1f}x'
+                )
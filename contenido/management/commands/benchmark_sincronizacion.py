@@ -0,0 +1,77 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from contenido import rendimiento
+from contenido.models import Anuncio, Carrera
+from usuarios.serializers import CustomTokenObtainPairSerializer
+
+MODELOS = {'carreras': Carrera, 'anuncios': Anuncio}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara la sincronización completa del catálogo con la incremental (GET .../sync/?token=) '
+        'tras tocar N filas generadas: bytes, páginas y latencia. La incremental debe crecer con '
+        'los cambios y no con el catálogo. Se mide con SINCRONIZACION_MARGEN=0 para aislar ese '
+        'efecto; con el margen se suman las filas cambiadas en esos últimos segundos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cambios', default='0,10,100', help='Filas modificadas, separadas por comas')
+        parser.add_argument('--modelos', default=','.join(MODELOS), help=f'Subconjunto de: {", ".join(MODELOS)}')
+
+    def handle(self, *args, **options):
+        try:
+            cambios = [int(cantidad) for cantidad in options['cambios'].split(',')]
+        except ValueError:
+            raise CommandError('--cambios debe ser una lista de enteros')
+        modelos = [modelo.strip() for modelo in options['modelos'].split(',') if modelo.strip()]
+        if set(modelos) - set(MODELOS):
+            raise CommandError(f'Modelos desconocidos: {", ".join(sorted(set(modelos) - set(MODELOS)))}')
+        generados = get_user_model().objects.filter(email__endswith=f'@{rendimiento.DOMINIO}', is_active=True)
+        profesor = generados.filter(rol='profesor').first()
+        if profesor is None:
+            raise CommandError('Faltan datos: ejecute generar_datos antes del benchmark')
+        token = str(CustomTokenObtainPairSerializer.get_token(profesor).access_token)
+        cliente = rendimiento.ClienteEnProceso()
+
+        self.stdout.write(f'{"modelo":<9} {"sincronización":<16} {"filas":>7} {"páginas":>8} {"KB":>10} {"ms":>9}')
+        with override_settings(SINCRONIZACION_MARGEN=0):
+            for nombre in modelos:
+                modelo = MODELOS[nombre]
+                ruta = f'/api/{nombre}/sync/'
+                filas, paginas, tamano, duracion, marca = self.sincronizar(cliente, ruta, token)
+                self.fila(nombre, 'completa', filas, paginas, tamano, duracion)
+                for cantidad in cambios:
+                    generadas = modelo.objects.filter(creado_por__in=generados).order_by('?')
+                    ids = list(generadas.values_list('id', flat=True)[:cantidad])
+                    modelo.objects.filter(id__in=ids).update(actualizado_en=timezone.now())
+                    filas, paginas, tamano, duracion, marca = self.sincronizar(cliente, ruta, token, marca)
+                    self.fila(nombre, f'{len(ids)} cambios', filas, paginas, tamano, duracion)
+
+    def fila(self, nombre, tipo, filas, paginas, tamano, duracion):
+        self.stdout.write(f'{nombre:<9} {tipo:<16} {filas:>7} {paginas:>8} {tamano / 1024:>10.1f} {duracion:>9.1f}')
+
+    @staticmethod
+    def sincronizar(cliente, ruta, token, marca=None):
+        """(filas, páginas, bytes, ms, token final) de una sincronización completa o desde ``marca``"""
+        filas = paginas = tamano = 0
+        duracion = 0.0
+        while True:
+            inicio = time.perf_counter()
+            codigo, contenido = cliente.solicitar('GET', f'{ruta}?token={marca}' if marca else ruta, token=token)
+            duracion += (time.perf_counter() - inicio) * 1000
+            if codigo != 200:
+                raise CommandError(f'{ruta}: respuesta {codigo}')
+            datos = json.loads(contenido)
+            filas += len(datos['cambios']) + len(datos['eliminados'])
+            paginas += 1
+            tamano += len(contenido)
+            marca = datos['token']
+            if not datos['mas']:
+                return filas, paginas, tamano, duracion, marca
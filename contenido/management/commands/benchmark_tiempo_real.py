@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from contenido import tiempo_real
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga del canal de eventos de anuncios: miles de conexiones inactivas. '
+        'Sin --url mide en el proceso la memoria por conexión y la latencia de reparto; '
+        'con --url abre las conexiones contra un servidor ASGI en ejecución'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conexiones', type=int, default=5000)
+        parser.add_argument('--eventos', type=int, default=20, help='Eventos publicados durante la prueba (modo local)')
+        parser.add_argument('--url', help='URL del canal, p. ej. http://localhost:8000/api/anuncios/eventos/')
+        parser.add_argument('--token', help='Access token JWT con el que se abren las conexiones (modo --url)')
+        parser.add_argument('--duracion', type=float, default=30.0, help='Segundos que se mantienen abiertas (modo --url)')
+
+    def handle(self, *args, **options):
+        if options['conexiones'] < 1:
+            raise CommandError('--conexiones debe ser mayor que cero')
+        if options['url']:
+            if not options['token']:
+                raise CommandError('--url requiere --token')
+            asyncio.run(self.remoto(options))
+        else:
+            asyncio.run(self.local(options))
+
+    async def local(self, options):
+        cantidad = options['conexiones']
+        broker = tiempo_real.broker = tiempo_real.BrokerLocal(latido=3600)
+        recibidos = np.zeros(cantidad, dtype=np.int64)
+        completos = asyncio.Event()
+        pendientes = [cantidad]
+
+        async def conexion(indice):
+            async for trozo in tiempo_real.flujo_eventos(es_profesor=indice % 10 == 0):
+                if trozo.startswith('id:'):
+                    recibidos[indice] += 1
+                    pendientes[0] -= 1
+                    if pendientes[0] == 0:
+                        completos.set()
+
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        tareas = [asyncio.create_task(conexion(i)) for i in range(cantidad)]
+        while broker.conexiones() < cantidad:
+            await asyncio.sleep(0.01)
+        apertura = time.perf_counter() - inicio
+        memoria = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{cantidad:,} conexiones abiertas en {apertura:.2f}s - '
+            f'{memoria / cantidad / 1024:.1f} KiB por conexión ({memoria / 2**20:.1f} MiB en total)'
+        )
+
+        latencias = []
+        for numero in range(options['eventos']):
+            pendientes[0] = cantidad
+            completos.clear()
+            evento = {'evento': 'anuncio.creado', 'anuncio': {'id': numero}, 'publico': True}
+            inicio = time.perf_counter()
+            # Publicar desde otro hilo, como lo hacen las señales y el programador
+            threading.Thread(target=broker.publicar, args=(evento,)).start()
+            await completos.wait()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        latencias = np.array(latencias)
+        self.stdout.write(
+            f'Reparto de {options["eventos"]} eventos a {cantidad:,} conexiones: '
+            f'p50 {np.percentile(latencias, 50):.1f} ms - p99 {np.percentile(latencias, 99):.1f} ms'
+        )
+        if (recibidos != options['eventos']).any():
+            raise CommandError('Alguna conexión no recibió todos los eventos')
+
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        self.stdout.write(self.style.SUCCESS(f'Conexiones abiertas al terminar: {broker.conexiones()}'))
+
+    async def remoto(self, options):
+        url = urlsplit(options['url'])
+        puerto = url.port or (443 if url.scheme == 'https' else 80)
+        solicitud = (
+            f'GET {url.path or "/"}{"?" + url.query if url.query else ""} HTTP/1.1\r\n'
+            f'Host: {url.netloc}\r\nAuthorization: Bearer {options["token"]}\r\n'
+            'Accept: text/event-stream\r\n\r\n'
+        ).encode()
+        abiertas, errores, eventos = [0], [0], [0]
+
+        async def conexion():
+            try:
+                lector, escritor = await asyncio.open_connection(url.hostname, puerto, ssl=url.scheme == 'https')
+                escritor.write(solicitud)
+                await escritor.drain()
+                estado = await lector.readline()
+                if b' 200 ' not in estado:
+                    raise ConnectionError(estado.decode(errors='replace').strip())
+                abiertas[0] += 1
+                try:
+                    while True:
+                        linea = await lector.readline()
+                        if not linea:
+                            break
+                        if linea.startswith(b'id:'):
+                            eventos[0] += 1
+                finally:
+                    abiertas[0] -= 1
+                    escritor.close()
+            except (OSError, ConnectionError) as error:
+                errores[0] += 1
+                if errores[0] <= 5:
+                    self.stderr.write(f'Error de conexión: {error}')
+
+        inicio = time.perf_counter()
+        tareas = [asyncio.create_task(conexion()) for _ in range(options['conexiones'])]
+        fin = inicio + options['duracion']
+        while time.perf_counter() < fin:
+            await asyncio.sleep(min(5.0, max(fin - time.perf_counter(), 0)))
+            self.stdout.write(
+                f'{time.perf_counter() - inicio:5.1f}s - {abiertas[0]:,} abiertas, '
+                f'{errores[0]:,} errores, {eventos[0]:,} eventos recibidos'
+            )
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from contenido import rendimiento
+from usuarios.serializers import CustomTokenObtainPairSerializer
+
+CONSULTAS = {
+    'sin-filtro': '/api/auth/usuarios/',
+    'rol': '/api/auth/usuarios/?rol=profesor',
+    'rol-curso': '/api/auth/usuarios/?rol=estudiante&curso=4B',
+    'curso': '/api/auth/usuarios/?curso=2C',
+    # Un prefijo selectivo (100 usuarios) y uno amplio (~3% de la tabla): el segundo ordena todas sus coincidencias
+    'prefijo': '/api/auth/usuarios/?q=usuario00012',
+    'prefijo-amplio': '/api/auth/usuarios/?q=orient',
+    'proyeccion': '/api/auth/usuarios/?rol=estudiante&curso=4B&fields=id,nombres,apellidos,email',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Latencia del listado de usuarios con filtros por rol, curso y prefijo y con proyección '
+        '(?fields=) a medida que crece la tabla. Completa los usuarios de generar_datos hasta cada '
+        'tamaño; con los índices la latencia debe mantenerse plana. Los datos quedan para otras '
+        'mediciones (generar_datos --limpiar los elimina)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', default='10000,50000,200000', help='Usuarios generados, separados por comas')
+        parser.add_argument('--solicitudes', type=int, default=200, help='Solicitudes por consulta y tamaño')
+        parser.add_argument('--consultas', default=','.join(CONSULTAS), help=f'Subconjunto de: {", ".join(CONSULTAS)}')
+
+    def handle(self, *args, **options):
+        try:
+            tamanos = sorted(int(tamano) for tamano in options['tamanos'].split(','))
+        except ValueError:
+            raise CommandError('--tamanos debe ser una lista de enteros')
+        consultas = [consulta.strip() for consulta in options['consultas'].split(',') if consulta.strip()]
+        if set(consultas) - set(CONSULTAS):
+            raise CommandError(f'Consultas desconocidas: {", ".join(sorted(set(consultas) - set(CONSULTAS)))}')
+
+        generados = get_user_model().objects.filter(email__endswith=f'@{rendimiento.DOMINIO}')
+        cliente = rendimiento.ClienteEnProceso()
+        self.stdout.write(f'{"usuarios":>9} {"consulta":<14} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"errores":>8}')
+        for tamano in tamanos:
+            faltan = tamano - generados.count()
+            if faltan > 0:
+                rendimiento.generar_datos(usuarios=faltan, carreras=0, anuncios=0, logs=0, lote=5000)
+            profesor = generados.filter(rol='profesor', is_active=True).first()
+            if profesor is None:
+                raise CommandError('No hay un profesor generado para autenticar las solicitudes')
+            token = str(CustomTokenObtainPairSerializer.get_token(profesor).access_token)
+            for nombre in consultas:
+                ruta = CONSULTAS[nombre]
+                resultado = self.medir(cliente, ruta, token, options['solicitudes'])
+                self.stdout.write(
+                    f'{tamano:>9} {nombre:<14} {resultado["throughput"]:>8.0f} {resultado["p50"]:>8.2f} '
+                    f'{resultado["p99"]:>8.2f} {resultado["errores"]:>8}'
+                )
+
+    @staticmethod
+    def medir(cliente, ruta, token, solicitudes):
+        errores = [0]
+
+        def solicitar():
+            if cliente.solicitar('GET', ruta, token=token)[0] != 200:
+                errores[0] += 1
+
+        resultado = rendimiento.medir_funcion(solicitar, solicitudes, calentamiento=10)
+        return {**resultado, 'errores': errores[0]}
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from contenido.cache import invalidar_feed
+from contenido.models import Anuncio
+from contenido.rendimiento import DOMINIO
+from contenido.vistas import ContadorVistas
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark de concurrencia del contador de vistas: verifica que no se pierdan incrementos. '
+        'Usa los anuncios de generar_datos y al terminar les devuelve su veces_visto original'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=16, help='Cantidad de hilos concurrentes')
+        parser.add_argument('--vistas', type=int, default=500, help='Vistas registradas por hilo')
+        parser.add_argument('--anuncios', type=int, default=4, help='Cantidad de anuncios generados que se usan')
+        parser.add_argument('--intervalo', type=float, default=0.05, help='Intervalo de flush en segundos')
+        parser.add_argument(
+            '--comparar', action='store_true',
+            help='Ejecutar también el esquema anterior (leer, sumar y guardar) para comparar'
+        )
+
+    def handle(self, *args, **options):
+        hilos = options['hilos']
+        vistas = options['vistas']
+        if hilos < 1 or vistas < 1 or options['anuncios'] < 1:
+            raise CommandError('--hilos, --vistas y --anuncios deben ser mayores que cero')
+
+        # Solo datos generados: crear y borrar anuncios reales dejaría tombstones de
+        # sincronización y dispararía las señales de invalidación y tiempo real
+        generados = Anuncio.objects.filter(creado_por__email__endswith=f'@{DOMINIO}').order_by('pk')
+        originales = dict(generados.values_list('pk', 'veces_visto')[:options['anuncios']])
+        if not originales:
+            raise CommandError('No hay anuncios generados: ejecute generar_datos antes del benchmark')
+        ids = list(originales)
+        esperado = hilos * vistas
+        try:
+            Anuncio.objects.filter(pk__in=ids).update(veces_visto=0)
+            contador = ContadorVistas(intervalo=options['intervalo'])
+            duracion = self._ejecutar(hilos, lambda n: contador.registrar(ids[n % len(ids)]), vistas)
+            contador.flush()
+            self._reportar('Contador por lotes', ids, esperado, duracion)
+
+            if options['comparar']:
+                Anuncio.objects.filter(pk__in=ids).update(veces_visto=0)
+
+                def leer_sumar_guardar(n):
+                    # Leer y escribir el valor sumado, como el save() anterior, sin emitir señales
+                    anuncio = Anuncio.objects.filter(pk=ids[n % len(ids)])
+                    veces_visto = anuncio.values_list('veces_visto', flat=True).get()
+                    anuncio.update(veces_visto=veces_visto + 1)
+
+                duracion = self._ejecutar(hilos, leer_sumar_guardar, vistas)
+                self._reportar('Leer, sumar y guardar', ids, esperado, duracion)
+        finally:
+            for pk, veces_visto in originales.items():
+                Anuncio.objects.filter(pk=pk).update(veces_visto=veces_visto)
+            invalidar_feed()
+
+    def _ejecutar(self, hilos, operacion, vistas):
+        barrera = threading.Barrier(hilos)
+
+        def trabajador(indice):
+            try:
+                barrera.wait()
+                for n in range(vistas):
+                    operacion(indice + n)
+            finally:
+                connection.close()
+
+        trabajadores = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+        inicio = time.perf_counter()
+        for t in trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+        return time.perf_counter() - inicio
+
+    def _reportar(self, nombre, ids, esperado, duracion):
+        total = sum(Anuncio.objects.filter(pk__in=ids).values_list('veces_visto', flat=True))
+        perdidas = esperado - total
+        self.stdout.write(
+            f'{nombre}: {esperado} vistas en {duracion:.3f}s '
+            f'({esperado / duracion:,.0f} vistas/s) - persistidas: {total} - perdidas: {perdidas}'
+        )
+        estilo = self.style.SUCCESS if perdidas == 0 else self.style.WARNING
+        self.stdout.write(estilo('Sin incrementos perdidos' if perdidas == 0 else 'Se perdieron incrementos'))
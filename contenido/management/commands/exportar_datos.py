@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contenido import exportacion
+
+
+class Command(BaseCommand):
+    help = 'Exportar logs de auditoría o estadísticas de anuncios en CSV o JSONL (opcionalmente gzip)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('datos', choices=('auditoria', 'anuncios'), help='Qué exportar')
+        parser.add_argument('--formato', choices=exportacion.FORMATOS, default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Comprimir la salida')
+        parser.add_argument('--salida', help='Archivo de destino (por defecto, la salida estándar)')
+        parser.add_argument('--usuario', help='ID o email del usuario (solo auditoría)')
+        parser.add_argument('--modelo', help='Modelo auditado (solo auditoría)')
+        parser.add_argument('--accion', help='CREATE, UPDATE, DELETE o VIEW (solo auditoría)')
+        parser.add_argument('--desde', help='Fecha o fecha y hora ISO 8601 inicial (solo auditoría)')
+        parser.add_argument('--hasta', help='Fecha o fecha y hora ISO 8601 final (solo auditoría)')
+
+    def handle(self, *args, **options):
+        if options['datos'] == 'auditoria':
+            parametros = {clave: options[clave] for clave in ('usuario', 'modelo', 'accion', 'desde', 'hasta')}
+            try:
+                exportacion.filtros_auditoria(**parametros)
+            except ValueError as error:
+                raise CommandError(str(error))
+            filas, campos = exportacion.filas_auditoria(**parametros), exportacion.CAMPOS_AUDITORIA
+        else:
+            filas, campos = exportacion.filas_anuncios(), exportacion.CAMPOS_ANUNCIOS
+
+        trozos = exportacion.exportar(filas, options['formato'], campos, options['gzip'])
+        if options['salida']:
+            with open(options['salida'], 'wb') as archivo:
+                for trozo in trozos:
+                    archivo.write(trozo)
+            self.stderr.write(self.style.SUCCESS(f'Exportación escrita en {options["salida"]}'))
+        else:
+            destino = sys.stdout.buffer
+            for trozo in trozos:
+                destino.write(trozo)
+            destino.flush()
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from contenido import rendimiento
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos para pruebas de carga: usuarios (clave común), carreras, anuncios '
+        f'y logs de auditoría. Los usuarios usan el dominio {rendimiento.DOMINIO}'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=1000)
+        parser.add_argument('--carreras', type=int, default=200)
+        parser.add_argument('--anuncios', type=int, default=500)
+        parser.add_argument('--logs', type=int, default=10000)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por INSERT')
+        parser.add_argument('--limpiar', action='store_true', help='Eliminar antes los datos generados')
+
+    def handle(self, *args, **options):
+        if min(options['usuarios'], options['carreras'], options['anuncios'], options['logs']) < 0:
+            raise CommandError('Las cantidades no pueden ser negativas')
+        if options['limpiar']:
+            eliminados = rendimiento.limpiar_datos()
+            self.stdout.write(f'Datos generados anteriormente eliminados ({eliminados:,} filas)')
+        try:
+            rendimiento.generar_datos(
+                usuarios=options['usuarios'], carreras=options['carreras'], anuncios=options['anuncios'],
+                logs=options['logs'], semilla=options['semilla'], lote=options['lote'],
+                progreso=lambda mensaje: self.stdout.write(f'Creados {mensaje}'),
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f'Listo. Clave de todos los usuarios: {rendimiento.CLAVE}'))
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from contenido import particiones
+
+
+class Command(BaseCommand):
+    help = (
+        'Mantenimiento de los logs de auditoría: crea particiones mensuales futuras '
+        'y archiva en JSONL comprimido los datos fuera de la ventana de retención'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--particionar', action='store_true',
+            help='Convertir la tabla de auditoría en una tabla particionada por mes (solo PostgreSQL)'
+        )
+        parser.add_argument(
+            '--futuras', type=int, default=getattr(settings, 'AUDITORIA_PARTICIONES_FUTURAS', 3),
+            help='Meses futuros para los que se crean particiones'
+        )
+        parser.add_argument(
+            '--retencion', type=int, default=getattr(settings, 'AUDITORIA_RETENCION_MESES', 12),
+            help='Meses de logs que se conservan en la base de datos'
+        )
+        parser.add_argument(
+            '--directorio', default=getattr(settings, 'AUDITORIA_DIRECTORIO_ARCHIVO', 'archivo/auditoria'),
+            help='Directorio donde se escriben los archivos .jsonl.gz'
+        )
+        parser.add_argument('--sin-archivar', action='store_true', help='No aplicar la política de retención')
+
+    def handle(self, *args, **options):
+        if options['futuras'] < 0 or options['retencion'] < 1:
+            raise CommandError('--futuras debe ser >= 0 y --retencion >= 1')
+
+        if options['particionar']:
+            try:
+                convertida = particiones.convertir_a_particionada(options['futuras'])
+            except RuntimeError as error:
+                raise CommandError(str(error))
+            self.stdout.write(
+                self.style.SUCCESS('Tabla de auditoría particionada por mes')
+                if convertida else 'La tabla de auditoría ya estaba particionada'
+            )
+
+        particionada = particiones.esta_particionada()
+        if particionada:
+            for nombre in particiones.crear_particiones_futuras(options['futuras']):
+                self.stdout.write(f'Partición creada: {nombre}')
+
+        if options['sin_archivar']:
+            return
+
+        if particionada:
+            archivadas = particiones.archivar_particiones(options['retencion'], options['directorio'])
+        else:
+            archivadas = particiones.archivar_filas(options['retencion'], options['directorio'])
+        for nombre, ruta, cantidad in archivadas:
+            self.stdout.write(self.style.SUCCESS(f'{nombre}: {cantidad} filas archivadas en {ruta}'))
+        if not archivadas:
+            self.stdout.write('No hay logs de auditoría fuera de la ventana de retención')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from contenido.publicacion import aplicar_cambios, proximo_cambio
+
+
+class Command(BaseCommand):
+    help = (
+        'Publica y retira los anuncios cuya fecha de publicación o expiración ya llegó. '
+        'También recalcula el estado visible de los anuncios existentes'
+    )
+
+    def handle(self, *args, **options):
+        publicados, retirados = aplicar_cambios()
+        self.stdout.write(f'{len(publicados)} anuncios publicados, {len(retirados)} retirados')
+        proximo = proximo_cambio()
+        if proximo is not None:
+            self.stdout.write(f'Próximo cambio programado: {proximo.isoformat()}')
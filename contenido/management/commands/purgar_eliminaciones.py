@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from contenido.sincronizacion import purgar_eliminaciones
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina los registros de carreras y anuncios eliminados que ya no puede pedir ningún token '
+        'de sincronización vigente (SINCRONIZACION_RETENCION_DIAS). Pensado para ejecutarse a diario (cron)'
+    )
+
+    def handle(self, *args, **options):
+        total = purgar_eliminaciones()
+        self.stdout.write(f'Eliminados {total} registros de eliminación vencidos')
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from contenido import analitica
+
+
+class Command(BaseCommand):
+    help = (
+        'Resume los eventos de vista de anuncios por hora y por día y elimina los eventos '
+        'fuera de la ventana de retención. Pensado para ejecutarse periódicamente (cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retencion', type=int, default=getattr(settings, 'ANALITICA_RETENCION_EVENTOS_DIAS', 7),
+            help='Días de eventos crudos que se conservan'
+        )
+        parser.add_argument(
+            '--retencion-horas', type=int, default=getattr(settings, 'ANALITICA_RETENCION_HORAS_DIAS', 30),
+            help='Días de resúmenes por hora que se conservan'
+        )
+        parser.add_argument('--sin-podar', action='store_true', help='Solo resumir, sin eliminar eventos')
+
+    def handle(self, *args, **options):
+        if options['retencion'] < 1 or options['retencion_horas'] < 1:
+            raise CommandError('--retencion y --retencion-horas deben ser mayores que cero')
+        horas, dias = analitica.resumir_vistas()
+        self.stdout.write(f'Resúmenes actualizados: {horas} por hora, {dias} por día')
+        if not options['sin_podar']:
+            eventos, resumenes = analitica.podar(options['retencion'], options['retencion_horas'])
+            self.stdout.write(f'Eliminados {eventos} eventos y {resumenes} resúmenes por hora antiguos')
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from contenido.presupuestos import PRESUPUESTOS, crear_datos, crear_usuarios, solicitar
+
+
+class Command(BaseCommand):
+    help = (
+        'Verifica el presupuesto de consultas SQL de cada endpoint y que no crezca '
+        'con la cantidad de filas (detecta consultas N+1) en la base configurada. Los datos '
+        'de prueba se revierten. La misma verificación corre en la suite: '
+        'django-admin test contenido'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=20, help='Filas por modelo en la segunda medición')
+
+    def handle(self, *args, **options):
+        fallas = []
+        # Los datos de prueba no salen de la transacción: se lee todo de la principal
+        with override_settings(REPLICAS_LECTURA=[]), transaction.atomic():
+            usuarios = crear_usuarios()
+            ids = crear_datos(usuarios['profesor'], 1, 0)
+            pocas = self._medir(usuarios, ids)
+            crear_datos(usuarios['profesor'], options['filas'], 1)
+            muchas = self._medir(usuarios, ids)
+            transaction.set_rollback(True)
+
+        for nombre, _, _, maximo in PRESUPUESTOS:
+            estado = 'OK'
+            if muchas[nombre] > maximo:
+                estado = f'EXCEDE (máximo {maximo})'
+            elif muchas[nombre] != pocas[nombre]:
+                estado = 'CRECE CON LAS FILAS'
+            if estado != 'OK':
+                fallas.append(nombre)
+            self.stdout.write(f'{nombre:28} {pocas[nombre]:>3} -> {muchas[nombre]:>3} consultas  {estado}')
+
+        if fallas:
+            raise CommandError(f'Presupuesto de consultas excedido en: {", ".join(fallas)}')
+        self.stdout.write(self.style.SUCCESS('Todos los endpoints dentro del presupuesto de consultas'))
+
+    def _medir(self, usuarios, ids):
+        resultados = {}
+        for nombre, url, rol, _ in PRESUPUESTOS:
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = solicitar(usuarios[rol], url.format(**ids))
+            if respuesta.status_code != 200:
+                raise CommandError(f'{nombre}: respuesta {respuesta.status_code} en {url.format(**ids)}')
+            resultados[nombre] = len(consultas)
+        return resultados
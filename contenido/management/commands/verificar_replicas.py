@@ -0,0 +1,95 @@
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from bienestar_api.replicas import salud
+from contenido import rendimiento
+from contenido.middleware import MedidorConsultas
+from contenido.models import Anuncio
+from usuarios.serializers import CustomTokenObtainPairSerializer
+
+Usuario = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Verifica el enrutamiento a las réplicas de lectura: estado y retraso de cada réplica, '
+        'lecturas de un estudiante en una réplica y las de un profesor en la principal justo '
+        'después de crear un anuncio (que se crea oculto y se elimina). Para probar con dos '
+        'bases locales: generar_datos, createdb -T bienestar_digital bienestar_replica y '
+        'DB_REPLICAS=localhost/bienestar_replica'
+    )
+
+    def handle(self, *args, **options):
+        alias_replicas = list(getattr(settings, 'REPLICAS_LECTURA', ()))
+        if not alias_replicas:
+            raise CommandError('No hay réplicas configuradas (DB_REPLICAS)')
+        for alias in alias_replicas:
+            disponible, retraso, _ = salud.revisar(alias)
+            estado = f'disponible, retraso {retraso:.2f} s' if disponible else 'NO DISPONIBLE'
+            self.stdout.write(f'{alias:<12} {estado}')
+        if not salud.disponibles():
+            raise CommandError('Ninguna réplica disponible y al día')
+
+        generados = Usuario.objects.filter(email__endswith=f'@{rendimiento.DOMINIO}', is_active=True)
+        estudiante = generados.filter(rol='estudiante').first()
+        profesor = generados.filter(rol='profesor').first()
+        if estudiante is None or profesor is None:
+            raise CommandError('Faltan datos: ejecute generar_datos antes de la verificación')
+        tokens = {
+            usuario: str(CustomTokenObtainPairSerializer.get_token(usuario).access_token)
+            for usuario in (estudiante, profesor)
+        }
+        cliente = rendimiento.ClienteEnProceso()
+        fallas = []
+
+        def verificar(nombre, metodo, ruta, usuario, esperado, datos=None):
+            consultas, (codigo, _) = self.contar(
+                lambda: cliente.solicitar(metodo, ruta, datos, token=tokens[usuario])
+            )
+            en_replicas = sum(consultas[alias] for alias in alias_replicas)
+            estado = 'OK'
+            if codigo >= 400:
+                estado = f'RESPUESTA {codigo}'
+            elif esperado == 'replica' and not en_replicas:
+                estado = 'LEYÓ DE LA PRINCIPAL'
+            elif esperado == DEFAULT_DB_ALIAS and en_replicas:
+                estado = 'LEYÓ DE UNA RÉPLICA'
+            if estado != 'OK':
+                fallas.append(nombre)
+            self.stdout.write(
+                f'{nombre:<32} principal {consultas[DEFAULT_DB_ALIAS]:>2}  réplicas {en_replicas:>2}  {estado}'
+            )
+
+        verificar('estudiante lee carreras', 'GET', '/api/carreras/', estudiante, 'replica')
+        titulo = f'Verificación de réplicas {uuid.uuid4().hex[:8]}'
+        verificar('profesor crea un anuncio', 'POST', '/api/anuncios/', profesor, DEFAULT_DB_ALIAS, {
+            'titulo': titulo, 'contenido': '-', 'activo': False,
+        })
+        anuncio = Anuncio.objects.filter(titulo=titulo).values_list('id', flat=True).first()
+        if anuncio is None:
+            raise CommandError('No se pudo crear el anuncio de prueba')
+        verificar('profesor lee su anuncio', 'GET', f'/api/anuncios/{anuncio}/', profesor, DEFAULT_DB_ALIAS)
+        verificar('estudiante sigue en la réplica', 'GET', '/api/carreras/', estudiante, 'replica')
+        verificar('profesor elimina el anuncio', 'DELETE', f'/api/anuncios/{anuncio}/', profesor, DEFAULT_DB_ALIAS)
+
+        if fallas:
+            raise CommandError(f'Enrutamiento incorrecto en: {", ".join(fallas)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Lecturas en réplicas; quien escribe lee de la principal por '
+            f'{getattr(settings, "REPLICAS_VENTANA_ESCRITURA", 10)} s'
+        ))
+
+    @staticmethod
+    def contar(funcion):
+        """Consultas por alias que hace ``funcion`` en este hilo"""
+        medidores = {alias: MedidorConsultas() for alias in connections}
+        with ExitStack() as pila:
+            for alias, medidor in medidores.items():
+                pila.enter_context(connections[alias].execute_wrapper(medidor))
+            resultado = funcion()
+        return {alias: medidor.cantidad for alias, medidor in medidores.items()}, resultado
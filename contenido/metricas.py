@@ -0,0 +1,138 @@
+import bisect
+import math
+import threading
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _etiquetas(nombres, valores):
+    if not nombres:
+        return ''
+    pares = ','.join(
+        '{}="{}"'.format(nombre, str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for nombre, valor in zip(nombres, valores)
+    )
+    return '{' + pares + '}'
+
+
+def _numero(valor):
+    if valor == math.inf:
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Contador monótono con etiquetas (formato de texto de Prometheus)"""
+
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def muestras(self):
+        with self._lock:
+            valores = dict(self._valores)
+        for clave, valor in sorted(valores.items()):
+            yield self.nombre, _etiquetas(self.etiquetas, clave), valor
+
+
+class Histograma:
+    """Histograma acumulativo con buckets fijos y etiquetas"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores):
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def muestras(self):
+        with self._lock:
+            series = {clave: (list(conteos), suma, total) for clave, (conteos, suma, total) in self._series.items()}
+        nombres = self.etiquetas + ('le',)
+        for clave, (conteos, suma, total) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (math.inf,), conteos):
+                acumulado += conteo
+                yield f'{self.nombre}_bucket', _etiquetas(nombres, clave + (_numero(limite),)), acumulado
+            yield f'{self.nombre}_sum', _etiquetas(self.etiquetas, clave), suma
+            yield f'{self.nombre}_count', _etiquetas(self.etiquetas, clave), total
+
+
+class Medidor:
+    """
+    Valor obtenido de una función al momento de exportar. Con etiquetas, la
+    función devuelve un diccionario {tupla de valores de las etiquetas: valor}.
+    """
+
+    def __init__(self, nombre, ayuda, funcion, tipo='gauge', etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+        self.tipo = tipo
+        self.etiquetas = tuple(etiquetas)
+
+    def muestras(self):
+        if not self.etiquetas:
+            yield self.nombre, '', self.funcion()
+            return
+        for clave, valor in sorted(self.funcion().items()):
+            yield self.nombre, _etiquetas(self.etiquetas, clave), valor
+
+
+class Registro:
+    """Conjunto de métricas del proceso"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, metrica):
+        with self._lock:
+            return self._metricas.setdefault(metrica.nombre, metrica)
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self.registrar(Contador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        return self.registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def medidor(self, nombre, ayuda, funcion, tipo='gauge', etiquetas=()):
+        return self.registrar(Medidor(nombre, ayuda, funcion, tipo, etiquetas))
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus"""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        lineas = []
+        for metrica in metricas:
+            lineas.append(f'# HELP {metrica.nombre} {metrica.ayuda}')
+            lineas.append(f'# TYPE {metrica.nombre} {metrica.tipo}')
+            for nombre, etiquetas, valor in metrica.muestras():
+                lineas.append(f'{nombre}{etiquetas} {_numero(valor)}')
+        return '\n'.join(lineas) + '\n'
+
+
+registro = Registro()
@@ -1,41 +1,155 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import time
-from django.utils.deprecation import MiddlewareMixin
+from contextlib import ExitStack
+from logging.handlers import QueueHandler, QueueListener
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import empty
+
+from .metricas import BUCKETS_CONSULTAS, registro
 
 logger = logging.getLogger('contenido')
 
+duracion_requests = registro.histograma(
+    'bienestar_request_duracion_segundos', 'Duración de los requests por vista', ('vista', 'metodo')
+)
+total_requests = registro.contador(
+    'bienestar_requests_total', 'Requests atendidos por vista y código de estado', ('vista', 'metodo', 'estado')
+)
+consultas_requests = registro.histograma(
+    'bienestar_request_consultas_db', 'Consultas SQL por request', ('vista',), BUCKETS_CONSULTAS
+)
+tiempo_db_requests = registro.histograma(
+    'bienestar_request_tiempo_db_segundos', 'Tiempo en la base de datos por request', ('vista',)
+)
+
+
+class MedidorConsultas:
+    """execute_wrapper que cuenta las consultas SQL y el tiempo que toman"""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.tiempo = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - inicio
+            self.cantidad += 1
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide cada request con time.perf_counter: latencia por vista, cantidad y
+    tiempo de consultas SQL. Las métricas se exponen en /metrics; solo una
+    muestra de los requests (más los lentos y los errores) se registra en el
+    log, y sin formatear nada para los que no se registran.
+
+    Bajo ASGI no se cuentan las consultas: corren en el hilo de las vistas
+    síncronas, con conexiones distintas a las del event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
 
-class LoggingMiddleware(MiddlewareMixin):
-    """Middleware personalizado para logging y monitoreo"""
-    
-    def process_request(self, request):
-        """Registrar inicio de request"""
-        request.start_time = time.time()
-        logger.info(
-            f"Request iniciado: {request.method} {request.path} - "
-            f"Usuario: {request.user if hasattr(request, 'user') else 'Anónimo'} - "
-            f"IP: {self.get_client_ip(request)}"
-        )
-    
-    def process_response(self, request, response):
-        """Registrar finalización de request"""
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-            logger.info(
-                f"Request completado: {request.method} {request.path} - "
-                f"Status: {response.status_code} - "
-                f"Duración: {duration:.2f}s"
-            )
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = getattr(settings, 'INSTRUMENTACION_MUESTREO', 0.01)
+        self.umbral_lento = getattr(settings, 'INSTRUMENTACION_UMBRAL_LENTO', 1.0)
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        medidor = MedidorConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(medidor))
+            response = self.get_response(request)
+        self.registrar(request, response, time.perf_counter() - inicio, medidor)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        self.registrar(request, response, time.perf_counter() - inicio, None)
         return response
-    
-    def get_client_ip(self, request):
-        """Obtener IP del cliente"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
 
+    def registrar(self, request, response, duracion, medidor):
+        vista = self.get_vista(request)
+        duracion_requests.observar(duracion, vista, request.method)
+        total_requests.inc(vista, request.method, response.status_code)
+        if medidor is not None:
+            consultas_requests.observar(medidor.cantidad, vista)
+            tiempo_db_requests.observar(medidor.tiempo, vista)
+
+        if duracion >= self.umbral_lento or response.status_code >= 500 or random.random() < self.muestreo:
+            logger.info(json.dumps({
+                'metodo': request.method,
+                'ruta': request.path,
+                'vista': vista,
+                'estado': response.status_code,
+                'duracion_ms': round(duracion * 1000, 2),
+                'consultas': medidor.cantidad if medidor is not None else None,
+                'db_ms': round(medidor.tiempo * 1000, 2) if medidor is not None else None,
+                'usuario': self.get_usuario_id(request),
+                'ip': get_client_ip(request),
+            }, ensure_ascii=False))
+
+    @staticmethod
+    def get_vista(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'sin_ruta'
+        return match.view_name or match.route or 'sin_nombre'
+
+    @staticmethod
+    def get_usuario_id(request):
+        """ID del usuario solo si ya fue cargado: no fuerza la carga perezosa"""
+        usuario = request.__dict__.get('user')
+        if usuario is None or getattr(usuario, '_wrapped', None) is empty:
+            return None
+        return getattr(usuario, 'pk', None)
+
+
+def get_client_ip(request):
+    """Obtener IP del cliente"""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0]
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip
+
+
+class ArchivoEnColaHandler(QueueHandler):
+    """
+    Handler de logging que no bloquea: el request solo encola el registro y
+    un QueueListener en segundo plano lo escribe en el archivo.
+    """
 
+    def __init__(self, filename, encoding='utf-8'):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        super().__init__(queue.Queue(-1))
+        self.archivo = logging.FileHandler(filename, encoding=encoding)
+        self.listener = QueueListener(self.queue, self.archivo, respect_handler_level=False)
+        self.listener.start()
+        atexit.register(self.detener)
 
+    def detener(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            self.archivo.close()
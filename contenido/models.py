@@ -30,6 +30,11 @@ class Carrera(models.Model):
         verbose_name = 'Carrera'
         verbose_name_plural = 'Carreras'
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['nombre', 'id']),
+            # Sincronización incremental: WHERE actualizado_en >= X ORDER BY actualizado_en, id
+            models.Index(fields=['actualizado_en', 'id'], name='carrera_sincronizacion_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} - {self.universidad}"
@@ -61,21 +66,48 @@ class Anuncio(models.Model):
     fecha_publicacion = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de publicación')
     fecha_expiracion = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de expiración')
     activo = models.BooleanField(default=True)
+    # Estado materializado de esta_activo(); el programador de publicación lo
+    # actualiza al llegar fecha_publicacion o fecha_expiracion
+    visible = models.BooleanField(default=False, editable=False, verbose_name='Visible')
     
     # Auditoría
     veces_visto = models.IntegerField(default=0, verbose_name='Veces visto')
     
+    CAMPOS_VISIBILIDAD = {'activo', 'fecha_publicacion', 'fecha_expiracion'}
+    
     class Meta:
         verbose_name = 'Anuncio'
         verbose_name_plural = 'Anuncios'
         ordering = ['-creado_en']
+        indexes = [
+            models.Index(fields=['creado_en', 'id']),
+            # Feed de estudiantes y apoderados: WHERE visible ORDER BY creado_en DESC, id DESC
+            models.Index(fields=['creado_en', 'id'], condition=models.Q(visible=True), name='anuncio_feed_visible_idx'),
+            models.Index(fields=['actualizado_en', 'id'], name='anuncio_sincronizacion_idx'),
+        ]
     
     def __str__(self):
         return f"{self.titulo} ({self.get_tipo_display()})"
     
-    def esta_activo(self):
+    def save(self, *args, **kwargs):
+        """Recalcular el estado visible; los cambios se notifican una vez, al confirmar"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.CAMPOS_VISIBILIDAD & set(update_fields):
+            visible = self.esta_activo()
+            cambio = visible != self.visible
+            self.visible = visible
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'visible'}
+        else:
+            cambio = False
+        super().save(*args, **kwargs)
+        if cambio:
+            from .publicacion import notificar_cambio
+            notificar_cambio(self)
+    
+    def esta_activo(self, ahora=None):
         """Verifica si el anuncio está activo según fechas"""
-        ahora = timezone.now()
+        ahora = ahora or timezone.now()
         if self.fecha_publicacion and ahora < self.fecha_publicacion:
             return False
         if self.fecha_expiracion and ahora > self.fecha_expiracion:
@@ -83,9 +115,15 @@ class Anuncio(models.Model):
         return self.activo
     
     def incrementar_vistas(self):
-        """Incrementa el contador de vistas"""
-        self.veces_visto += 1
-        self.save(update_fields=['veces_visto'])
+        """Registra una vista en el contador por lotes y devuelve el total actual"""
+        from .vistas import contador_vistas
+        contador_vistas.registrar(self.pk)
+        return self.total_vistas()
+    
+    def total_vistas(self):
+        """Vistas persistidas más las pendientes de persistir"""
+        from .vistas import contador_vistas
+        return self.veces_visto + contador_vistas.pendientes(self.pk)
 
 
 class LogAuditoria(models.Model):
@@ -104,7 +142,7 @@ class LogAuditoria(models.Model):
     accion = models.CharField(max_length=10, choices=ACCION_CHOICES, verbose_name='Acción')
     detalles = models.JSONField(default=dict, verbose_name='Detalles')
     ip_address = models.GenericIPAddressField(null=True, blank=True, verbose_name='Dirección IP')
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name='Fecha y hora')
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, verbose_name='Fecha y hora')
     
     class Meta:
         verbose_name = 'Log de Auditoría'
@@ -113,10 +151,75 @@ class LogAuditoria(models.Model):
         indexes = [
             models.Index(fields=['usuario', 'timestamp']),
             models.Index(fields=['modelo', 'objeto_id']),
+            models.Index(fields=['timestamp']),
+            models.Index(fields=['accion', 'timestamp']),
         ]
     
     def __str__(self):
         return f"{self.get_accion_display()} - {self.modelo} - {self.usuario} - {self.timestamp}"
 
 
+class EventoVista(models.Model):
+    """Una vista de un anuncio; se resume por hora y por día y luego se elimina"""
+    
+    anuncio = models.ForeignKey(Anuncio, on_delete=models.CASCADE, related_name='eventos_vista')
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='+')
+    curso = models.CharField(max_length=50, blank=True, default='', verbose_name='Curso')
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, verbose_name='Fecha y hora')
+    
+    class Meta:
+        verbose_name = 'Evento de vista'
+        verbose_name_plural = 'Eventos de vista'
+        indexes = [
+            models.Index(fields=['timestamp']),
+        ]
+    
+    def __str__(self):
+        return f"Vista de {self.anuncio_id} por {self.usuario_id} - {self.timestamp}"
+
+
+class ResumenVistas(models.Model):
+    """Vistas agregadas por anuncio, curso y hora o día"""
+    
+    PERIODO_CHOICES = [
+        ('hora', 'Hora'),
+        ('dia', 'Día'),
+    ]
+    
+    anuncio = models.ForeignKey(Anuncio, on_delete=models.CASCADE, related_name='resumenes_vistas')
+    periodo = models.CharField(max_length=4, choices=PERIODO_CHOICES, verbose_name='Periodo')
+    inicio = models.DateTimeField(verbose_name='Inicio del periodo')
+    curso = models.CharField(max_length=50, blank=True, default='', verbose_name='Curso')
+    vistas = models.PositiveIntegerField(default=0, verbose_name='Vistas')
+    usuarios_unicos = models.PositiveIntegerField(default=0, verbose_name='Usuarios únicos')
+    
+    class Meta:
+        verbose_name = 'Resumen de vistas'
+        verbose_name_plural = 'Resúmenes de vistas'
+        constraints = [
+            models.UniqueConstraint(fields=['anuncio', 'periodo', 'inicio', 'curso'], name='resumen_vistas_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['periodo', 'inicio']),
+        ]
+    
+    def __str__(self):
+        return f"{self.anuncio_id} {self.periodo} {self.inicio} {self.curso or 'sin curso'}: {self.vistas}"
+
 
+class Eliminacion(models.Model):
+    """Carrera o anuncio eliminado: la sincronización incremental lo informa a los clientes"""
+    
+    modelo = models.CharField(max_length=50, verbose_name='Modelo')
+    objeto_id = models.BigIntegerField(verbose_name='ID del objeto')
+    eliminado_en = models.DateTimeField(default=timezone.now, verbose_name='Eliminado en')
+    
+    class Meta:
+        verbose_name = 'Eliminación'
+        verbose_name_plural = 'Eliminaciones'
+        indexes = [
+            models.Index(fields=['modelo', 'eliminado_en'], name='eliminacion_sincronizacion_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id} eliminado {self.eliminado_en}"
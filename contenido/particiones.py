@@ -0,0 +1,236 @@
+import gzip
+import json
+import logging
+import os
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import LogAuditoria
+
+logger = logging.getLogger('contenido')
+
+CAMPOS_ARCHIVO = ['id', 'usuario_id', 'modelo', 'objeto_id', 'accion', 'detalles', 'ip_address', 'timestamp']
+TAMANO_LOTE = 5000
+
+
+def tabla():
+    return LogAuditoria._meta.db_table
+
+
+def es_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def inicio_de_mes(fecha, desplazamiento=0):
+    """Primer instante del mes de ``fecha`` (en la zona horaria actual) desplazado en meses"""
+    fecha = timezone.localtime(fecha)
+    indice = fecha.year * 12 + fecha.month - 1 + desplazamiento
+    return timezone.make_aware(datetime(indice // 12, indice % 12 + 1, 1))
+
+
+def nombre_particion(inicio):
+    return f'{tabla()}_p{inicio.year:04d}_{inicio.month:02d}'
+
+
+def particion_por_defecto():
+    return f'{tabla()}_default'
+
+
+def esta_particionada():
+    if not es_postgresql():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+            'WHERE c.relname = %s',
+            [tabla()],
+        )
+        return cursor.fetchone() is not None
+
+
+def particiones_mensuales():
+    """Lista de (inicio_de_mes, nombre) de las particiones mensuales existentes"""
+    prefijo = f'{tabla()}_p'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'JOIN pg_class p ON p.oid = i.inhparent '
+            'WHERE p.relname = %s',
+            [tabla()],
+        )
+        nombres = [fila[0] for fila in cursor.fetchall()]
+    resultado = []
+    for nombre in nombres:
+        if not nombre.startswith(prefijo):
+            continue
+        anio, mes = nombre[len(prefijo):].split('_')
+        resultado.append((timezone.make_aware(datetime(int(anio), int(mes), 1)), nombre))
+    return sorted(resultado)
+
+
+def crear_particion(cursor, inicio):
+    """
+    Crear la partición del mes de ``inicio``. Si el mantenimiento se atrasó,
+    las filas de ese mes quedaron en la partición por defecto y PostgreSQL
+    no deja crearla: se desacopla la partición por defecto, se crea la del
+    mes, se le mueven esas filas y se vuelve a acoplar.
+    """
+    q = connection.ops.quote_name
+    fin = inicio_de_mes(inicio, 1)
+    defecto = particion_por_defecto()
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM {q(defecto)} WHERE "timestamp" >= %s AND "timestamp" < %s)', [inicio, fin]
+    )
+    atrasadas = cursor.fetchone()[0]
+    if atrasadas:
+        cursor.execute(f'ALTER TABLE {q(tabla())} DETACH PARTITION {q(defecto)}')
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {q(nombre_particion(inicio))} '
+        f'PARTITION OF {q(tabla())} '
+        f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fin.isoformat()}')"
+    )
+    if atrasadas:
+        cursor.execute(
+            f'WITH movidas AS (DELETE FROM {q(defecto)} WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+            f'INSERT INTO {q(tabla())} SELECT * FROM movidas',
+            [inicio, fin],
+        )
+        logger.warning(
+            'Partición %s creada con %s filas movidas desde %s', nombre_particion(inicio), cursor.rowcount, defecto
+        )
+        cursor.execute(f'ALTER TABLE {q(tabla())} ATTACH PARTITION {q(defecto)} DEFAULT')
+
+
+def crear_particiones_futuras(meses):
+    """Crear las particiones del mes actual y de los ``meses`` siguientes"""
+    actual = inicio_de_mes(timezone.now())
+    creadas = []
+    existentes = {nombre for _, nombre in particiones_mensuales()}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for desplazamiento in range(meses + 1):
+            inicio = inicio_de_mes(actual, desplazamiento)
+            if nombre_particion(inicio) not in existentes:
+                crear_particion(cursor, inicio)
+                creadas.append(nombre_particion(inicio))
+    return creadas
+
+
+def convertir_a_particionada(meses_futuros):
+    """
+    Reemplazar la tabla de auditoría por una tabla particionada por mes.
+
+    Copia todas las filas existentes en una sola transacción; conviene
+    ejecutarlo en una ventana de mantenimiento.
+    """
+    if not es_postgresql():
+        raise RuntimeError('El particionado de la auditoría requiere PostgreSQL')
+    if esta_particionada():
+        return False
+
+    q = connection.ops.quote_name
+    nombre = tabla()
+    legado = f'{nombre}_legado'
+    usuarios = LogAuditoria._meta.get_field('usuario').related_model._meta.db_table
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {q(nombre)} RENAME TO {q(legado)}')
+        cursor.execute(
+            f'CREATE TABLE {q(nombre)} (LIKE {q(legado)} INCLUDING DEFAULTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f'CREATE TABLE {q(particion_por_defecto())} PARTITION OF {q(nombre)} DEFAULT')
+
+        cursor.execute(f'SELECT MIN("timestamp") FROM {q(legado)}')
+        primero = cursor.fetchone()[0] or timezone.now()
+        inicio = inicio_de_mes(primero)
+        limite = inicio_de_mes(timezone.now(), meses_futuros)
+        while inicio <= limite:
+            crear_particion(cursor, inicio)
+            inicio = inicio_de_mes(inicio, 1)
+
+        cursor.execute(f'INSERT INTO {q(nombre)} SELECT * FROM {q(legado)}')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {q(nombre)}",
+            [nombre],
+        )
+        cursor.execute(f'DROP TABLE {q(legado)}')
+
+        # La clave primaria debe incluir la columna de particionado
+        cursor.execute(f'ALTER TABLE {q(nombre)} ADD PRIMARY KEY (id, "timestamp")')
+        cursor.execute(
+            f'ALTER TABLE {q(nombre)} ADD FOREIGN KEY (usuario_id) REFERENCES {q(usuarios)} (id) '
+            f'DEFERRABLE INITIALLY DEFERRED'
+        )
+        with connection.schema_editor(atomic=False) as editor:
+            for indice in LogAuditoria._meta.indexes:
+                editor.add_index(LogAuditoria, indice)
+    return True
+
+
+def _escribir_archivo(ruta, filas):
+    """Escribir filas como JSONL comprimido de forma atómica; devuelve la cantidad escrita"""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f'{ruta}.tmp'
+    cantidad = 0
+    with gzip.open(temporal, 'wt', encoding='utf-8') as archivo:
+        for fila in filas:
+            archivo.write(json.dumps(fila, cls=DjangoJSONEncoder, ensure_ascii=False))
+            archivo.write('\n')
+            cantidad += 1
+    os.replace(temporal, ruta)
+    return cantidad
+
+
+def _filas(queryset):
+    return queryset.order_by('timestamp', 'id').values(*CAMPOS_ARCHIVO).iterator(chunk_size=TAMANO_LOTE)
+
+
+def archivar_particiones(retencion_meses, directorio):
+    """
+    Exportar, desacoplar y eliminar las particiones anteriores a la ventana
+    de retención. Las filas de meses que nunca tuvieron partición propia
+    quedaron en la partición por defecto y se archivan fila a fila.
+    """
+    q = connection.ops.quote_name
+    corte = inicio_de_mes(timezone.now(), -retencion_meses)
+    archivadas = []
+    for inicio, nombre in particiones_mensuales():
+        if inicio >= corte:
+            continue
+        ruta = os.path.join(directorio, f'{nombre}.jsonl.gz')
+        fin = inicio_de_mes(inicio, 1)
+        with transaction.atomic():
+            cantidad = _escribir_archivo(
+                ruta, _filas(LogAuditoria.objects.filter(timestamp__gte=inicio, timestamp__lt=fin))
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE {q(tabla())} DETACH PARTITION {q(nombre)}')
+                cursor.execute(f'DROP TABLE {q(nombre)}')
+        logger.info('Partición %s archivada en %s (%s filas)', nombre, ruta, cantidad)
+        archivadas.append((nombre, ruta, cantidad))
+    # Sin particiones mensuales anteriores al corte, las filas vencidas que
+    # quedan están en la partición por defecto
+    return archivadas + archivar_filas(retencion_meses, directorio, particion_por_defecto())
+
+
+def archivar_filas(retencion_meses, directorio, nombre=None):
+    """Retención para tablas sin particionar (o para la partición por defecto): exportar y borrar por lotes"""
+    nombre = nombre or tabla()
+    corte = inicio_de_mes(timezone.now(), -retencion_meses)
+    antiguos = LogAuditoria.objects.filter(timestamp__lt=corte)
+    if not antiguos.exists():
+        return []
+    ruta = os.path.join(directorio, f'{nombre}_hasta_{corte:%Y_%m}_{timezone.now():%Y%m%d%H%M%S}.jsonl.gz')
+    cantidad = _escribir_archivo(ruta, _filas(antiguos))
+    while True:
+        ids = list(antiguos.values_list('id', flat=True)[:TAMANO_LOTE])
+        if not ids:
+            break
+        # Con el filtro por timestamp PostgreSQL solo recorre las particiones vencidas
+        antiguos.filter(id__in=ids).delete()
+    logger.info('Logs de auditoría anteriores a %s archivados en %s (%s filas)', corte, ruta, cantidad)
+    return [(nombre, ruta, cantidad)]
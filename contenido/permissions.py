@@ -17,4 +17,8 @@ class EsProfesorOrReadOnly(permissions.BasePermission):
         return request.user.is_authenticated and request.user.es_profesor()
 
 
-
+class EsProfesor(permissions.BasePermission):
+    """Acceso solo a profesores/administradores, también en lectura"""
+    
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.es_profesor()
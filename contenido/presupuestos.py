@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Carrera, Anuncio
+
+Usuario = get_user_model()
+
+# Presupuesto de consultas SQL por endpoint: lo verifican contenido/tests.py y
+# el comando verificar_consultas.
+# (nombre, url, rol que consulta, consultas)
+# La autenticación se fuerza en el cliente, así que el presupuesto mide solo el trabajo de la vista.
+# Se mide sin caché: list y detail incluyen la consulta de validadores (ETag) y el feed
+# de estudiantes la del próximo cambio programado.
+PRESUPUESTOS = [
+    ('carreras-list', '/api/carreras/', 'estudiante', 2),
+    ('carreras-list (profesor)', '/api/carreras/', 'profesor', 2),
+    ('carreras-detail', '/api/carreras/{carrera}/', 'estudiante', 2),
+    ('anuncios-list', '/api/anuncios/', 'estudiante', 2),
+    ('anuncios-list (profesor)', '/api/anuncios/', 'profesor', 2),
+    ('anuncios-list con total', '/api/anuncios/?total=true', 'estudiante', 3),
+    ('anuncios-detail', '/api/anuncios/{anuncio}/', 'estudiante', 2),
+    ('anuncios-activos', '/api/anuncios/activos/', 'estudiante', 1),
+    ('carreras-sync', '/api/carreras/sync/', 'estudiante', 2),
+    ('anuncios-sync', '/api/anuncios/sync/', 'estudiante', 2),
+    ('usuarios-list', '/api/auth/usuarios/', 'profesor', 1),
+    ('usuarios-list filtrado', '/api/auth/usuarios/?rol=estudiante&q=pre&fields=id,email', 'profesor', 1),
+    ('usuarios-perfil', '/api/auth/usuarios/perfil/', 'estudiante', 0),
+]
+
+
+def crear_usuarios():
+    """Profesor y estudiante que hacen las consultas, por rol"""
+    return {
+        'profesor': Usuario.objects.create_user(
+            'presupuesto.profesor@bienestar.local', nombres='Presupuesto', apellidos='Profesor', rol='profesor'
+        ),
+        'estudiante': Usuario.objects.create_user(
+            'presupuesto.estudiante@bienestar.local', nombres='Presupuesto', apellidos='Estudiante'
+        ),
+    }
+
+
+def crear_datos(profesor, cantidad, desde):
+    """``cantidad`` usuarios, carreras y anuncios más; devuelve los ids que usan las urls de detalle"""
+    ahora = timezone.now()
+    carreras = [
+        Carrera(
+            nombre=f'Carrera presupuesto {desde + i}', descripcion='-', universidad='-', duracion='-',
+            creado_por=profesor,
+        )
+        for i in range(cantidad)
+    ]
+    anuncios = [
+        Anuncio(titulo=f'Anuncio presupuesto {desde + i}', contenido='-', creado_por=profesor, fecha_publicacion=ahora, visible=True)
+        for i in range(cantidad)
+    ]
+    Usuario.objects.bulk_create([
+        Usuario(email=f'presupuesto.{desde}.{i}@bienestar.local', nombres='-', apellidos='-')
+        for i in range(cantidad)
+    ])
+    Carrera.objects.bulk_create(carreras)
+    Anuncio.objects.bulk_create(anuncios)
+    return {'carrera': Carrera.objects.filter(creado_por=profesor).first().id,
+            'anuncio': Anuncio.objects.filter(creado_por=profesor).first().id}
+
+
+def solicitar(usuario, url):
+    """GET autenticado como ``usuario``, con el caché vacío"""
+    cliente = APIClient(SERVER_NAME='localhost')
+    cliente.force_authenticate(usuario)
+    cache.clear()
+    return cliente.get(url)
@@ -0,0 +1,139 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Min, Q
+from django.db.models.signals import post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .cache import invalidar_feed
+from .metricas import registro
+from .models import Anuncio
+
+logger = logging.getLogger('contenido')
+
+# Se envía una vez por cambio de visibilidad, con las listas de IDs
+# ``publicados`` y ``retirados`` y ``programado`` (True si el cambio lo hizo
+# el programador al llegar una fecha); aquí se conectan las notificaciones
+visibilidad_cambiada = Signal()
+
+cambios_aplicados = registro.contador(
+    'bienestar_publicacion_cambios_total', 'Anuncios publicados o retirados por el programador', ('cambio',)
+)
+
+# La expiración ocurre cuando ahora > fecha_expiracion: despertar apenas después
+MARGEN = timedelta(milliseconds=10)
+
+
+def condicion_visible(ahora):
+    """Misma regla que Anuncio.esta_activo(), expresada en SQL"""
+    return (
+        Q(activo=True)
+        & (Q(fecha_publicacion__isnull=True) | Q(fecha_publicacion__lte=ahora))
+        & (Q(fecha_expiracion__isnull=True) | Q(fecha_expiracion__gte=ahora))
+    )
+
+
+def aplicar_cambios(ahora=None):
+    """
+    Publicar y retirar los anuncios cuya fecha ya llegó; devuelve los IDs
+    (publicados, retirados). Las filas se bloquean con SKIP LOCKED, así que
+    con varios procesos cada cambio lo aplica y lo notifica uno solo.
+    """
+    ahora = ahora or timezone.now()
+    visible = condicion_visible(ahora)
+    with transaction.atomic():
+        candidatos = Anuncio.objects.select_for_update(skip_locked=True)
+        publicados = list(candidatos.filter(visible, visible=False).values_list('id', flat=True))
+        retirados = list(candidatos.filter(~visible, visible=True).values_list('id', flat=True))
+        if publicados:
+            Anuncio.objects.filter(id__in=publicados).update(visible=True, actualizado_en=ahora)
+        if retirados:
+            Anuncio.objects.filter(id__in=retirados).update(visible=False, actualizado_en=ahora)
+    if publicados or retirados:
+        cambios_aplicados.inc('publicado', cantidad=len(publicados))
+        cambios_aplicados.inc('retirado', cantidad=len(retirados))
+        logger.info('Programador de publicación: %s publicados, %s retirados', len(publicados), len(retirados))
+        invalidar_feed()
+        visibilidad_cambiada.send(sender=Anuncio, publicados=publicados, retirados=retirados, programado=True)
+    return publicados, retirados
+
+
+def proximo_cambio(ahora=None):
+    """Instante de la próxima publicación o expiración programada (None si no hay)"""
+    ahora = ahora or timezone.now()
+    limites = Anuncio.objects.filter(activo=True).aggregate(
+        publicacion=Min('fecha_publicacion', filter=Q(visible=False, fecha_publicacion__gt=ahora)),
+        expiracion=Min('fecha_expiracion', filter=Q(visible=True, fecha_expiracion__gte=ahora)),
+    )
+    if limites['expiracion'] is not None:
+        limites['expiracion'] += MARGEN
+    return min((limite for limite in limites.values() if limite is not None), default=None)
+
+
+def notificar_cambio(anuncio):
+    """Notificar un cambio de visibilidad hecho al guardar, una vez confirmada la transacción"""
+    publicados, retirados = ([anuncio.pk], []) if anuncio.visible else ([], [anuncio.pk])
+    transaction.on_commit(
+        lambda: visibilidad_cambiada.send(
+            sender=Anuncio, publicados=publicados, retirados=retirados, programado=False
+        )
+    )
+
+
+class ProgramadorPublicacion:
+    """
+    Hilo que duerme hasta la próxima fecha de publicación o expiración y
+    entonces aplica el cambio. Guardar un anuncio lo despierta para
+    recalcular la espera; además revisa cada ``intervalo`` segundos los
+    cambios hechos desde otros procesos.
+    """
+
+    def __init__(self, intervalo=None):
+        self.intervalo = intervalo or getattr(settings, 'PUBLICACION_INTERVALO', 60.0)
+        self._despertar = threading.Event()
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def asegurar(self):
+        """Iniciar el hilo si no está corriendo"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        if not getattr(settings, 'PUBLICACION_AUTOMATICA', True):
+            return
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self._ejecutar, name='programador-publicacion', daemon=True)
+            self._hilo.start()
+
+    def despertar(self):
+        self._despertar.set()
+
+    def _ejecutar(self):
+        while True:
+            espera = self.intervalo
+            try:
+                aplicar_cambios()
+                ahora = timezone.now()
+                proximo = proximo_cambio(ahora)
+                if proximo is not None:
+                    espera = min(espera, max((proximo - ahora).total_seconds(), 0.0))
+            except Exception:
+                logger.exception('Falló el programador de publicación de anuncios')
+            finally:
+                close_old_connections()
+            self._despertar.wait(espera)
+            self._despertar.clear()
+
+
+programador = ProgramadorPublicacion()
+
+
+@receiver(post_save, sender=Anuncio)
+def _reprogramar(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or Anuncio.CAMPOS_VISIBILIDAD & set(update_fields):
+        transaction.on_commit(programador.despertar)
@@ -0,0 +1,201 @@
+import logging
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Carrera
+
+logger = logging.getLogger('contenido')
+
+CLAVE_VERSION = 'carreras:recomendaciones:version'
+PALABRAS_VACIAS = frozenset(
+    'a al algo con como de del el en es esta este la las lo los mas o para por que se sin su sus un una uno y'.split()
+)
+# Los campos de orientación vocacional pesan más que el nombre de la carrera
+PESOS_CAMPOS = [('areas_interes', 2), ('habilidades_necesarias', 2), ('nombre', 1)]
+
+
+def tokenizar(texto):
+    """Minúsculas, sin tildes, sin palabras vacías"""
+    if not texto:
+        return []
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return [t for t in re.findall(r'[a-z0-9]+', texto) if len(t) > 1 and t not in PALABRAS_VACIAS]
+
+
+def texto_carrera(carrera):
+    """Tokens de una carrera (instancia o dict de valores) con los pesos de PESOS_CAMPOS"""
+    tokens = []
+    for campo, peso in PESOS_CAMPOS:
+        valor = carrera[campo] if isinstance(carrera, dict) else getattr(carrera, campo)
+        tokens.extend(tokenizar(valor) * peso)
+    return tokens
+
+
+class MotorRecomendaciones:
+    """
+    Índice TF-IDF de las carreras activas para recomendar por intereses y habilidades.
+
+    La matriz se guarda por columnas (CSC) en arreglos de NumPy: para cada
+    término, las filas y pesos de las carreras que lo contienen. Puntuar una
+    consulta es un único producto matriz-vector disperso y vectorizado que
+    solo recorre las columnas de los términos consultados. Al guardar una
+    carrera solo se re-tokeniza esa fila; los pesos IDF y la normalización se
+    recalculan de forma vectorizada en la siguiente consulta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vocabulario = {}
+        self._filas = {}  # carrera_id -> (ids de términos, frecuencias)
+        self._matriz = None
+        self._version = None
+
+    def construir(self, documentos):
+        """Reconstruir el índice completo a partir de pares (carrera_id, tokens)"""
+        with self._lock:
+            self._vocabulario = {}
+            self._filas = {}
+            for carrera_id, tokens in documentos:
+                self._filas[carrera_id] = self._vectorizar(self._vocabulario, tokens, crear=True)
+            self._matriz = None
+
+    def actualizar(self, carrera_id, tokens):
+        """Actualizar (o quitar, si ``tokens`` es None) una sola carrera"""
+        with self._lock:
+            if tokens is None:
+                self._filas.pop(carrera_id, None)
+            else:
+                self._filas[carrera_id] = self._vectorizar(self._vocabulario, tokens, crear=True)
+            self._matriz = None
+
+    def recomendar(self, tokens, k=10):
+        """Lista de (carrera_id, puntaje) de las ``k`` carreras más afines"""
+        # El vocabulario es el de la matriz: construir() puede reemplazar el vigente entretanto
+        ids, punteros, filas, datos, idf, vocabulario = self._obtener_matriz()
+        if not len(ids):
+            return []
+        terminos, frecuencias = self._vectorizar(vocabulario, tokens, crear=False)
+        if not len(terminos):
+            return []
+
+        pesos = (1 + np.log(frecuencias)) * idf[terminos]
+        pesos /= np.linalg.norm(pesos)
+
+        # Producto matriz por vector disperso: posiciones de las columnas consultadas
+        inicios = punteros[terminos]
+        largos = punteros[terminos + 1] - inicios
+        posiciones = np.repeat(inicios - np.cumsum(largos) + largos, largos) + np.arange(largos.sum())
+        puntajes = np.bincount(
+            filas[posiciones], weights=datos[posiciones] * np.repeat(pesos, largos), minlength=len(ids)
+        )
+
+        k = min(k, len(ids))
+        mejores = np.argpartition(-puntajes, k - 1)[:k]
+        mejores = mejores[np.argsort(-puntajes[mejores], kind='stable')]
+        return [(int(ids[i]), float(puntajes[i])) for i in mejores if puntajes[i] > 0]
+
+    @staticmethod
+    def _vectorizar(vocabulario, tokens, crear):
+        conteo = {}
+        for token in tokens:
+            termino = vocabulario.get(token)
+            if termino is None:
+                if not crear:
+                    continue
+                termino = vocabulario[token] = len(vocabulario)
+            conteo[termino] = conteo.get(termino, 0) + 1
+        return (
+            np.fromiter(conteo.keys(), dtype=np.int32, count=len(conteo)),
+            np.fromiter(conteo.values(), dtype=np.float32, count=len(conteo)),
+        )
+
+    def _obtener_matriz(self):
+        matriz = self._matriz
+        if matriz is not None:
+            return matriz
+        with self._lock:
+            if self._matriz is None:
+                self._matriz = self._ensamblar()
+            return self._matriz
+
+    def _ensamblar(self):
+        ids = np.fromiter(self._filas.keys(), dtype=np.int64, count=len(self._filas))
+        # Copia: actualizar() agrega términos sin columna en esta matriz
+        vocabulario = dict(self._vocabulario)
+        n_terminos = len(vocabulario)
+        if not len(ids):
+            vacia = np.zeros(0, np.float32)
+            return ids, np.zeros(n_terminos + 1, np.int64), ids, vacia, np.zeros(n_terminos, np.float32), vocabulario
+
+        valores = list(self._filas.values())
+        largos = np.fromiter((len(t) for t, _ in valores), dtype=np.int64, count=len(valores))
+        columnas = np.concatenate([t for t, _ in valores])
+        frecuencias = np.concatenate([f for _, f in valores])
+        filas = np.repeat(np.arange(len(ids)), largos)
+
+        # IDF suavizado y TF sublineal, luego normalización L2 por fila
+        df = np.bincount(columnas, minlength=n_terminos)
+        idf = (np.log((1 + len(ids)) / (1 + df)) + 1).astype(np.float32)
+        datos = (1 + np.log(frecuencias)) * idf[columnas]
+        normas = np.sqrt(np.bincount(filas, weights=datos * datos, minlength=len(ids)))
+        normas[normas == 0] = 1
+        datos = (datos / normas[filas]).astype(np.float32)
+
+        # Reordenar por término (CSC) para que una consulta solo lea sus columnas
+        orden = np.argsort(columnas, kind='stable')
+        punteros = np.zeros(n_terminos + 1, dtype=np.int64)
+        np.cumsum(df, out=punteros[1:])
+        return ids, punteros, filas[orden], datos[orden], idf, vocabulario
+
+    def sincronizar(self):
+        """Reconstruir desde la base de datos si otro proceso modificó carreras"""
+        version = cache.get(CLAVE_VERSION)
+        if self._version is not None and version == self._version:
+            return
+        campos = ['id'] + [campo for campo, _ in PESOS_CAMPOS]
+        carreras = Carrera.objects.filter(activo=True).values(*campos).iterator(chunk_size=2000)
+        self.construir((carrera['id'], texto_carrera(carrera)) for carrera in carreras)
+        self._version = version if version is not None else _nueva_version()
+        logger.info('Índice de recomendaciones reconstruido con %s carreras', len(self._filas))
+
+    def registrar_cambio(self, carrera, eliminada):
+        """Aplicar el cambio de una carrera y publicar una nueva versión para los demás procesos"""
+        if self._version is None:
+            # Este proceso aún no construyó el índice; basta con avisar a los demás
+            _nueva_version()
+            return
+        self.actualizar(carrera.pk, None if eliminada or not carrera.activo else texto_carrera(carrera))
+        anterior, nueva = self._version, _nueva_version()
+        # Si otro proceso también publicó cambios, reconstruir en la próxima consulta
+        self._version = nueva if nueva is not None and nueva == anterior + 1 else None
+
+
+def _nueva_version():
+    cache.add(CLAVE_VERSION, 0, None)
+    try:
+        return cache.incr(CLAVE_VERSION)
+    except ValueError:
+        return None
+
+
+motor_recomendaciones = MotorRecomendaciones()
+
+
+def recomendar_carreras(intereses='', habilidades='', k=10):
+    """(carrera_id, puntaje) de las carreras activas más afines a intereses y habilidades"""
+    motor_recomendaciones.sincronizar()
+    tokens = tokenizar(intereses) + tokenizar(habilidades)
+    return motor_recomendaciones.recomendar(tokens, k)
+
+
+@receiver(post_save, sender=Carrera)
+@receiver(post_delete, sender=Carrera)
+def _actualizar_por_cambio(sender, instance, signal, **kwargs):
+    motor_recomendaciones.registrar_cambio(instance, eliminada=signal is post_delete)
@@ -0,0 +1,386 @@
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import timedelta
+from http.client import HTTPConnection, HTTPSConnection
+from urllib.parse import urlsplit
+
+import django
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+
+from .cache import invalidar_feed
+from .models import Anuncio, Carrera, LogAuditoria
+from .recomendaciones import _nueva_version
+
+Usuario = get_user_model()
+
+# Los datos generados se reconocen por el dominio del email de sus usuarios
+DOMINIO = 'benchmark.bienestar.test'
+CLAVE = 'Benchmark-2024!'
+
+CURSOS = [f'{nivel}{letra}' for nivel in range(1, 5) for letra in 'ABCD']
+PALABRAS = (
+    'orientacion vocacional bienestar salud mental taller charla feria universidad beca postulacion '
+    'ingenieria medicina derecho arte musica deporte tecnologia ciencia investigacion comunidad '
+    'convivencia apoyo familia estudio habilidades liderazgo creatividad empatia trabajo equipo'
+).split()
+TIPOS_ANUNCIO = [tipo for tipo, _ in Anuncio.TIPO_CHOICES]
+ACCIONES = [accion for accion, _ in LogAuditoria.ACCION_CHOICES]
+
+VERSION_RESULTADOS = 1
+
+
+def _texto(azar, palabras):
+    return ' '.join(azar.choice(PALABRAS) for _ in range(palabras)).capitalize()
+
+
+def email_generado(numero):
+    return f'usuario{numero:07d}@{DOMINIO}'
+
+
+def limpiar_datos():
+    """Eliminar todo lo creado por generar_datos"""
+    generados = Usuario.objects.filter(email__endswith=f'@{DOMINIO}')
+    with transaction.atomic():
+        LogAuditoria.objects.filter(usuario__in=generados).delete()
+        Anuncio.objects.filter(creado_por__in=generados).delete()
+        Carrera.objects.filter(creado_por__in=generados).delete()
+        usuarios, _ = generados.delete()
+    invalidar_feed()
+    _nueva_version()
+    return usuarios
+
+
+def generar_datos(usuarios=1000, carreras=200, anuncios=500, logs=10000, semilla=42, lote=1000, progreso=None):
+    """
+    Crear usuarios (5% profesores), carreras, anuncios (algunos programados o
+    expirados) y logs de auditoría con bulk_create. Todos los usuarios tienen
+    la clave ``CLAVE``; la misma semilla produce los mismos datos.
+    """
+    azar = random.Random(semilla)
+    ahora = timezone.now()
+    progreso = progreso or (lambda mensaje: None)
+    clave = make_password(CLAVE)
+    inicio = Usuario.objects.filter(email__endswith=f'@{DOMINIO}').count()
+
+    nuevos = []
+    for numero in range(inicio, inicio + usuarios):
+        rol = 'profesor' if numero % 20 == 0 else azar.choice(['estudiante'] * 5 + ['apoderado'])
+        nuevos.append(Usuario(
+            email=email_generado(numero), password=clave, rol=rol,
+            nombres=_texto(azar, 2), apellidos=_texto(azar, 2),
+            curso=azar.choice(CURSOS) if rol == 'estudiante' else None,
+            date_joined=ahora - timedelta(minutes=azar.randrange(60 * 24 * 365)),
+        ))
+    Usuario.objects.bulk_create(nuevos, batch_size=lote)
+    progreso(f'{usuarios:,} usuarios')
+
+    generados = Usuario.objects.filter(email__endswith=f'@{DOMINIO}')
+    profesores = list(generados.filter(rol='profesor').values_list('id', flat=True))
+    if not profesores and (carreras or anuncios):
+        raise ValueError('Se necesita al menos un profesor generado para crear carreras y anuncios')
+    todos = list(generados.values_list('id', flat=True))
+
+    Carrera.objects.bulk_create([
+        Carrera(
+            nombre=_texto(azar, 3), descripcion=_texto(azar, 40), universidad=f'Universidad {_texto(azar, 1)}',
+            duracion=f'{azar.randint(4, 12)} semestres', requisitos=_texto(azar, 10),
+            campo_laboral=_texto(azar, 15), areas_interes=', '.join(azar.sample(PALABRAS, 3)),
+            habilidades_necesarias=', '.join(azar.sample(PALABRAS, 4)),
+            creado_por_id=azar.choice(profesores), activo=azar.random() > 0.05,
+        )
+        for _ in range(carreras)
+    ], batch_size=lote)
+    progreso(f'{carreras:,} carreras')
+
+    nuevos = []
+    for _ in range(anuncios):
+        anuncio = Anuncio(
+            titulo=_texto(azar, 5), contenido=_texto(azar, 60), tipo=azar.choice(TIPOS_ANUNCIO),
+            creado_por_id=azar.choice(profesores), activo=azar.random() > 0.05,
+            veces_visto=azar.randrange(500),
+        )
+        sorteo = azar.random()
+        if sorteo < 0.1:
+            anuncio.fecha_publicacion = ahora + timedelta(hours=azar.randrange(1, 24 * 14))
+        elif sorteo < 0.2:
+            anuncio.fecha_expiracion = ahora - timedelta(hours=azar.randrange(1, 24 * 30))
+        # bulk_create no pasa por save(): la visibilidad se calcula aquí
+        anuncio.visible = anuncio.esta_activo(ahora)
+        nuevos.append(anuncio)
+    Anuncio.objects.bulk_create(nuevos, batch_size=lote)
+    progreso(f'{anuncios:,} anuncios')
+
+    for desde in range(0, logs, lote):
+        LogAuditoria.objects.bulk_create([
+            LogAuditoria(
+                usuario_id=azar.choice(todos), modelo=azar.choice(['Carrera', 'Anuncio', 'Usuario']),
+                objeto_id=str(azar.randrange(1, 10000)), accion=azar.choice(ACCIONES),
+                detalles={'origen': 'benchmark'}, ip_address=f'10.0.{azar.randrange(256)}.{azar.randrange(256)}',
+                timestamp=ahora - timedelta(seconds=azar.randrange(60 * 60 * 24 * 90)),
+            )
+            for _ in range(min(lote, logs - desde))
+        ])
+    progreso(f'{logs:,} logs de auditoría')
+
+    invalidar_feed()
+    _nueva_version()
+
+
+def _percentiles(muestras_ms):
+    muestras = np.asarray(muestras_ms)
+    return {
+        'p50': float(np.percentile(muestras, 50)),
+        'p95': float(np.percentile(muestras, 95)),
+        'p99': float(np.percentile(muestras, 99)),
+    }
+
+
+def medir_funcion(funcion, repeticiones=200, calentamiento=20):
+    """Latencia por llamada (ms) y llamadas por segundo de una función sin argumentos"""
+    for _ in range(calentamiento):
+        funcion()
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        muestras.append((time.perf_counter() - inicio) * 1000)
+    return {'throughput': 1000 / float(np.mean(muestras)), **_percentiles(muestras)}
+
+
+def micro_benchmarks(repeticiones=200):
+    """Serializers (páginas de 20 y 100 filas) y chequeos de permisos y autenticación"""
+    from usuarios.authentication import JWTAutenticacionRapida, UsuarioToken
+    from usuarios.serializers import CustomTokenObtainPairSerializer, UsuarioSerializer
+    from .permissions import EsProfesor, EsProfesorOrReadOnly
+    from .serializers import AnuncioSerializer, CarreraSerializer
+
+    resultados = {}
+    anuncios = list(Anuncio.objects.select_related('creado_por').order_by('-creado_en')[:100])
+    carreras = list(Carrera.objects.select_related('creado_por').order_by('nombre')[:100])
+    usuarios = list(Usuario.objects.order_by('id')[:100])
+    for nombre, serializer, filas in (
+        ('anuncios', AnuncioSerializer, anuncios),
+        ('carreras', CarreraSerializer, carreras),
+        ('usuarios', UsuarioSerializer, usuarios),
+    ):
+        for cantidad in (20, 100):
+            if len(filas) >= cantidad:
+                pagina = filas[:cantidad]
+                resultados[f'serializar_{nombre}_{cantidad}'] = medir_funcion(
+                    lambda: serializer(pagina, many=True).data, repeticiones
+                )
+
+    estudiante = Usuario.objects.filter(rol='estudiante', is_active=True).first()
+    if estudiante is not None:
+        token = CustomTokenObtainPairSerializer.get_token(estudiante).access_token
+        usuario_token = UsuarioToken(token)
+        fabrica = RequestFactory()
+        lectura = Request(fabrica.get('/api/anuncios/'))
+        escritura = Request(fabrica.post('/api/anuncios/'))
+        lectura.user = escritura.user = usuario_token
+        permiso, solo_profesor = EsProfesorOrReadOnly(), EsProfesor()
+        resultados['permiso_lectura'] = medir_funcion(
+            lambda: permiso.has_permission(lectura, None), repeticiones
+        )
+        resultados['permiso_escritura'] = medir_funcion(
+            lambda: permiso.has_permission(escritura, None) or solo_profesor.has_permission(lectura, None),
+            repeticiones,
+        )
+        autenticacion = JWTAutenticacionRapida()
+        autenticado = fabrica.get('/api/anuncios/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        resultados['autenticacion_jwt'] = medir_funcion(
+            lambda: autenticacion.authenticate(Request(autenticado)), repeticiones
+        )
+    return resultados
+
+
+class ClienteHTTP:
+    """Cliente HTTP/1.1 con keep-alive (una conexión por hilo) contra un servidor en ejecución"""
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self.clase = HTTPSConnection if partes.scheme == 'https' else HTTPConnection
+        self.host = partes.netloc
+        self.prefijo = partes.path.rstrip('/')
+        self._local = threading.local()
+
+    def solicitar(self, metodo, ruta, datos=None, token=None):
+        cabeceras = {'Content-Type': 'application/json'}
+        if token:
+            cabeceras['Authorization'] = f'Bearer {token}'
+        cuerpo = json.dumps(datos) if datos is not None else None
+        for intento in range(2):
+            conexion = getattr(self._local, 'conexion', None)
+            if conexion is None:
+                conexion = self._local.conexion = self.clase(self.host, timeout=30)
+            try:
+                conexion.request(metodo, self.prefijo + ruta, body=cuerpo, headers=cabeceras)
+                respuesta = conexion.getresponse()
+                return respuesta.status, respuesta.read()
+            except (OSError, ConnectionError):
+                # El servidor cerró la conexión keep-alive: reintentar una vez con una nueva
+                conexion.close()
+                self._local.conexion = None
+                if intento:
+                    raise
+
+
+class ClienteEnProceso:
+    """Mismo contrato que ClienteHTTP, pasando por el handler WSGI del proceso"""
+
+    def __init__(self):
+        from django.core.handlers.wsgi import WSGIHandler
+
+        self.handler = WSGIHandler()
+        self.fabrica = RequestFactory()
+
+    def solicitar(self, metodo, ruta, datos=None, token=None):
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        request = getattr(self.fabrica, metodo.lower())(
+            ruta, data=json.dumps(datos) if datos is not None else None, content_type='application/json', **extra
+        )
+        respuesta = self.handler.get_response(request)
+        return respuesta.status_code, respuesta.content
+
+
+class Escenarios:
+    """
+    Escenarios de extremo a extremo. Cada uno es una función que hace un
+    request y devuelve el código de estado; se ejecutan con ``concurrencia``
+    hilos hasta completar ``solicitudes``.
+    """
+
+    NOMBRES = ('login', 'feed', 'detalle', 'registrar_vista', 'escritura_admin')
+    EXITO = {'escritura_admin': 201}
+
+    def __init__(self, cliente, semilla=42):
+        self.cliente = cliente
+        self.azar = random.Random(semilla)
+        generados = Usuario.objects.filter(email__endswith=f'@{DOMINIO}', is_active=True)
+        self.estudiantes = list(generados.filter(rol='estudiante').values_list('email', flat=True)[:200])
+        profesor = generados.filter(rol='profesor').values_list('email', flat=True).first()
+        if not self.estudiantes or profesor is None:
+            raise ValueError('Faltan datos: ejecute generar_datos antes de los escenarios')
+        self.token_estudiante = self.login(self.estudiantes[0])
+        self.token_profesor = self.login(profesor)
+        self.anuncios = list(Anuncio.objects.filter(visible=True).values_list('id', flat=True)[:200])
+
+    def login(self, email):
+        estado, cuerpo = self.cliente.solicitar('POST', '/api/auth/login/', {'email': email, 'password': CLAVE})
+        if estado != 200:
+            raise ValueError(f'No se pudo iniciar sesión como {email}: {estado} {cuerpo[:200]!r}')
+        return json.loads(cuerpo)['access']
+
+    def escenario_login(self):
+        email = self.azar.choice(self.estudiantes)
+        return self.cliente.solicitar('POST', '/api/auth/login/', {'email': email, 'password': CLAVE})[0]
+
+    def escenario_feed(self):
+        return self.cliente.solicitar('GET', '/api/anuncios/', token=self.token_estudiante)[0]
+
+    def escenario_detalle(self):
+        anuncio = self.azar.choice(self.anuncios)
+        return self.cliente.solicitar('GET', f'/api/anuncios/{anuncio}/', token=self.token_estudiante)[0]
+
+    def escenario_registrar_vista(self):
+        anuncio = self.azar.choice(self.anuncios)
+        return self.cliente.solicitar(
+            'POST', f'/api/anuncios/{anuncio}/registrar_vista/', {}, token=self.token_estudiante
+        )[0]
+
+    def escenario_escritura_admin(self):
+        # Los anuncios creados son del profesor generado: limpiar_datos los elimina
+        return self.cliente.solicitar('POST', '/api/anuncios/', {
+            'titulo': 'Anuncio de benchmark', 'contenido': 'Creado por el benchmark', 'tipo': 'general',
+        }, token=self.token_profesor)[0]
+
+    def ejecutar(self, nombre, solicitudes=500, concurrencia=8):
+        escenario = getattr(self, f'escenario_{nombre}')
+        exito = self.EXITO.get(nombre, 200)
+        latencias, errores = [], [0]
+        lock = threading.Lock()
+        restantes = [solicitudes]
+
+        def trabajar():
+            while True:
+                with lock:
+                    if restantes[0] <= 0:
+                        return
+                    restantes[0] -= 1
+                inicio = time.perf_counter()
+                try:
+                    estado = escenario()
+                except OSError:
+                    estado = None
+                latencia = (time.perf_counter() - inicio) * 1000
+                with lock:
+                    latencias.append(latencia)
+                    if estado != exito:
+                        errores[0] += 1
+
+        escenario()
+        hilos = [threading.Thread(target=trabajar) for _ in range(concurrencia)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+        return {'throughput': solicitudes / duracion, **_percentiles(latencias), 'errores': errores[0]}
+
+
+def entorno():
+    """Datos para saber contra qué se midió cada archivo de resultados"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'fecha': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'base_de_datos': connection.vendor,
+        'maquina': platform.node(),
+    }
+
+
+def resultados(metricas, parametros):
+    return {'version': VERSION_RESULTADOS, 'entorno': entorno(), 'parametros': parametros, 'metricas': metricas}
+
+
+def comparar(actual, base, umbral=0.15, umbral_p99=None):
+    """
+    Comparar dos archivos de resultados métrica por métrica. Una latencia
+    (p50, p95, p99) empeora si supera la base en más de ``umbral`` (o
+    ``umbral_p99`` para p99, más ruidoso); el throughput, si cae en más de
+    ``umbral``. Devuelve filas (métrica, campo, base, actual, cambio, regresión).
+    """
+    umbral_p99 = umbral if umbral_p99 is None else umbral_p99
+    filas = []
+    for nombre, valores in sorted(actual['metricas'].items()):
+        anteriores = base['metricas'].get(nombre)
+        if anteriores is None:
+            continue
+        for campo in ('throughput', 'p50', 'p95', 'p99'):
+            if campo not in valores or not anteriores.get(campo):
+                continue
+            cambio = valores[campo] / anteriores[campo] - 1
+            if campo == 'throughput':
+                regresion = cambio < -umbral
+            else:
+                regresion = cambio > (umbral_p99 if campo == 'p99' else umbral)
+            filas.append((nombre, campo, anteriores[campo], valores[campo], cambio, regresion))
+    return filas
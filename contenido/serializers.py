@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Carrera, Anuncio
+from .vistas import contador_vistas
 from usuarios.serializers import UsuarioSerializer
 
 
@@ -23,7 +24,12 @@ class AnuncioSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Anuncio"""
     
     creado_por_info = UsuarioSerializer(source='creado_por', read_only=True)
-    esta_activo = serializers.SerializerMethodField()
+    esta_activo = serializers.BooleanField(source='visible', read_only=True)
+    veces_visto = serializers.SerializerMethodField()
+    # Ruta compacta de los listados (bienestar_api/compacto.py): lo mismo que get_veces_visto
+    metodos_compactos = {
+        'veces_visto': (('id', 'veces_visto'), lambda pk, veces_visto: veces_visto + contador_vistas.pendientes(pk)),
+    }
     
     class Meta:
         model = Anuncio
@@ -35,8 +41,8 @@ class AnuncioSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'creado_en', 'actualizado_en', 'creado_por', 'veces_visto']
     
-    def get_esta_activo(self, obj):
-        return obj.esta_activo()
+    def get_veces_visto(self, obj):
+        return obj.total_vistas()
 
 
 class AnuncioCreateSerializer(serializers.ModelSerializer):
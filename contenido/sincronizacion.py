@@ -0,0 +1,118 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta, timezone as tz
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import Anuncio, Carrera, Eliminacion
+
+EPOCA = datetime(1970, 1, 1, tzinfo=tz.utc)
+MICROSEGUNDO = timedelta(microseconds=1)
+
+
+def codificar_token(datos):
+    """Token opaco: JSON en base64 con los instantes en microsegundos desde la época"""
+    valores = {clave: (valor - EPOCA) // MICROSEGUNDO if isinstance(valor, datetime) else valor
+               for clave, valor in datos.items()}
+    return urlsafe_b64encode(json.dumps(valores, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decodificar_token(token):
+    try:
+        datos = json.loads(urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        resultado = {'t': EPOCA + int(datos['t']) * MICROSEGUNDO}
+        if 'h' in datos:
+            resultado.update(i=int(datos['i']), h=EPOCA + int(datos['h']) * MICROSEGUNDO, c=bool(datos.get('c')))
+        return resultado
+    except (TypeError, ValueError, KeyError, UnicodeError, OverflowError):
+        raise ValidationError({'token': 'Token de sincronización inválido'})
+
+
+class SincronizacionMixin:
+    """
+    ``GET <recurso>/sync/?token=``: lo que cambió desde la sincronización
+    anterior, para no volver a descargar el catálogo completo.
+
+    Recorre las filas por (actualizado_en, id), que tiene índice. Las que el
+    usuario puede ver (``get_queryset``) van en ``cambios`` y las demás
+    (carreras desactivadas, anuncios retirados) en ``eliminados``, junto
+    con las filas borradas (Eliminacion). Cada respuesta trae el token de
+    la siguiente; con ``mas`` se pide de inmediato la página que sigue.
+
+    El token guarda hasta cuándo se sincronizó según el reloj del servidor,
+    y la siguiente vuelve a revisar desde ``SINCRONIZACION_MARGEN`` segundos
+    antes. Así se recuperan las filas de transacciones que confirmaron
+    tarde o de servidores con el reloj atrasado. Un cliente puede recibir
+    dos veces la misma fila, y aplicarlas de nuevo no cambia nada. Sin
+    token, o si es anterior a ``SINCRONIZACION_RETENCION_DIAS`` (las
+    eliminaciones ya se purgaron), se envía el catálogo completo con
+    ``reiniciar``: el cliente descarta su copia.
+    """
+
+    @action(detail=False, methods=['get'], url_path='sync')
+    def sincronizar(self, request):
+        ahora = timezone.now()
+        margen = timedelta(seconds=getattr(settings, 'SINCRONIZACION_MARGEN', 120))
+        retencion = timedelta(days=getattr(settings, 'SINCRONIZACION_RETENCION_DIAS', 30))
+        limite = getattr(settings, 'SINCRONIZACION_LIMITE', 500)
+        codificado = request.query_params.get('token')
+        token = decodificar_token(codificado) if codificado else None
+
+        visibles = self.get_queryset()
+        modelo = visibles.model
+        continuacion = token is not None and 'h' in token
+        if continuacion:
+            completo, hasta = token['c'], token['h']
+        else:
+            completo, hasta = token is None or token['t'] < ahora - retencion, ahora
+        filas = visibles if completo else modelo._default_manager.all()
+        if continuacion:
+            filas = filas.filter(Q(actualizado_en__gt=token['t']) | Q(actualizado_en=token['t'], id__gt=token['i']))
+        elif not completo:
+            filas = filas.filter(actualizado_en__gte=token['t'] - margen)
+        pagina = list(filas.order_by('actualizado_en', 'id').values_list('id', 'actualizado_en')[:limite + 1])
+        mas = len(pagina) > limite
+        pagina = pagina[:limite]
+
+        ids = [pk for pk, _ in pagina]
+        cambios = self.serializar_lista(visibles.filter(id__in=ids).order_by('actualizado_en', 'id')) if ids else []
+        vistos = {fila['id'] for fila in cambios}
+        eliminados = {pk for pk in ids if pk not in vistos}
+        if not completo and not continuacion:
+            eliminados.update(Eliminacion.objects.filter(
+                modelo=modelo.__name__, eliminado_en__gte=token['t'] - margen
+            ).values_list('objeto_id', flat=True))
+
+        if mas:
+            siguiente = {'t': pagina[-1][1], 'i': pagina[-1][0], 'h': hasta, 'c': int(completo)}
+        else:
+            siguiente = {'t': hasta}
+        return Response({
+            'cambios': cambios,
+            'eliminados': sorted(eliminados),
+            'reiniciar': completo and not continuacion,
+            'mas': mas,
+            'token': codificar_token(siguiente),
+        })
+
+
+@receiver(post_delete, sender=Carrera)
+@receiver(post_delete, sender=Anuncio)
+def _registrar_eliminacion(sender, instance, **kwargs):
+    Eliminacion.objects.create(modelo=sender.__name__, objeto_id=instance.pk)
+
+
+def purgar_eliminaciones(ahora=None):
+    """Borrar las eliminaciones que ya no puede pedir ningún token vigente"""
+    ahora = ahora or timezone.now()
+    retencion = timedelta(days=getattr(settings, 'SINCRONIZACION_RETENCION_DIAS', 30))
+    margen = timedelta(seconds=getattr(settings, 'SINCRONIZACION_MARGEN', 120))
+    eliminadas, _ = Eliminacion.objects.filter(eliminado_en__lt=ahora - retencion - margen).delete()
+    return eliminadas
@@ -0,0 +1,386 @@
+import contextvars
+import gzip
+import json
+import os
+import tempfile
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bienestar_api.replicas import EstadoSolicitud, _solicitud
+from usuarios.serializers import CustomTokenObtainPairSerializer
+
+from . import particiones
+from .bootstrap import ArmadorBootstrap, armador
+from .models import Anuncio, Carrera, Eliminacion, LogAuditoria
+from .presupuestos import PRESUPUESTOS, crear_datos, crear_usuarios, solicitar
+from .sincronizacion import codificar_token
+from .vistas import contador_vistas
+
+
+# Sin el hilo del programador de publicación, que escribiría durante la prueba
+@override_settings(REPLICAS_LECTURA=[], PUBLICACION_AUTOMATICA=False)
+class PresupuestoConsultasTests(TestCase):
+    """
+    Consultas SQL de cada endpoint de PRESUPUESTOS, con una fila por modelo
+    y con varias: si la cantidad crece con las filas hay una consulta N+1.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios = crear_usuarios()
+        cls.ids = crear_datos(cls.usuarios['profesor'], 1, 0)
+
+    def verificar_presupuestos(self):
+        for nombre, url, rol, consultas in PRESUPUESTOS:
+            with self.subTest(nombre):
+                with self.assertNumQueries(consultas):
+                    respuesta = solicitar(self.usuarios[rol], url.format(**self.ids))
+                self.assertEqual(respuesta.status_code, 200)
+
+    def test_con_una_fila(self):
+        self.verificar_presupuestos()
+
+    def test_con_varias_filas(self):
+        crear_datos(self.usuarios['profesor'], 20, 1)
+        self.verificar_presupuestos()
+
+
+@override_settings(REPLICAS_LECTURA=[], PUBLICACION_AUTOMATICA=False)
+class RespuestaCondicionalTests(TestCase):
+    """ETag de listados y detalle: 304 mientras no cambie el estado persistido"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios = crear_usuarios()
+        cls.ids = crear_datos(cls.usuarios['profesor'], 3, 0)
+
+    def setUp(self):
+        cache.clear()
+        # Sin el hilo de flush periódico: la prueba decide cuándo se persisten las vistas
+        hilo = mock.patch.object(contador_vistas, '_asegurar_hilo')
+        hilo.start()
+        self.addCleanup(hilo.stop)
+        self.addCleanup(contador_vistas.flush)
+
+    def obtener(self, url, rol='estudiante', etag=None):
+        cliente = APIClient(SERVER_NAME='localhost')
+        cliente.force_authenticate(self.usuarios[rol])
+        return cliente.get(url, **({'HTTP_IF_NONE_MATCH': etag} if etag else {}))
+
+    def test_detalle_304_con_el_mismo_etag(self):
+        url = f"/api/anuncios/{self.ids['anuncio']}/"
+        respuesta = self.obtener(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.obtener(url, etag=respuesta['ETag']).status_code, 304)
+
+    def test_vistas_pendientes_no_cambian_el_etag_hasta_el_flush(self):
+        for url in (f"/api/anuncios/{self.ids['anuncio']}/", '/api/anuncios/'):
+            with self.subTest(url):
+                etag = self.obtener(url)['ETag']
+                contador_vistas.registrar(self.ids['anuncio'])
+                self.assertEqual(self.obtener(url, etag=etag).status_code, 304)
+                contador_vistas.flush()
+                respuesta = self.obtener(url, etag=etag)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_lista_cambia_al_editar_o_borrar(self):
+        etag = self.obtener('/api/anuncios/', 'profesor')['ETag']
+        anuncio = Anuncio.objects.get(pk=self.ids['anuncio'])
+        anuncio.titulo = 'Otro título'
+        anuncio.save()
+        editada = self.obtener('/api/anuncios/', 'profesor', etag)
+        self.assertEqual(editada.status_code, 200)
+        anuncio.delete()
+        borrada = self.obtener('/api/anuncios/', 'profesor', editada['ETag'])
+        self.assertEqual(borrada.status_code, 200)
+        self.assertEqual(self.obtener('/api/anuncios/', 'profesor', borrada['ETag']).status_code, 304)
+
+    def test_etag_de_pagina_solo_depende_de_sus_filas(self):
+        crear_datos(self.usuarios['profesor'], 3, 3)
+        url = '/api/anuncios/?page_size=2'
+        etag = self.obtener(url, 'profesor')['ETag']
+        # El 304 solo lee las claves de la página (con LIMIT), sin agregar sobre toda la tabla
+        with self.assertNumQueries(1):
+            self.assertEqual(self.obtener(url, 'profesor', etag).status_code, 304)
+        ids = list(Anuncio.objects.order_by('-creado_en', '-id').values_list('id', flat=True))
+        # La fila más antigua no está en la primera página ni es la fila de más que decide "next"
+        Anuncio.objects.get(pk=ids[-1]).save()
+        self.assertEqual(self.obtener(url, 'profesor', etag).status_code, 304)
+        Anuncio.objects.get(pk=ids[0]).save()
+        self.assertEqual(self.obtener(url, 'profesor', etag).status_code, 200)
+
+
+@override_settings(REPLICAS_LECTURA=[], PUBLICACION_AUTOMATICA=False)
+class FeedCacheTests(TestCase):
+    """El feed cacheado no se queda con conteos de vistas anteriores al flush"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios = crear_usuarios()
+        cls.ids = crear_datos(cls.usuarios['profesor'], 3, 0)
+
+    def setUp(self):
+        cache.clear()
+        hilo = mock.patch.object(contador_vistas, '_asegurar_hilo')
+        hilo.start()
+        self.addCleanup(hilo.stop)
+        self.addCleanup(contador_vistas.flush)
+
+    def obtener(self):
+        cliente = APIClient(SERVER_NAME='localhost')
+        cliente.force_authenticate(self.usuarios['estudiante'])
+        return cliente.get('/api/anuncios/')
+
+    def test_cuerpo_cacheado_igual_al_sin_cache_tras_registrar_vistas(self):
+        self.assertEqual(self.obtener()['X-Cache'], 'MISS')
+        self.assertEqual(self.obtener()['X-Cache'], 'HIT')
+        contador_vistas.registrar(self.ids['anuncio'], 3)
+        contador_vistas.flush()
+
+        self.obtener()
+        cacheada = self.obtener()
+        self.assertEqual(cacheada['X-Cache'], 'HIT')
+        cache.clear()
+        sin_cache = self.obtener()
+        self.assertEqual(sin_cache['X-Cache'], 'MISS')
+        self.assertEqual(cacheada.content, sin_cache.content)
+        vistas = {fila['id']: fila['veces_visto'] for fila in sin_cache.json()['results']}
+        self.assertEqual(vistas[self.ids['anuncio']], 3)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'El particionado de la auditoría requiere PostgreSQL')
+class ParticionesAuditoriaTests(TestCase):
+    """Retención sobre la tabla particionada, incluida la partición por defecto"""
+
+    def crear_log(self, fecha):
+        log = LogAuditoria.objects.create(modelo='Anuncio', objeto_id='1', accion='UPDATE', timestamp=fecha)
+        # Las FK de Django son diferidas: sin esto no se puede alterar la tabla en la misma transacción
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        return log
+
+    def test_archiva_particiones_y_filas_vencidas_de_la_particion_por_defecto(self):
+        ahora = timezone.now()
+        self.crear_log(ahora - timedelta(days=730))
+        self.assertTrue(particiones.convertir_a_particionada(1))
+        # Mes anterior a la primera partición: queda en la partición por defecto
+        en_defecto = self.crear_log(ahora - timedelta(days=1100))
+        vigente = self.crear_log(ahora)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM {connection.ops.quote_name(particiones.particion_por_defecto())}'
+            )
+            self.assertEqual([fila[0] for fila in cursor.fetchall()], [en_defecto.id])
+
+        with tempfile.TemporaryDirectory() as directorio:
+            archivadas = particiones.archivar_particiones(12, directorio)
+            nombre, ruta, cantidad = archivadas[-1]
+            self.assertEqual(nombre, particiones.particion_por_defecto())
+            self.assertEqual(cantidad, 1)
+            with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+                self.assertEqual([json.loads(linea)['id'] for linea in archivo], [en_defecto.id])
+            self.assertEqual(sum(cantidad for _, _, cantidad in archivadas), 2)
+            self.assertTrue(all(os.path.exists(ruta) for _, ruta, _ in archivadas))
+
+        self.assertEqual(list(LogAuditoria.objects.values_list('id', flat=True)), [vigente.id])
+
+
+class BootstrapEstadoReplicasTests(SimpleTestCase):
+    """Las secciones de /api/bootstrap/ no comparten el estado de réplicas del request"""
+
+    def test_cada_seccion_con_su_estado(self):
+        padre = EstadoSolicitud()
+        token = _solicitud.set(padre)
+        self.addCleanup(_solicitud.reset, token)
+        estados = {}
+
+        def vista(replica, escribe):
+            def atender(sub):
+                estado = _solicitud.get()
+                estados[replica] = estado
+                estado.replica = replica
+                estado.escribio = escribe
+                return HttpResponse(b'{}')
+            return atender
+
+        armador = ArmadorBootstrap(hilos=2)
+        self.addCleanup(armador.pool.shutdown)
+        futuros = [
+            armador.pool.submit(contextvars.copy_context().run, armador.atender, replica, vista(replica, escribe), None)
+            for replica, escribe in (('replica1', False), ('replica2', True))
+        ]
+        self.assertEqual([futuro.result() for futuro in futuros], [(200, b'{}'), (200, b'{}')])
+        self.assertEqual(armador.atender('replica3', vista('replica3', False), None, en_pool=False), (200, b'{}'))
+
+        self.assertEqual(len({id(estado) for estado in estados.values()} | {id(padre)}), 4)
+        self.assertEqual({replica: estado.replica for replica, estado in estados.items()},
+                         {'replica1': 'replica1', 'replica2': 'replica2', 'replica3': 'replica3'})
+        self.assertIsNone(padre.replica)
+        self.assertTrue(padre.escribio)
+
+
+@override_settings(REPLICAS_LECTURA=[], PUBLICACION_AUTOMATICA=False)
+class PaginacionKeysetTests(TestCase):
+    """Los cursores recorren cada fila una sola vez, aunque lleguen filas nuevas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios = crear_usuarios()
+        crear_datos(cls.usuarios['profesor'], 7, 0)
+
+    def setUp(self):
+        cache.clear()
+        self.cliente = APIClient(SERVER_NAME='localhost')
+        self.cliente.force_authenticate(self.usuarios['profesor'])
+
+    def recorrer(self, url, enlace='next'):
+        paginas = []
+        while url:
+            respuesta = self.cliente.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            paginas.append([fila['id'] for fila in respuesta.data['results']])
+            url = respuesta.data[enlace]
+        return paginas
+
+    def test_siguiente_y_anterior(self):
+        esperado = list(Anuncio.objects.order_by('-creado_en', '-id').values_list('id', flat=True))
+        paginas = self.recorrer('/api/anuncios/?page_size=3')
+        self.assertEqual([len(pagina) for pagina in paginas], [3, 3, 1])
+        self.assertEqual(sum(paginas, []), esperado)
+
+        ultima = self.cliente.get('/api/anuncios/?page_size=3').data['next']
+        ultima = self.cliente.get(ultima).data['next']
+        self.assertEqual(self.recorrer(ultima, 'previous'), paginas[::-1])
+
+    def test_filas_nuevas_no_desplazan_las_paginas_siguientes(self):
+        primera = self.cliente.get('/api/anuncios/?page_size=3').data
+        Anuncio.objects.create(titulo='Nuevo', contenido='-', creado_por=self.usuarios['profesor'])
+        resto = sum(self.recorrer(primera['next']), [])
+        vistos = [fila['id'] for fila in primera['results']] + resto
+        self.assertEqual(len(vistos), len(set(vistos)))
+        self.assertEqual(len(vistos), 7)
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.cliente.get('/api/anuncios/?cursor=no-es-un-cursor').status_code, 404)
+
+
+@override_settings(
+    REPLICAS_LECTURA=[], PUBLICACION_AUTOMATICA=False, SINCRONIZACION_MARGEN=0, SINCRONIZACION_LIMITE=2,
+)
+class SincronizacionTests(TestCase):
+    """Tokens de sincronización: el delta aplicado sobre la copia coincide con un catálogo completo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios = crear_usuarios()
+        crear_datos(cls.usuarios['profesor'], 5, 0)
+
+    def setUp(self):
+        cache.clear()
+        self.cliente = APIClient(SERVER_NAME='localhost')
+        self.cliente.force_authenticate(self.usuarios['estudiante'])
+
+    def sincronizar(self, url, copia=None, token=None):
+        """Aplica las páginas de la sincronización sobre ``copia``; devuelve (copia, token, reiniciar)"""
+        copia = {} if copia is None else dict(copia)
+        reiniciar = None
+        while True:
+            respuesta = self.cliente.get(url, {'token': token} if token else {})
+            self.assertEqual(respuesta.status_code, 200)
+            datos = respuesta.data
+            if reiniciar is None:
+                reiniciar = datos['reiniciar']
+                if reiniciar:
+                    copia = {}
+            copia.update({fila['id']: fila for fila in datos['cambios']})
+            for pk in datos['eliminados']:
+                copia.pop(pk, None)
+            token = datos['token']
+            if not datos['mas']:
+                return copia, token, reiniciar
+
+    def test_delta_con_cambios_y_eliminaciones(self):
+        for url, modelo in (('/api/anuncios/sync/', Anuncio), ('/api/carreras/sync/', Carrera)):
+            with self.subTest(url):
+                copia, token, reiniciar = self.sincronizar(url)
+                self.assertTrue(reiniciar)
+                self.assertEqual(len(copia), 5)
+
+                editada, retirada, borrada = modelo.objects.order_by('id')[:3]
+                editada.descripcion = editada.contenido = 'Editado'
+                editada.save()
+                retirada.activo = False
+                retirada.save()
+                borrada_id = borrada.pk
+                borrada.delete()
+                self.assertTrue(Eliminacion.objects.filter(modelo=modelo.__name__, objeto_id=borrada_id).exists())
+
+                delta, _, reiniciar = self.sincronizar(url, copia, token)
+                self.assertFalse(reiniciar)
+                completo, _, _ = self.sincronizar(url)
+                self.assertEqual(delta, completo)
+                self.assertNotIn(retirada.pk, delta)
+                self.assertNotIn(borrada_id, delta)
+
+    def test_token_anterior_a_la_retencion_reinicia(self):
+        token = codificar_token({'t': timezone.now() - timedelta(days=365)})
+        copia, _, reiniciar = self.sincronizar('/api/anuncios/sync/', {0: {}}, token)
+        self.assertTrue(reiniciar)
+        self.assertEqual(len(copia), 5)
+
+
+class PoolEnLinea:
+    """Atiende las secciones en el hilo de la prueba, dentro de su transacción"""
+
+    def submit(self, funcion, *args):
+        futuro = Future()
+        futuro.set_result(funcion(*args))
+        return futuro
+
+
+@override_settings(REPLICAS_LECTURA=[], PUBLICACION_AUTOMATICA=False)
+class BootstrapTests(TestCase):
+    """Cada sección de /api/bootstrap/ es la respuesta de su endpoint"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios = crear_usuarios()
+        crear_datos(cls.usuarios['profesor'], 3, 0)
+
+    def setUp(self):
+        cache.clear()
+        for parche in (
+            mock.patch.object(armador, '_pool', PoolEnLinea()),
+            mock.patch('contenido.bootstrap.close_old_connections'),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def test_secciones_iguales_a_sus_endpoints(self):
+        for rol, usuario in self.usuarios.items():
+            with self.subTest(rol):
+                cliente = APIClient(SERVER_NAME='localhost')
+                access = CustomTokenObtainPairSerializer.get_token(usuario).access_token
+                cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+                respuesta = cliente.get('/api/bootstrap/')
+                self.assertEqual(respuesta.status_code, 200)
+                secciones = respuesta.json()
+                self.assertNotIn('errores', secciones)
+                for seccion, url in (
+                    ('usuario', '/api/auth/usuarios/perfil/'),
+                    ('anuncios', '/api/anuncios/'),
+                    ('carreras', '/api/carreras/?total=true'),
+                ):
+                    self.assertEqual(secciones[seccion], cliente.get(url).json(), seccion)
+
+    def test_sin_credenciales(self):
+        self.assertEqual(APIClient(SERVER_NAME='localhost').get('/api/bootstrap/').status_code, 401)
@@ -0,0 +1,295 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .metricas import registro
+from .models import Anuncio
+from .publicacion import visibilidad_cambiada
+
+logger = logging.getLogger('contenido')
+
+CANAL_REDIS = 'bienestar:anuncios:eventos'
+
+# Marca que se encola cuando un cliente no consume a tiempo: se le pide resincronizar
+DESBORDE = object()
+# Marca que se encola en las conexiones inactivas para enviar un latido
+LATIDO = object()
+
+eventos_publicados = registro.contador(
+    'bienestar_tiempo_real_eventos_total', 'Eventos de anuncios publicados en el canal en tiempo real', ('evento',)
+)
+desbordes = registro.contador(
+    'bienestar_tiempo_real_desbordes_total', 'Conexiones cerradas por no consumir los eventos a tiempo'
+)
+
+
+class Suscripcion:
+    """Una conexión abierta: cola acotada de eventos pendientes de enviar"""
+
+    __slots__ = ('cola', 'es_profesor', 'loop')
+
+    def __init__(self, es_profesor, capacidad, loop):
+        self.cola = asyncio.Queue(maxsize=capacidad)
+        self.es_profesor = es_profesor
+        self.loop = loop
+
+    def recibe(self, evento):
+        return self.es_profesor or evento['publico']
+
+
+class BrokerLocal:
+    """
+    Reparte los eventos a las conexiones del proceso.
+
+    ``publicar`` puede llamarse desde cualquier hilo: el evento se pasa una
+    sola vez a cada event loop con call_soon_threadsafe y ahí se encola en
+    cada suscripción. Las colas son acotadas; si un cliente no consume, su
+    cola se reemplaza por una marca de desborde y la conexión se cierra para
+    que el cliente se reconecte y resincronice. Los últimos eventos se
+    guardan para reenviarlos a quien se reconecta con Last-Event-ID. Un solo
+    temporizador por event loop marca los latidos de las conexiones
+    inactivas, en vez de uno por conexión.
+    """
+
+    def __init__(self, capacidad_cola=None, historial=None, latido=None):
+        self.capacidad_cola = capacidad_cola or getattr(settings, 'TIEMPO_REAL_COLA', 16)
+        self.latido = latido or getattr(settings, 'TIEMPO_REAL_LATIDO', 20)
+        self._historial = deque(maxlen=historial or getattr(settings, 'TIEMPO_REAL_HISTORIAL', 256))
+        self._por_loop = {}
+        self._latidos = {}
+        self._lock = threading.Lock()
+        self._ultimo_id = 0
+        # Los eventos con ID hasta este valor ya no se pueden reenviar
+        self._olvidados_hasta = self.nuevo_id()
+
+    def suscribir(self, es_profesor):
+        """Registrar una conexión; debe llamarse desde el event loop que la atiende"""
+        loop = asyncio.get_running_loop()
+        suscripcion = Suscripcion(es_profesor, self.capacidad_cola, loop)
+        with self._lock:
+            self._por_loop.setdefault(loop, set()).add(suscripcion)
+            if loop not in self._latidos:
+                self._latidos[loop] = loop.call_later(self.latido, self._latir, loop)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            suscripciones = self._por_loop.get(suscripcion.loop)
+            if suscripciones is not None:
+                suscripciones.discard(suscripcion)
+                if not suscripciones:
+                    del self._por_loop[suscripcion.loop]
+
+    def conexiones(self):
+        with self._lock:
+            return sum(len(suscripciones) for suscripciones in self._por_loop.values())
+
+    def nuevo_id(self):
+        # Microsegundos desde la época: crecientes también entre procesos
+        with self._lock:
+            self._ultimo_id = max(time.time_ns() // 1000, self._ultimo_id + 1)
+            return self._ultimo_id
+
+    def publicar(self, evento):
+        evento.setdefault('id', self.nuevo_id())
+        self.entregar(evento)
+
+    def entregar(self, evento):
+        """Repartir un evento a las conexiones de este proceso"""
+        # Se formatea una sola vez para todas las conexiones
+        evento['sse'] = formatear(evento)
+        with self._lock:
+            if len(self._historial) == self._historial.maxlen:
+                self._olvidados_hasta = self._historial[0]['id']
+            self._historial.append(evento)
+            loops = list(self._por_loop)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._repartir, loop, evento)
+            except RuntimeError:
+                # El loop ya se cerró
+                with self._lock:
+                    self._por_loop.pop(loop, None)
+
+    def _repartir(self, loop, evento):
+        with self._lock:
+            suscripciones = list(self._por_loop.get(loop, ()))
+        for suscripcion in suscripciones:
+            if not suscripcion.recibe(evento):
+                continue
+            try:
+                suscripcion.cola.put_nowait(evento)
+            except asyncio.QueueFull:
+                desbordes.inc()
+                while not suscripcion.cola.empty():
+                    suscripcion.cola.get_nowait()
+                suscripcion.cola.put_nowait(DESBORDE)
+
+    def _latir(self, loop):
+        with self._lock:
+            suscripciones = list(self._por_loop.get(loop, ()))
+            if not suscripciones:
+                del self._latidos[loop]
+                return
+            self._latidos[loop] = loop.call_later(self.latido, self._latir, loop)
+        for suscripcion in suscripciones:
+            if suscripcion.cola.empty():
+                suscripcion.cola.put_nowait(LATIDO)
+
+    def eventos_desde(self, ultimo_id, es_profesor):
+        """Eventos posteriores a ``ultimo_id``; None si ya no están en el historial"""
+        with self._lock:
+            if ultimo_id < self._olvidados_hasta:
+                return None
+            historial = list(self._historial)
+        return [e for e in historial if e['id'] > ultimo_id and (es_profesor or e['publico'])]
+
+
+class BrokerRedis(BrokerLocal):
+    """
+    Broker para varios procesos: los eventos se publican en un canal de
+    Redis y un hilo por proceso los recibe y los reparte localmente.
+    """
+
+    def __init__(self, url, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self._cliente = None
+        self._escucha = None
+
+    @property
+    def cliente(self):
+        if self._cliente is None:
+            import redis
+            self._cliente = redis.Redis.from_url(self.url)
+        return self._cliente
+
+    def suscribir(self, es_profesor):
+        self._asegurar_escucha()
+        return super().suscribir(es_profesor)
+
+    def publicar(self, evento):
+        evento.setdefault('id', self.nuevo_id())
+        self.cliente.publish(CANAL_REDIS, json.dumps(evento))
+
+    def _asegurar_escucha(self):
+        if self._escucha is not None and self._escucha.is_alive():
+            return
+        with self._lock:
+            if self._escucha is not None and self._escucha.is_alive():
+                return
+            self._escucha = threading.Thread(target=self._escuchar, name='tiempo-real-redis', daemon=True)
+            self._escucha.start()
+
+    def _escuchar(self):
+        while True:
+            try:
+                pubsub = self.cliente.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CANAL_REDIS)
+                for mensaje in pubsub.listen():
+                    self.entregar(json.loads(mensaje['data']))
+            except Exception:
+                logger.exception('Se perdió la suscripción al canal de eventos en Redis, reintentando')
+                time.sleep(1)
+
+
+def crear_broker():
+    tipo = getattr(settings, 'TIEMPO_REAL_BROKER', 'local')
+    if tipo == 'redis':
+        return BrokerRedis(settings.REDIS_URL)
+    return BrokerLocal()
+
+
+broker = crear_broker()
+registro.medidor(
+    'bienestar_tiempo_real_conexiones', 'Conexiones abiertas al canal de eventos de anuncios', broker.conexiones
+)
+
+
+def publicar_evento(evento, anuncio, publico):
+    """Publicar el evento una vez confirmada la transacción"""
+    datos = {'evento': evento, 'anuncio': anuncio, 'publico': publico}
+
+    def enviar():
+        try:
+            broker.publicar(datos)
+            eventos_publicados.inc(evento)
+        except Exception:
+            logger.exception('No se pudo publicar el evento %s del anuncio %s', evento, anuncio.get('id'))
+
+    transaction.on_commit(enviar)
+
+
+def resumen(anuncio):
+    return {'id': anuncio.pk, 'titulo': anuncio.titulo, 'tipo': anuncio.tipo, 'visible': anuncio.visible}
+
+
+def formatear(evento):
+    """Evento en el formato de Server-Sent Events"""
+    datos = json.dumps({'evento': evento['evento'], 'anuncio': evento['anuncio']}, ensure_ascii=False)
+    return f'id: {evento["id"]}\nevent: {evento["evento"]}\ndata: {datos}\n\n'
+
+
+async def flujo_eventos(es_profesor, ultimo_id=0):
+    """
+    Cuerpo de la respuesta SSE de una conexión: reenvía lo perdido desde
+    ``ultimo_id`` y luego los eventos nuevos, con un comentario de latido
+    en los periodos sin eventos para que los proxies no corten la conexión.
+    """
+    suscripcion = broker.suscribir(es_profesor)
+    try:
+        yield 'retry: 3000\n\n'
+        if ultimo_id:
+            perdidos = broker.eventos_desde(ultimo_id, es_profesor)
+            if perdidos is None:
+                yield 'event: resync\ndata: {}\n\n'
+            else:
+                for evento in perdidos:
+                    yield evento['sse']
+        while True:
+            evento = await suscripcion.cola.get()
+            if evento is LATIDO:
+                yield ': latido\n\n'
+                continue
+            if evento is DESBORDE:
+                # El cliente se quedó atrás: que se reconecte y vuelva a pedir el feed
+                yield 'event: resync\ndata: {}\n\n'
+                return
+            yield evento['sse']
+    finally:
+        broker.cancelar(suscripcion)
+
+
+@receiver(post_save, sender=Anuncio)
+def _anuncio_guardado(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'veces_visto'}:
+        return
+    # Los anuncios no visibles (programados, expirados, inactivos) solo los ven los profesores
+    publicar_evento('anuncio.creado' if created else 'anuncio.actualizado', resumen(instance), instance.visible)
+
+
+@receiver(post_delete, sender=Anuncio)
+def _anuncio_eliminado(sender, instance, **kwargs):
+    publicar_evento('anuncio.eliminado', {'id': instance.pk}, instance.visible)
+
+
+@receiver(visibilidad_cambiada, sender=Anuncio)
+def _visibilidad_cambiada(sender, publicados, retirados, programado, **kwargs):
+    if programado:
+        for anuncio_id in publicados:
+            publicar_evento('anuncio.publicado', {'id': anuncio_id}, True)
+        for anuncio_id in retirados:
+            publicar_evento('anuncio.expirado', {'id': anuncio_id}, True)
+    else:
+        # Al guardar, la publicación ya viaja como creado/actualizado; el retiro
+        # se avisa a todos para que lo quiten de su feed
+        for anuncio_id in retirados:
+            publicar_evento('anuncio.retirado', {'id': anuncio_id}, True)
@@ -1,12 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CarreraViewSet, AnuncioViewSet
+from .views import (
+    CarreraViewSet, AnuncioViewSet, ExportacionViewSet, BootstrapView, BootstrapLoginView, eventos_anuncios,
+)
 
 router = DefaultRouter()
 router.register(r'carreras', CarreraViewSet, basename='carrera')
 router.register(r'anuncios', AnuncioViewSet, basename='anuncio')
+router.register(r'exportar', ExportacionViewSet, basename='exportar')
 
 urlpatterns = [
+    # Antes del router, para que "eventos" no se interprete como un ID de anuncio
+    path('anuncios/eventos/', eventos_anuncios, name='anuncios-eventos'),
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
+    path('bootstrap/login/', BootstrapLoginView.as_view(), name='bootstrap-login'),
     path('', include(router.urls)),
 ]
 
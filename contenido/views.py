@@ -1,22 +1,54 @@
+import hmac
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.utils import timezone
-from .models import Carrera, Anuncio, LogAuditoria
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.views import TokenViewBase
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from .models import Carrera, Anuncio
 from .serializers import CarreraSerializer, AnuncioSerializer, AnuncioCreateSerializer
-from .permissions import EsProfesorOrReadOnly
+from .permissions import EsProfesor, EsProfesorOrReadOnly
+from .auditoria import registrar_auditoria
+from .analitica import estadisticas_anuncio, estadisticas_generales, registrar_evento_vista
+from .bootstrap import armador
+from .cache import arespuesta_feed, respuesta_feed
+from .publicacion import programador
+from .condicional import ConditionalGetMixin
+from .busqueda import BusquedaCarreraFilter
+from .sincronizacion import SincronizacionMixin
+from .recomendaciones import recomendar_carreras
+from .metricas import registro
+from .tiempo_real import flujo_eventos
+from usuarios.authentication import JWTAutenticacionRapida
+from usuarios.serializers import CustomTokenObtainPairSerializer
+from . import exportacion
+from bienestar_api.asincrono import LecturaAsincronaMixin
+from bienestar_api.compacto import ListaCompactaMixin
+from bienestar_api.pagination import KeysetPagination
+from bienestar_api.replicas import LecturaReplicaMixin
 
 
-class CarreraViewSet(viewsets.ModelViewSet):
+class CarreraViewSet(
+    LecturaReplicaMixin, ConditionalGetMixin, SincronizacionMixin, ListaCompactaMixin, LecturaAsincronaMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet para gestión de carreras"""
     
     queryset = Carrera.objects.filter(activo=True)
     serializer_class = CarreraSerializer
     permission_classes = [EsProfesorOrReadOnly]
+    filter_backends = [BusquedaCarreraFilter]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Filtrar solo carreras activas para estudiantes/apoderados"""
-        queryset = Carrera.objects.all()
+        queryset = Carrera.objects.select_related('creado_por')
         if not self.request.user.es_profesor():
             queryset = queryset.filter(activo=True)
         return queryset
@@ -28,7 +60,7 @@ class CarreraViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         """Registrar actualización en logs"""
         instance = serializer.save()
-        LogAuditoria.objects.create(
+        registrar_auditoria(
             usuario=self.request.user,
             modelo='Carrera',
             objeto_id=str(instance.id),
@@ -40,20 +72,55 @@ class CarreraViewSet(viewsets.ModelViewSet):
         """Soft delete - marcar como inactivo"""
         instance.activo = False
         instance.save()
-        LogAuditoria.objects.create(
+        registrar_auditoria(
             usuario=self.request.user,
             modelo='Carrera',
             objeto_id=str(instance.id),
             accion='DELETE',
             detalles={'nombre': instance.nombre}
         )
+    
+    @action(detail=False, methods=['get'])
+    def recomendaciones(self, request):
+        """Carreras más afines a los intereses y habilidades del estudiante"""
+        intereses = request.query_params.get('intereses', '')
+        habilidades = request.query_params.get('habilidades', '')
+        if not intereses.strip() and not habilidades.strip():
+            return Response(
+                {'detail': 'Debe indicar intereses o habilidades'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            k = max(1, min(int(request.query_params.get('k', 10)), 50))
+        except ValueError:
+            k = 10
+        
+        resultados = recomendar_carreras(intereses, habilidades, k)
+        carreras = Carrera.objects.select_related('creado_por').filter(activo=True).in_bulk(
+            [carrera_id for carrera_id, _ in resultados]
+        )
+        data = []
+        for carrera_id, puntaje in resultados:
+            if carrera_id in carreras:
+                item = self.get_serializer(carreras[carrera_id]).data
+                item['puntaje'] = round(puntaje, 4)
+                data.append(item)
+        return Response(data)
 
 
-class AnuncioViewSet(viewsets.ModelViewSet):
+class AnuncioViewSet(
+    LecturaReplicaMixin, ConditionalGetMixin, SincronizacionMixin, ListaCompactaMixin, LecturaAsincronaMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet para gestión de anuncios"""
     
     queryset = Anuncio.objects.all()
     permission_classes = [EsProfesorOrReadOnly]
+    pagination_class = KeysetPagination
+    # registrar_vista no necesita la fila del usuario: basta con los claims del token
+    acciones_usuario_token = ('registrar_vista',)
+    # El ETag usa veces_visto persistido: cambia con cada flush de ContadorVistas
+    campo_contador = 'veces_visto'
     
     def get_serializer_class(self):
         """Usar serializer diferente para crear"""
@@ -63,25 +130,20 @@ class AnuncioViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filtrar anuncios según rol y estado"""
-        queryset = Anuncio.objects.all()
+        queryset = Anuncio.objects.select_related('creado_por')
+        programador.asegurar()
         
-        # Estudiantes y apoderados solo ven anuncios activos
+        # Estudiantes y apoderados solo ven anuncios activos y dentro de sus
+        # fechas de publicación/expiración (estado mantenido por el programador)
         if not self.request.user.es_profesor():
-            queryset = queryset.filter(activo=True)
-            # Filtrar por fechas de publicación/expiracion
-            ahora = timezone.now()
-            queryset = queryset.filter(
-                fecha_publicacion__lte=ahora
-            ).exclude(
-                fecha_expiracion__lt=ahora
-            )
+            queryset = queryset.filter(visible=True)
         
         return queryset.order_by('-creado_en')
     
     def perform_create(self, serializer):
         """Asignar creador al crear anuncio"""
         anuncio = serializer.save(creado_por=self.request.user)
-        LogAuditoria.objects.create(
+        registrar_auditoria(
             usuario=self.request.user,
             modelo='Anuncio',
             objeto_id=str(anuncio.id),
@@ -92,7 +154,7 @@ class AnuncioViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         """Registrar actualización en logs"""
         instance = serializer.save()
-        LogAuditoria.objects.create(
+        registrar_auditoria(
             usuario=self.request.user,
             modelo='Anuncio',
             objeto_id=str(instance.id),
@@ -102,7 +164,7 @@ class AnuncioViewSet(viewsets.ModelViewSet):
     
     def perform_destroy(self, instance):
         """Registrar eliminación en logs"""
-        LogAuditoria.objects.create(
+        registrar_auditoria(
             usuario=self.request.user,
             modelo='Anuncio',
             objeto_id=str(instance.id),
@@ -111,19 +173,179 @@ class AnuncioViewSet(viewsets.ModelViewSet):
         )
         instance.delete()
     
-    @action(detail=True, methods=['post'])
+    def list(self, request, *args, **kwargs):
+        """Feed de estudiantes y apoderados servido desde el caché versionado"""
+        if request.user.es_profesor():
+            return super().list(request, *args, **kwargs)
+        etag, ultima_modificacion = self.validadores_lista(request, self.filter_queryset(self.get_queryset()))
+        return self.respuesta_condicional(
+            request, etag, ultima_modificacion,
+            lambda: respuesta_feed(request, lambda: ListaCompactaMixin.list(self, request, *args, **kwargs))
+        )
+    
+    async def alist(self, request, queryset, *args, **kwargs):
+        """list para ASGI: el mismo feed cacheado, leído con el ORM asíncrono"""
+        if request.user.es_profesor():
+            return await super().alist(request, queryset, *args, **kwargs)
+        etag, ultima_modificacion = await self.avalidadores_lista(request, queryset)
+        return await self.arespuesta_condicional(
+            request, etag, ultima_modificacion,
+            lambda: arespuesta_feed(
+                request, lambda: ListaCompactaMixin.alist(self, request, queryset, *args, **kwargs)
+            )
+        )
+    
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def registrar_vista(self, request, pk=None):
         """Registrar que un usuario vio el anuncio"""
         anuncio = self.get_object()
-        anuncio.incrementar_vistas()
-        return Response({'message': 'Vista registrada', 'veces_visto': anuncio.veces_visto})
+        veces_visto = anuncio.incrementar_vistas()
+        registrar_evento_vista(anuncio.pk, request.user)
+        return Response({'message': 'Vista registrada', 'veces_visto': veces_visto})
+    
+    @action(detail=True, methods=['get'], permission_classes=[EsProfesor])
+    def estadisticas(self, request, pk=None):
+        """Vistas del anuncio por día, hora y curso (desde los resúmenes precalculados)"""
+        try:
+            dias = min(max(int(request.query_params.get('dias', 30)), 1), 366)
+        except ValueError:
+            return Response({'detail': 'dias debe ser un número'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(estadisticas_anuncio(self.get_object(), dias=dias))
+    
+    @action(detail=False, methods=['get'], url_path='estadisticas', permission_classes=[EsProfesor])
+    def estadisticas_globales(self, request):
+        """Vistas de todos los anuncios por tipo y por curso"""
+        try:
+            dias = min(max(int(request.query_params.get('dias', 30)), 1), 366)
+        except ValueError:
+            return Response({'detail': 'dias debe ser un número'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(estadisticas_generales(dias=dias))
     
     @action(detail=False, methods=['get'])
     def activos(self, request):
         """Listar solo anuncios activos"""
-        anuncios = self.get_queryset().filter(activo=True)
-        serializer = self.get_serializer(anuncios, many=True)
-        return Response(serializer.data)
+        def generar():
+            return Response(self.serializar_lista(self.get_queryset().filter(visible=True)))
+        
+        if request.user.es_profesor():
+            return generar()
+        return respuesta_feed(request, generar)
+
+
+class ExportacionViewSet(viewsets.ViewSet):
+    """
+    Exportación en streaming (CSV o JSONL, opcionalmente gzip) de los logs
+    de auditoría y de las estadísticas de vistas de los anuncios
+    """
+    
+    permission_classes = [EsProfesor]
+    
+    @action(detail=False, methods=['get'])
+    def auditoria(self, request):
+        """Logs de auditoría filtrables por usuario, modelo, acción y rango de fechas"""
+        parametros = {
+            clave: request.query_params.get(clave)
+            for clave in ('usuario', 'modelo', 'accion', 'desde', 'hasta')
+        }
+        try:
+            exportacion.filtros_auditoria(**parametros)
+        except ValueError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return self.respuesta(
+            request, 'auditoria', exportacion.filas_auditoria(**parametros), exportacion.CAMPOS_AUDITORIA
+        )
+    
+    @action(detail=False, methods=['get'])
+    def anuncios(self, request):
+        """Veces visto por anuncio"""
+        return self.respuesta(request, 'anuncios', exportacion.filas_anuncios(), exportacion.CAMPOS_ANUNCIOS)
+    
+    def respuesta(self, request, nombre, filas, campos):
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exportacion.FORMATOS:
+            return Response({'detail': f'Formato no soportado: {formato}'}, status=status.HTTP_400_BAD_REQUEST)
+        comprimir = request.query_params.get('gzip', '').lower() in ('1', 'true', 'si')
+        trozos = exportacion.exportar(filas, formato, campos, comprimir)
+        if isinstance(request._request, ASGIRequest):
+            trozos = exportacion.aexportar(trozos)
+        response = StreamingHttpResponse(
+            trozos,
+            content_type='application/gzip' if comprimir else exportacion.TIPOS_CONTENIDO[formato],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{exportacion.nombre_archivo(nombre, formato, comprimir)}"'
+        )
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class BootstrapView(APIView):
+    """
+    Lo que el frontend necesita al abrir: perfil, primera página del feed de
+    anuncios y catálogo de carreras (primera página con el total), en una
+    sola respuesta con las secciones calculadas en paralelo. Cada sección es
+    idéntica a la respuesta de su endpoint.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return armador.armar(request._request)
+
+
+class BootstrapLoginView(TokenViewBase):
+    """Login y bootstrap en un solo request: los tokens junto a las secciones"""
+
+    serializer_class = CustomTokenObtainPairSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        return armador.armar(request._request, tokens=serializer.validated_data)
+
+
+def metricas(request):
+    """Métricas del proceso en formato de texto de Prometheus"""
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if token:
+        autorizado = hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    else:
+        autorizado = request.META.get('REMOTE_ADDR') in ('127.0.0.1', '::1')
+    if not autorizado:
+        return HttpResponse(status=403)
+    return HttpResponse(registro.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _autenticar(request):
+    try:
+        resultado = JWTAutenticacionRapida().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return resultado[0] if resultado else None
 
 
+async def eventos_anuncios(request):
+    """
+    Canal de Server-Sent Events con los cambios de anuncios (creado,
+    actualizado, publicado, expirado, retirado, eliminado). Estudiantes y
+    apoderados solo reciben los eventos de anuncios visibles. Requiere el
+    servidor ASGI: con WSGI cada conexión ocuparía un worker completo.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'El canal de eventos requiere el servidor ASGI'}, status=501)
+    usuario = await sync_to_async(_autenticar)(request)
+    if usuario is None:
+        return JsonResponse({'detail': 'Las credenciales de autenticación no se proveyeron.'}, status=401)
+    es_profesor = usuario.es_profesor()
+    try:
+        ultimo_id = int(request.headers.get('Last-Event-ID') or request.GET.get('ultimo_id') or 0)
+    except ValueError:
+        ultimo_id = 0
 
+    response = StreamingHttpResponse(flujo_eventos(es_profesor, ultimo_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,119 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+
+from .metricas import registro
+
+logger = logging.getLogger('contenido')
+
+
+class ContadorVistas:
+    """
+    Acumula en memoria las vistas de anuncios y las persiste por lotes.
+
+    Cada flush ejecuta un único UPDATE atómico por anuncio
+    (veces_visto = veces_visto + n), por lo que no se pierden incrementos
+    aunque varios procesos escriban al mismo tiempo. Los UPDATE no emiten
+    señales, así que el flush invalida el feed cacheado por su cuenta.
+    """
+
+    def __init__(self, intervalo=None, maximo_pendiente=None):
+        self.intervalo = intervalo if intervalo is not None else getattr(settings, 'VISTAS_FLUSH_INTERVALO', 5.0)
+        self.maximo_pendiente = (
+            maximo_pendiente if maximo_pendiente is not None
+            else getattr(settings, 'VISTAS_FLUSH_MAXIMO', 1000)
+        )
+        self._pendientes = defaultdict(int)
+        self._total_pendiente = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._evento = threading.Event()
+        self._hilo = None
+
+    def registrar(self, anuncio_id, cantidad=1):
+        """Suma vistas pendientes a un anuncio y devuelve las pendientes del anuncio"""
+        with self._lock:
+            self._pendientes[anuncio_id] += cantidad
+            self._total_pendiente += cantidad
+            pendientes = self._pendientes[anuncio_id]
+            lleno = self._total_pendiente >= self.maximo_pendiente
+        self._asegurar_hilo()
+        if lleno:
+            self._evento.set()
+        return pendientes
+
+    def pendientes(self, anuncio_id):
+        """Vistas aún no persistidas de un anuncio"""
+        with self._lock:
+            return self._pendientes.get(anuncio_id, 0)
+
+    def flush(self):
+        """Persistir las vistas pendientes; devuelve la cantidad de anuncios actualizados"""
+        from .cache import invalidar_feed
+        from .models import Anuncio
+
+        with self._flush_lock:
+            with self._lock:
+                lote = dict(self._pendientes)
+            if not lote:
+                return 0
+
+            persistidos = 0
+            for anuncio_id, cantidad in lote.items():
+                try:
+                    Anuncio.objects.filter(pk=anuncio_id).update(veces_visto=F('veces_visto') + cantidad)
+                except Exception:
+                    logger.exception('No se pudieron persistir %s vistas del anuncio %s', cantidad, anuncio_id)
+                    continue
+                # Descontar solo lo persistido: las vistas llegadas durante el UPDATE siguen pendientes
+                with self._lock:
+                    restante = self._pendientes[anuncio_id] - cantidad
+                    if restante > 0:
+                        self._pendientes[anuncio_id] = restante
+                    else:
+                        del self._pendientes[anuncio_id]
+                    self._total_pendiente -= cantidad
+                persistidos += 1
+            if persistidos:
+                invalidar_feed()
+            return len(lote)
+
+    def _asegurar_hilo(self):
+        """Iniciar el hilo de flush periódico la primera vez que se necesita"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self._ejecutar, name='contador-vistas', daemon=True)
+            self._hilo.start()
+
+    def _ejecutar(self):
+        while True:
+            self._evento.wait(self.intervalo)
+            self._evento.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Error en el flush periódico de vistas')
+            finally:
+                close_old_connections()
+
+
+contador_vistas = ContadorVistas()
+registro.medidor(
+    'bienestar_vistas_pendientes', 'Vistas de anuncios aún no persistidas', lambda: contador_vistas._total_pendiente
+)
+
+
+@atexit.register
+def _flush_al_salir():
+    try:
+        contador_vistas.flush()
+    except Exception:
+        logger.exception('No se pudieron persistir las vistas pendientes al salir')
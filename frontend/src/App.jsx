@@ -1,5 +1,8 @@
+import { useEffect } from 'react'
 import { Routes, Route, Navigate } from 'react-router-dom'
+import { useQueryClient } from '@tanstack/react-query'
 import { useAuth } from './contexts/AuthContext'
+import { subscribeAnuncios } from './services/api'
 import Layout from './components/Layout/Layout'
 import Login from './pages/Auth/Login'
 import Register from './pages/Auth/Register'
@@ -15,6 +18,18 @@ import ProtectedRoute from './components/Auth/ProtectedRoute'
 
 function App() {
   const { user, loading } = useAuth()
+  const queryClient = useQueryClient()
+
+  // Los anuncios se actualizan con los eventos del servidor en vez de re-consultar periódicamente
+  useEffect(() => {
+    if (!user) return undefined
+    return subscribeAnuncios(({ data }) => {
+      queryClient.invalidateQueries({ queryKey: ['anuncios'] })
+      if (data.anuncio?.id) {
+        queryClient.invalidateQueries({ queryKey: ['anuncio', String(data.anuncio.id)] })
+      }
+    })
+  }, [user, queryClient])
 
   if (loading) {
     return (
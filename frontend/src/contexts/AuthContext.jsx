@@ -1,5 +1,6 @@
 import { createContext, useContext, useState, useEffect } from 'react'
-import { authService } from '../services/api'
+import { useQueryClient } from '@tanstack/react-query'
+import { authService, bootstrapService } from '../services/api'
 
 const AuthContext = createContext(null)
 
@@ -14,15 +15,24 @@ export const useAuth = () => {
 export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null)
   const [loading, setLoading] = useState(true)
+  const queryClient = useQueryClient()
+
+  // Las listas que trae el bootstrap quedan en el caché de react-query:
+  // Dashboard, Anuncios y Carreras no repiten esas peticiones
+  const seedQueries = (bootstrap) => {
+    if (bootstrap.anuncios) queryClient.setQueryData(['anuncios'], bootstrap.anuncios)
+    if (bootstrap.carreras) queryClient.setQueryData(['carreras'], bootstrap.carreras)
+  }
 
   useEffect(() => {
     // Verificar si hay token guardado
     const token = localStorage.getItem('access_token')
     if (token) {
-      // Obtener información del usuario
-      authService.getProfile()
-        .then((userData) => {
-          setUser(userData)
+      // Perfil y datos iniciales en un solo request
+      bootstrapService.get()
+        .then(async (bootstrap) => {
+          seedQueries(bootstrap)
+          setUser(bootstrap.usuario ?? await authService.getProfile())
         })
         .catch(() => {
           localStorage.removeItem('access_token')
@@ -39,11 +49,12 @@ export const AuthProvider = ({ children }) => {
   const login = async (email, password) => {
     try {
       const response = await authService.login(email, password)
-      const { access, refresh, user: userData } = response
+      const { access, refresh, user: userData, bootstrap } = response
       
       localStorage.setItem('access_token', access)
       localStorage.setItem('refresh_token', refresh)
-      setUser(userData)
+      seedQueries(bootstrap)
+      setUser(userData ?? await authService.getProfile())
       
       return { success: true }
     } catch (error) {
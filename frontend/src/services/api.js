@@ -10,6 +10,11 @@ const api = axios.create({
   },
 })
 
+// Validadores (ETag / Last-Modified) de las respuestas GET, para pedir solo lo que cambió
+const conditionalCache = new Map()
+
+const cacheKey = (config) => api.getUri(config)
+
 // Interceptor para agregar token a las peticiones
 api.interceptors.request.use(
   (config) => {
@@ -17,6 +22,15 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`
     }
+    if ((config.method || 'get').toLowerCase() === 'get') {
+      const cached = conditionalCache.get(cacheKey(config))
+      if (cached) {
+        if (cached.etag) config.headers['If-None-Match'] = cached.etag
+        if (cached.lastModified) config.headers['If-Modified-Since'] = cached.lastModified
+      }
+      // 304 es una respuesta válida: se reemplaza por los datos guardados
+      config.validateStatus = (status) => (status >= 200 && status < 300) || status === 304
+    }
     return config
   },
   (error) => {
@@ -24,9 +38,55 @@ api.interceptors.request.use(
   }
 )
 
+// Renovación del access token, compartida por los requests y el canal de eventos.
+// Con ROTATE_REFRESH_TOKENS cada refresh deja en la blacklist al anterior: se
+// hace uno a la vez y se guarda el refresh nuevo.
+let refreshing = null
+
+const refreshAccessToken = () => {
+  if (!refreshing) {
+    refreshing = (async () => {
+      const response = await axios.post(`${API_URL}/token/refresh/`, {
+        refresh: localStorage.getItem('refresh_token'),
+      })
+      const { access, refresh } = response.data
+      localStorage.setItem('access_token', access)
+      if (refresh) localStorage.setItem('refresh_token', refresh)
+      return access
+    })().finally(() => {
+      refreshing = null
+    })
+  }
+  return refreshing
+}
+
+const endSession = () => {
+  localStorage.removeItem('access_token')
+  localStorage.removeItem('refresh_token')
+  window.location.href = '/login'
+}
+
 // Interceptor para manejar errores y refresh token
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    if ((response.config.method || 'get').toLowerCase() !== 'get') {
+      return response
+    }
+    const key = cacheKey(response.config)
+    if (response.status === 304) {
+      const cached = conditionalCache.get(key)
+      if (cached) {
+        return { ...response, status: 200, data: cached.data }
+      }
+      return response
+    }
+    const etag = response.headers.etag
+    const lastModified = response.headers['last-modified']
+    if (etag || lastModified) {
+      conditionalCache.set(key, { etag, lastModified, data: response.data })
+    }
+    return response
+  },
   async (error) => {
     const originalRequest = error.config
 
@@ -34,22 +94,14 @@ api.interceptors.response.use(
       originalRequest._retry = true
 
       try {
-        const refreshToken = localStorage.getItem('refresh_token')
-        if (refreshToken) {
-          const response = await axios.post(`${API_URL}/token/refresh/`, {
-            refresh: refreshToken,
-          })
-
-          const { access } = response.data
-          localStorage.setItem('access_token', access)
+        if (localStorage.getItem('refresh_token')) {
+          const access = await refreshAccessToken()
           originalRequest.headers.Authorization = `Bearer ${access}`
 
           return api(originalRequest)
         }
       } catch (refreshError) {
-        localStorage.removeItem('access_token')
-        localStorage.removeItem('refresh_token')
-        window.location.href = '/login'
+        endSession()
         return Promise.reject(refreshError)
       }
     }
@@ -62,17 +114,41 @@ api.interceptors.response.use(
   }
 )
 
+// Paginación por cursor: cada página trae el link `next` hacia la siguiente
+const fetchPage = async (url, { cursor, pageSize, total } = {}) => {
+  const params = {}
+  if (cursor) params.cursor = cursor
+  if (pageSize) params.page_size = pageSize
+  if (total) params.total = true
+  const response = await api.get(url, { params })
+  return response.data
+}
+
+async function* iteratePages(url, options = {}) {
+  let page = await fetchPage(url, options)
+  yield page
+  while (page.next) {
+    const response = await api.get(page.next)
+    page = response.data
+    yield page
+  }
+}
+
+const fetchAllPages = async (url, options = {}) => {
+  const results = []
+  for await (const page of iteratePages(url, options)) {
+    results.push(...page.results)
+  }
+  return results
+}
+
 // Servicios de autenticación
 export const authService = {
+  // Login y datos iniciales (perfil, primera página de anuncios y carreras) en un solo request
   login: async (email, password) => {
-    const response = await api.post('/auth/login/', { email, password })
-    // Obtener información del usuario del token o hacer una petición separada
-    const userResponse = await api.get('/auth/usuarios/perfil/')
-    return {
-      access: response.data.access,
-      refresh: response.data.refresh,
-      user: userResponse.data,
-    }
+    const response = await api.post('/bootstrap/login/', { email, password })
+    const { access, refresh, usuario, ...bootstrap } = response.data
+    return { access, refresh, user: usuario, bootstrap }
   },
 
   register: async (userData) => {
@@ -87,6 +163,16 @@ export const authService = {
   logout: () => {
     localStorage.removeItem('access_token')
     localStorage.removeItem('refresh_token')
+    conditionalCache.clear()
+  },
+}
+
+// Datos iniciales de la aplicación en un solo request: { usuario, anuncios, carreras }.
+// Una sección que falló en el servidor llega en null (su código queda en `errores`)
+export const bootstrapService = {
+  get: async () => {
+    const response = await api.get('/bootstrap/')
+    return response.data
   },
 }
 
@@ -97,6 +183,12 @@ export const carreraService = {
     return response.data
   },
 
+  getPage: (options) => fetchPage('/carreras/', options),
+
+  iteratePages: (options) => iteratePages('/carreras/', options),
+
+  getAllPages: (options) => fetchAllPages('/carreras/', options),
+
   getById: async (id) => {
     const response = await api.get(`/carreras/${id}/`)
     return response.data
@@ -124,6 +216,12 @@ export const anuncioService = {
     return response.data
   },
 
+  getPage: (options) => fetchPage('/anuncios/', options),
+
+  iteratePages: (options) => iteratePages('/anuncios/', options),
+
+  getAllPages: (options) => fetchAllPages('/anuncios/', options),
+
   getById: async (id) => {
     const response = await api.get(`/anuncios/${id}/`)
     return response.data
@@ -148,5 +246,81 @@ export const anuncioService = {
   },
 }
 
+// Canal de eventos de anuncios (Server-Sent Events). Se usa fetch en vez de
+// EventSource para poder enviar el token en el header Authorization.
+const parseEvent = (block) => {
+  const event = { type: 'message', id: null, data: '' }
+  for (const line of block.split('\n')) {
+    if (!line || line.startsWith(':')) continue
+    const index = line.indexOf(':')
+    const field = index === -1 ? line : line.slice(0, index)
+    const value = index === -1 ? '' : line.slice(index + 1).replace(/^ /, '')
+    if (field === 'event') event.type = value
+    else if (field === 'id') event.id = value
+    else if (field === 'data') event.data += value
+    else if (field === 'retry') event.retry = Number(value)
+  }
+  return event
+}
+
+export const subscribeAnuncios = (onEvent) => {
+  const controller = new AbortController()
+  let lastEventId = null
+  let retry = 3000
+  let renewed = false
+
+  const connect = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const headers = { Accept: 'text/event-stream' }
+        const token = localStorage.getItem('access_token')
+        if (token) headers.Authorization = `Bearer ${token}`
+        if (lastEventId) headers['Last-Event-ID'] = lastEventId
+        const response = await fetch(`${API_URL}/anuncios/eventos/`, { headers, signal: controller.signal })
+        // 501: el servidor no corre con ASGI y el canal no está disponible
+        if (response.status === 501) return
+        // Access token vencido: se renueva como en los requests y se reconecta de
+        // inmediato; si el token recién renovado también es rechazado, se deja de intentar
+        if (response.status === 401) {
+          if (renewed || !localStorage.getItem('refresh_token')) return
+          renewed = true
+          try {
+            await refreshAccessToken()
+          } catch (refreshError) {
+            endSession()
+            return
+          }
+          continue
+        }
+        renewed = false
+        if (!response.ok) throw new Error(`Canal de eventos: ${response.status}`)
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+        let buffer = ''
+        for (;;) {
+          const { value, done } = await reader.read()
+          if (done) break
+          buffer += value
+          const blocks = buffer.split('\n\n')
+          buffer = blocks.pop()
+          for (const block of blocks) {
+            const event = parseEvent(block)
+            if (event.retry) retry = event.retry
+            if (event.id) lastEventId = event.id
+            if (event.type !== 'message') {
+              onEvent({ type: event.type, data: event.data ? JSON.parse(event.data) : {} })
+            }
+          }
+        }
+      } catch (error) {
+        if (controller.signal.aborted) return
+      }
+      await new Promise((resolve) => setTimeout(resolve, retry))
+    }
+  }
+
+  connect()
+  return () => controller.abort()
+}
+
 export default api
 
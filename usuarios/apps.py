@@ -5,6 +5,14 @@ class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'usuarios'
     verbose_name = 'Usuarios'
+    
+    def ready(self):
+        # Revocar los tokens cuando cambia la contraseña, el rol o el estado del usuario
+        from . import authentication  # noqa: F401
+        # Índices para filtrar el listado por prefijo de nombre, apellido o email
+        from django.db.models.signals import post_migrate
+        from .filtros import preparar_indices
+        post_migrate.connect(preparar_indices, sender=self)
 
 
 
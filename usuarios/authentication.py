@@ -0,0 +1,149 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import permissions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+# Claims que el token debe traer para poder atender el request sin leer la base de datos
+CLAIMS_USUARIO = ('email', 'rol', 'nombres', 'apellidos', 'is_staff')
+
+# Campos cuyo cambio invalida los tokens ya emitidos
+CAMPOS_REVOCAN = ('password', 'rol', 'is_active', 'is_staff')
+
+
+class UsuarioToken(TokenUser):
+    """Usuario liviano construido desde los claims del access token"""
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def rol(self):
+        return self.token.get('rol', '')
+
+    @cached_property
+    def nombres(self):
+        return self.token.get('nombres', '')
+
+    @cached_property
+    def apellidos(self):
+        return self.token.get('apellidos', '')
+
+    @cached_property
+    def curso(self):
+        return self.token.get('curso')
+
+    def __str__(self):
+        return f"{self.nombres} {self.apellidos} ({self.rol})"
+
+    def get_full_name(self):
+        return f"{self.nombres} {self.apellidos}"
+
+    def es_profesor(self):
+        return self.rol == 'profesor' or self.is_staff
+
+    def es_estudiante(self):
+        return self.rol == 'estudiante'
+
+    def es_apoderado(self):
+        return self.rol == 'apoderado'
+
+
+def _clave_jti(jti):
+    return f'jwt:revocado:jti:{jti}'
+
+
+def _clave_usuario(usuario_id):
+    return f'jwt:revocado:usuario:{usuario_id}'
+
+
+def revocar_token(token):
+    """Revocar un token puntual (access o refresh) hasta que expire"""
+    restante = int(token.get('exp', time.time()) - time.time())
+    if restante > 0:
+        cache.set(_clave_jti(token[api_settings.JTI_CLAIM]), True, restante)
+
+
+def revocar_usuario(usuario):
+    """Revocar todos los tokens del usuario emitidos antes de este segundo"""
+    # En segundos enteros, como el claim iat: un token emitido en este mismo
+    # segundo (p. ej. el login con la clave nueva) sigue valiendo
+    cache.set(_clave_usuario(usuario.pk), int(time.time()), int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()))
+    # Los refresh quedan además en la blacklist, que no depende del caché
+    pendientes = OutstandingToken.objects.filter(
+        user_id=usuario.pk, expires_at__gt=timezone.now(), blacklistedtoken__isnull=True
+    ).values_list('pk', flat=True)
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=pk) for pk in pendientes], ignore_conflicts=True
+    )
+
+
+@receiver(pre_save, sender='usuarios.Usuario')
+def _comparar_campos_revocan(sender, instance, update_fields=None, **kwargs):
+    """Marca al usuario si cambia un campo de CAMPOS_REVOCAN respecto de la fila guardada"""
+    instance._revocar_tokens = False
+    if instance.pk is None or (update_fields is not None and not set(CAMPOS_REVOCAN) & set(update_fields)):
+        return
+    anterior = sender._default_manager.filter(pk=instance.pk).values(*CAMPOS_REVOCAN).first()
+    if anterior is not None:
+        instance._revocar_tokens = any(getattr(instance, campo) != anterior[campo] for campo in CAMPOS_REVOCAN)
+
+
+@receiver(post_save, sender='usuarios.Usuario')
+def _revocar_por_cambio(sender, instance, created, **kwargs):
+    # Vale para cualquier guardado: API, admin, shell o Usuario.save()
+    if getattr(instance, '_revocar_tokens', False):
+        instance._revocar_tokens = False
+        transaction.on_commit(lambda: revocar_usuario(instance))
+
+
+def token_revocado(token):
+    """Consulta la lista de revocación (una sola ida al caché)"""
+    usuario_id = token.get(api_settings.USER_ID_CLAIM)
+    claves = [_clave_jti(token.get(api_settings.JTI_CLAIM)), _clave_usuario(usuario_id)]
+    revocados = cache.get_many(claves)
+    if revocados.get(claves[0]):
+        return True
+    revocado_desde = revocados.get(claves[1])
+    return revocado_desde is not None and token.get('iat', 0) < revocado_desde
+
+
+class JWTAutenticacionRapida(JWTAuthentication):
+    """
+    Autenticación JWT sin SELECT del usuario en las lecturas.
+
+    Para métodos seguros se devuelve un UsuarioToken armado con los claims;
+    las escrituras y las acciones listadas en ``acciones_usuario_completo``
+    de la vista cargan la fila completa. Una vista puede permitir el usuario
+    del token en escrituras con ``acciones_usuario_token``. La revocación se
+    respeta en ambos casos mediante la lista de revocación en caché.
+    """
+
+    def authenticate(self, request):
+        self.request = request
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if token_revocado(validated_token):
+            raise AuthenticationFailed('El token fue revocado', code='token_revoked')
+        if self.requiere_usuario_completo(self.request) or any(c not in validated_token for c in CLAIMS_USUARIO):
+            return super().get_user(validated_token)
+        return UsuarioToken(validated_token)
+
+    @staticmethod
+    def requiere_usuario_completo(request):
+        view = getattr(request, 'parser_context', {}).get('view')
+        accion = getattr(view, 'action', None)
+        if request.method in permissions.SAFE_METHODS:
+            return accion in getattr(view, 'acciones_usuario_completo', ())
+        return accion not in getattr(view, 'acciones_usuario_token', ())
@@ -0,0 +1,62 @@
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Usuario
+
+# Prefijos de nombre, apellido y email (?q=): istartswith compara UPPER(columna) LIKE 'X%'
+CAMPOS_PREFIJO = ('nombres', 'apellidos', 'email')
+
+
+def preparar_indices(using='default', **kwargs):
+    """
+    Índices para la búsqueda por prefijo (se ejecuta tras migrate). En
+    PostgreSQL, sobre UPPER(columna) con text_pattern_ops, para que el
+    LIKE 'X%' de istartswith los use con cualquier collation. En SQLite, con
+    COLLATE NOCASE, que es lo que exige su optimización de LIKE.
+    """
+    from django.db import connections
+
+    conexion = connections[using]
+    tabla = conexion.ops.quote_name(Usuario._meta.db_table)
+    with conexion.cursor() as cursor:
+        for campo in CAMPOS_PREFIJO:
+            columna = conexion.ops.quote_name(campo)
+            indice = f'{Usuario._meta.db_table}_{campo}_prefijo'
+            if conexion.vendor == 'postgresql':
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {indice} ON {tabla} (UPPER({columna}::text) text_pattern_ops)'
+                )
+            elif conexion.vendor == 'sqlite':
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {indice} ON {tabla} ({columna} COLLATE NOCASE)')
+
+
+class FiltroUsuarios(BaseFilterBackend):
+    """
+    Filtros del listado de usuarios: ``?rol=`` (uno o varios separados por
+    comas), ``?curso=`` y ``?q=`` (prefijo de nombres, apellidos o email;
+    con varias palabras, cada una debe ser prefijo de alguno de ellos).
+    """
+
+    rol_param = 'rol'
+    curso_param = 'curso'
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        roles = [rol.strip() for rol in request.query_params.get(self.rol_param, '').split(',') if rol.strip()]
+        if roles:
+            validos = {valor for valor, _ in Usuario.ROLES_CHOICES}
+            if set(roles) - validos:
+                raise ValidationError({self.rol_param: f'Rol inválido; opciones: {", ".join(sorted(validos))}'})
+            queryset = queryset.filter(rol=roles[0]) if len(roles) == 1 else queryset.filter(rol__in=roles)
+
+        curso = request.query_params.get(self.curso_param, '').strip()
+        if curso:
+            queryset = queryset.filter(curso=curso)
+
+        for palabra in request.query_params.get(self.search_param, '').split():
+            filtro = Q()
+            for campo in CAMPOS_PREFIJO:
+                filtro |= Q(**{f'{campo}__istartswith': palabra})
+            queryset = queryset.filter(filtro)
+        return queryset
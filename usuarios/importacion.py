@@ -0,0 +1,335 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+Usuario = get_user_model()
+logger = logging.getLogger('usuarios')
+
+FORMATOS = ('csv', 'jsonl')
+
+
+class UsuarioImportacionSerializer(serializers.ModelSerializer):
+    """Validación por fila sin consultas: la unicidad se verifica por lotes"""
+
+    password = serializers.CharField(write_only=True, min_length=8, required=False, allow_blank=True)
+
+    class Meta:
+        model = Usuario
+        fields = ['email', 'password', 'nombres', 'apellidos', 'rol', 'curso', 'rut']
+        extra_kwargs = {
+            'email': {'validators': []},
+            'rut': {'validators': []},
+        }
+
+
+def directorio_importacion(importacion_id):
+    return os.path.join(settings.MEDIA_ROOT, 'importaciones', str(importacion_id))
+
+
+def importador_para(importacion_id):
+    """Importador de una importación subida por la API"""
+    directorio = directorio_importacion(importacion_id)
+    for formato in FORMATOS:
+        ruta = os.path.join(directorio, f'datos.{formato}')
+        if os.path.exists(ruta):
+            return ImportadorUsuarios(
+                ruta, formato,
+                ruta_progreso=os.path.join(directorio, 'progreso.json'),
+                ruta_errores=os.path.join(directorio, 'errores.jsonl'),
+            )
+    return None
+
+
+def iniciar_importacion(archivo, formato=None):
+    """Guardar el archivo subido e importarlo en segundo plano; devuelve el id de la importación"""
+    formato = formato or detectar_formato(archivo.name)
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato no soportado: {formato}')
+    importacion_id = uuid.uuid4()
+    directorio = directorio_importacion(importacion_id)
+    os.makedirs(directorio)
+    with open(os.path.join(directorio, f'datos.{formato}'), 'wb') as destino:
+        for trozo in archivo.chunks():
+            destino.write(trozo)
+    importador = importador_para(importacion_id)
+    importador.guardar_progreso(importador.leer_progreso())
+    reanudar_en_segundo_plano(importador)
+    return importacion_id
+
+
+def reanudar_en_segundo_plano(importador):
+    """Importar en un hilo; devuelve False si otro proceso ya reservó la importación"""
+    if not importador.reservar():
+        return False
+
+    def trabajar():
+        try:
+            importador.ejecutar()
+        except Exception:
+            logger.exception('Falló la importación de usuarios en segundo plano (%s)', importador.ruta)
+        finally:
+            importador.liberar()
+            close_old_connections()
+
+    threading.Thread(target=trabajar, name='importacion-usuarios', daemon=True).start()
+    return True
+
+
+def propietario():
+    """Host y pid del proceso que ejecuta la importación"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _proceso_vivo(pid):
+    if os.name == 'nt':
+        return True  # os.kill(pid, 0) terminaría el proceso en Windows; se usa solo el latido
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def detectar_formato(nombre):
+    extension = os.path.splitext(nombre)[1].lower()
+    return 'jsonl' if extension in ('.jsonl', '.ndjson') else 'csv'
+
+
+def leer_filas(ruta, formato):
+    """Iterar las filas del archivo sin cargarlo completo en memoria"""
+    with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+        if formato == 'csv':
+            for fila in csv.DictReader(archivo):
+                yield {clave.strip(): (valor or '').strip() for clave, valor in fila.items() if clave}
+        else:
+            for linea in archivo:
+                if linea.strip():
+                    try:
+                        yield json.loads(linea)
+                    except ValueError:
+                        yield None
+
+
+def _inicializar_proceso():
+    # Con el método "spawn" los procesos hijos no heredan la configuración de Django
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bienestar_api.settings')
+    django.setup()
+
+
+class ImportadorUsuarios:
+    """
+    Importación masiva de usuarios desde CSV o JSONL.
+
+    Procesa el archivo por lotes: valida cada fila, verifica la unicidad de
+    email y rut con una consulta por lote, calcula los hashes de contraseña
+    en un pool de procesos y crea los usuarios con bulk_create. El avance se
+    guarda después de cada lote, de modo que una importación interrumpida
+    puede reanudarse, y los errores se escriben por fila en un JSONL.
+    """
+
+    def __init__(self, ruta, formato=None, ruta_progreso=None, ruta_errores=None, tamano_lote=None, procesos=None):
+        self.ruta = ruta
+        self.formato = formato or detectar_formato(ruta)
+        if self.formato not in FORMATOS:
+            raise ValueError(f'Formato no soportado: {self.formato}')
+        self.ruta_progreso = ruta_progreso or f'{ruta}.progreso.json'
+        self.ruta_errores = ruta_errores or f'{ruta}.errores.jsonl'
+        self.tamano_lote = tamano_lote or getattr(settings, 'IMPORTACION_TAMANO_LOTE', 500)
+        self.procesos = procesos or getattr(settings, 'IMPORTACION_PROCESOS', None) or os.cpu_count()
+
+    def leer_progreso(self):
+        try:
+            with open(self.ruta_progreso, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except FileNotFoundError:
+            return {'estado': 'pendiente', 'procesadas': 0, 'creados': 0, 'errores': 0}
+
+    def guardar_progreso(self, progreso):
+        progreso['actualizado_en'] = timezone.now().isoformat()
+        temporal = f'{self.ruta_progreso}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(progreso, archivo)
+        os.replace(temporal, self.ruta_progreso)
+
+    def en_curso(self, progreso):
+        """
+        Si un proceso sigue atendiendo la importación. Una en_proceso cuyo
+        proceso terminó (en este host) o que no guarda avance hace más de
+        IMPORTACION_LATIDO_MAXIMO segundos quedó abandonada tras una caída o
+        un reinicio, y puede reanudarse.
+        """
+        if progreso.get('estado') != 'en_proceso':
+            return False
+        host, _, pid = progreso.get('propietario', '').rpartition(':')
+        if host == socket.gethostname() and pid.isdigit() and not _proceso_vivo(int(pid)):
+            return False
+        actualizado = parse_datetime(progreso.get('actualizado_en') or '')
+        maximo = getattr(settings, 'IMPORTACION_LATIDO_MAXIMO', 600)
+        return actualizado is not None and (timezone.now() - actualizado).total_seconds() < maximo
+
+    @property
+    def clave_reserva(self):
+        ruta = os.path.abspath(self.ruta_progreso).encode('utf-8')
+        return f'usuarios:importacion:{hashlib.md5(ruta).hexdigest()}'
+
+    def reservar(self):
+        """
+        Reserva atómica (cache.add) para que dos reanudaciones simultáneas no
+        inicien dos importaciones. La reserva de un proceso que terminó sin
+        liberarla vence a los IMPORTACION_LATIDO_MAXIMO segundos.
+        """
+        return cache.add(self.clave_reserva, propietario(), getattr(settings, 'IMPORTACION_LATIDO_MAXIMO', 600))
+
+    def liberar(self):
+        cache.delete(self.clave_reserva)
+
+    def errores(self, limite=None):
+        try:
+            with open(self.ruta_errores, encoding='utf-8') as archivo:
+                return [json.loads(linea) for linea in islice(archivo, limite)]
+        except FileNotFoundError:
+            return []
+
+    def ejecutar(self, reanudar=True):
+        """Importar el archivo completo (o el resto, si se reanuda); devuelve el progreso final"""
+        progreso = self.leer_progreso() if reanudar else {'procesadas': 0, 'creados': 0, 'errores': 0}
+        if not reanudar and os.path.exists(self.ruta_errores):
+            os.remove(self.ruta_errores)
+        progreso['estado'] = 'en_proceso'
+        progreso['propietario'] = propietario()
+        self.guardar_progreso(progreso)
+
+        filas = enumerate(leer_filas(self.ruta, self.formato), start=1)
+        filas = islice(filas, progreso['procesadas'], None)
+        try:
+            with ProcessPoolExecutor(max_workers=self.procesos, initializer=_inicializar_proceso) as pool:
+                while True:
+                    lote = list(islice(filas, self.tamano_lote))
+                    if not lote:
+                        break
+                    creados, errores = self.procesar_lote(lote, pool)
+                    self.escribir_errores(errores)
+                    progreso['procesadas'] = lote[-1][0]
+                    progreso['creados'] += creados
+                    progreso['errores'] += len(errores)
+                    self.guardar_progreso(progreso)
+        except Exception as error:
+            logger.exception('Importación de usuarios interrumpida en la fila %s', progreso['procesadas'])
+            progreso['estado'] = 'error'
+            progreso['detalle'] = str(error)
+            self.guardar_progreso(progreso)
+            raise
+        progreso['estado'] = 'completado'
+        self.guardar_progreso(progreso)
+        return progreso
+
+    def procesar_lote(self, lote, pool):
+        validos, errores = [], []
+        emails, ruts = {}, {}
+        for numero, fila in lote:
+            if not isinstance(fila, dict):
+                errores.append({'fila': numero, 'errores': {'fila': ['Formato de fila inválido']}})
+                continue
+            fila = {clave: valor for clave, valor in fila.items() if valor not in ('', None)}
+            fila.setdefault('rol', 'estudiante')
+            serializer = UsuarioImportacionSerializer(data=fila)
+            if not serializer.is_valid():
+                errores.append({'fila': numero, 'errores': serializer.errors})
+                continue
+            datos = serializer.validated_data
+            datos['email'] = Usuario.objects.normalize_email(datos['email'])
+            duplicado = {}
+            if datos['email'] in emails:
+                duplicado['email'] = [f'Repetido en la fila {emails[datos["email"]]}']
+            if datos.get('rut') and datos['rut'] in ruts:
+                duplicado['rut'] = [f'Repetido en la fila {ruts[datos["rut"]]}']
+            if duplicado:
+                errores.append({'fila': numero, 'errores': duplicado})
+                continue
+            emails[datos['email']] = numero
+            if datos.get('rut'):
+                ruts[datos['rut']] = numero
+            validos.append((numero, datos))
+
+        # Unicidad contra la base de datos: una consulta por campo y por lote
+        existentes_email = set(Usuario.objects.filter(email__in=emails).values_list('email', flat=True))
+        existentes_rut = set(Usuario.objects.filter(rut__in=ruts).values_list('rut', flat=True))
+        nuevos = []
+        for numero, datos in validos:
+            duplicado = {}
+            if datos['email'] in existentes_email:
+                duplicado['email'] = ['Ya existe un usuario con este email']
+            if datos.get('rut') in existentes_rut:
+                duplicado['rut'] = ['Ya existe un usuario con este RUT']
+            if duplicado:
+                errores.append({'fila': numero, 'errores': duplicado})
+            else:
+                nuevos.append((numero, datos))
+
+        contrasenas = [datos.pop('password', None) for _, datos in nuevos]
+        con_contrasena = [c for c in contrasenas if c]
+        hashes = iter(pool.map(make_password, con_contrasena, chunksize=max(1, len(con_contrasena) // (self.procesos * 4))))
+        usuarios = []
+        for (_, datos), contrasena in zip(nuevos, contrasenas):
+            usuario = Usuario(**datos)
+            if contrasena:
+                usuario.password = next(hashes)
+            else:
+                usuario.set_unusable_password()
+            usuarios.append(usuario)
+
+        creados = len(usuarios)
+        try:
+            with transaction.atomic():
+                Usuario.objects.bulk_create(usuarios, batch_size=self.tamano_lote)
+        except IntegrityError:
+            # Otro proceso creó un email o rut del lote después de la verificación:
+            # se inserta fila por fila y solo las repetidas quedan como error
+            creados = 0
+            for (numero, _), usuario in zip(nuevos, usuarios):
+                usuario.pk = None
+                usuario._state.adding = True
+                try:
+                    with transaction.atomic():
+                        usuario.save(force_insert=True)
+                    creados += 1
+                except IntegrityError as error:
+                    errores.append({'fila': numero, 'errores': self.errores_de_unicidad(usuario, error)})
+        errores.sort(key=lambda error: error['fila'])
+        return creados, errores
+
+    @staticmethod
+    def errores_de_unicidad(usuario, error):
+        errores = {}
+        if Usuario.objects.filter(email=usuario.email).exists():
+            errores['email'] = ['Ya existe un usuario con este email']
+        if usuario.rut and Usuario.objects.filter(rut=usuario.rut).exists():
+            errores['rut'] = ['Ya existe un usuario con este RUT']
+        return errores or {'fila': [str(error)]}
+
+    def escribir_errores(self, errores):
+        if not errores:
+            return
+        with open(self.ruta_errores, 'a', encoding='utf-8') as archivo:
+            for error in errores:
+                archivo.write(json.dumps(error, ensure_ascii=False, default=str))
+                archivo.write('\n')
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework.exceptions import APIException
+
+from contenido.metricas import registro
+
+Usuario = get_user_model()
+
+logins = registro.contador('bienestar_login_total', 'Intentos de inicio de sesión por resultado', ('resultado',))
+rehashes = registro.contador('bienestar_login_rehash_total', 'Claves re-hasheadas al iniciar sesión')
+duracion_hash = registro.histograma(
+    'bienestar_login_hash_segundos', 'Tiempo de verificación de la clave en el pool de hashing'
+)
+
+
+class LoginSaturado(APIException):
+    status_code = 503
+    default_detail = 'Hay demasiados inicios de sesión en curso, intente nuevamente en unos segundos.'
+    default_code = 'login_saturado'
+    # DRF lo envía como Retry-After
+    wait = 1
+
+
+def comprobar_clave(clave, codificado):
+    """
+    (clave correcta, nuevo hash o None). El nuevo hash se calcula solo si el
+    algoritmo o sus iteraciones cambiaron en PASSWORD_HASHERS. Para un
+    usuario inexistente se calcula igual un hash, así el tiempo de respuesta
+    no revela si el email está registrado.
+    """
+    if codificado is None:
+        make_password(clave)
+        return False, None
+    correcta, actualizar = verify_password(clave, codificado)
+    return correcta, make_password(clave) if correcta and actualizar else None
+
+
+class VerificadorClaves:
+    """
+    Pool acotado de hilos para verificar claves. hashlib libera el GIL
+    durante PBKDF2, así que con un hilo por núcleo se usan todos los
+    núcleos sin bloquear al worker ni al event loop. Si ya hay ``capacidad``
+    verificaciones en curso o en espera, el login se rechaza con 503 en vez
+    de acumular una cola que ningún cliente alcanzaría a esperar.
+    """
+
+    def __init__(self, hilos=None, capacidad=None):
+        self.hilos = hilos or getattr(settings, 'LOGIN_HILOS_HASH', 0) or os.cpu_count() or 1
+        self.capacidad = capacidad or getattr(settings, 'LOGIN_CAPACIDAD_HASH', 0) or self.hilos * 16
+        self._cupos = threading.BoundedSemaphore(self.capacidad)
+        self._ocupados = 0
+        self._lock = threading.Lock()
+        self._ejecutor = None
+
+    @property
+    def ejecutor(self):
+        if self._ejecutor is None:
+            with self._lock:
+                if self._ejecutor is None:
+                    self._ejecutor = ThreadPoolExecutor(self.hilos, thread_name_prefix='login-hash')
+        return self._ejecutor
+
+    def ocupados(self):
+        return self._ocupados
+
+    def enviar(self, clave, codificado):
+        """Future con el resultado de comprobar_clave; LoginSaturado si no hay cupo"""
+        if not self._cupos.acquire(blocking=False):
+            logins.inc('saturado')
+            raise LoginSaturado()
+        with self._lock:
+            self._ocupados += 1
+        try:
+            futuro = self.ejecutor.submit(self._comprobar, clave, codificado)
+        except BaseException:
+            self._liberar()
+            raise
+        futuro.add_done_callback(lambda _: self._liberar())
+        return futuro
+
+    def _liberar(self):
+        with self._lock:
+            self._ocupados -= 1
+        self._cupos.release()
+
+    @staticmethod
+    def _comprobar(clave, codificado):
+        inicio = time.perf_counter()
+        try:
+            return comprobar_clave(clave, codificado)
+        finally:
+            duracion_hash.observar(time.perf_counter() - inicio)
+
+    def verificar(self, clave, codificado):
+        return self.enviar(clave, codificado).result()
+
+    async def averificar(self, clave, codificado):
+        return await asyncio.wrap_future(self.enviar(clave, codificado))
+
+
+verificador = VerificadorClaves()
+registro.medidor(
+    'bienestar_login_hash_en_curso', 'Verificaciones de clave en curso o en espera', verificador.ocupados
+)
+
+
+def _resultado(usuario, correcta):
+    if not correcta or usuario is None or not usuario.is_active:
+        logins.inc('invalido')
+        return None
+    logins.inc('exito')
+    return usuario
+
+
+def _buscar(email):
+    return Usuario._default_manager.filter(**{Usuario.USERNAME_FIELD: email})
+
+
+def autenticar(email, clave):
+    """Usuario activo con esas credenciales o None; la clave se verifica en el pool"""
+    usuario = _buscar(email).first()
+    correcta, nuevo = verificador.verificar(clave, usuario.password if usuario else None)
+    if correcta and nuevo:
+        # Condicionado al hash anterior: si la clave cambió mientras tanto, no se pisa
+        _buscar(email).filter(pk=usuario.pk, password=usuario.password).update(password=nuevo)
+        usuario.password = nuevo
+        rehashes.inc()
+    return _resultado(usuario, correcta)
+
+
+async def aautenticar(email, clave):
+    """autenticar con el ORM asíncrono, sin ocupar el hilo de las vistas síncronas"""
+    usuario = await _buscar(email).afirst()
+    correcta, nuevo = await verificador.averificar(clave, usuario.password if usuario else None)
+    if correcta and nuevo:
+        await _buscar(email).filter(pk=usuario.pk, password=usuario.password).aupdate(password=nuevo)
+        usuario.password = nuevo
+        rehashes.inc()
+    return _resultado(usuario, correcta)
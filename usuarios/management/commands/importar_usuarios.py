@@ -0,0 +1,54 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from usuarios.importacion import FORMATOS, ImportadorUsuarios
+
+
+class Command(BaseCommand):
+    help = (
+        'Importación masiva de usuarios desde un archivo CSV o JSONL. El avance se guarda '
+        'por lote, de modo que una importación interrumpida continúa donde quedó'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV o JSONL')
+        parser.add_argument('--formato', choices=FORMATOS, help='Formato del archivo (por defecto, según la extensión)')
+        parser.add_argument('--lote', type=int, help='Filas por lote')
+        parser.add_argument('--procesos', type=int, help='Procesos para calcular los hashes de contraseña')
+        parser.add_argument('--reiniciar', action='store_true', help='Ignorar el avance guardado y empezar de nuevo')
+        parser.add_argument('--errores', type=int, default=20, help='Errores que se muestran al terminar')
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options['archivo']):
+            raise CommandError(f'No existe el archivo {options["archivo"]}')
+        if (options['lote'] is not None and options['lote'] < 1) or (options['procesos'] is not None and options['procesos'] < 1):
+            raise CommandError('--lote y --procesos deben ser mayores que cero')
+
+        importador = ImportadorUsuarios(
+            options['archivo'], options['formato'], tamano_lote=options['lote'], procesos=options['procesos']
+        )
+        progreso = importador.leer_progreso()
+        if not options['reiniciar'] and progreso['procesadas'] and progreso['estado'] != 'completado':
+            self.stdout.write(f'Reanudando desde la fila {progreso["procesadas"] + 1}')
+
+        if importador.en_curso(progreso) or not importador.reservar():
+            raise CommandError('La importación ya está en curso en otro proceso')
+        try:
+            progreso = importador.ejecutar(reanudar=not options['reiniciar'])
+        except Exception as error:
+            raise CommandError(
+                f'Importación interrumpida en la fila {importador.leer_progreso()["procesadas"]}: {error}. '
+                'Vuelva a ejecutar el comando para reanudarla'
+            )
+        finally:
+            importador.liberar()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{progreso["procesadas"]:,} filas procesadas: {progreso["creados"]:,} usuarios creados, '
+            f'{progreso["errores"]:,} con errores'
+        ))
+        if progreso['errores']:
+            for error in importador.errores(options['errores']):
+                self.stdout.write(f'  fila {error["fila"]}: {error["errores"]}')
+            self.stdout.write(f'Reporte completo de errores: {importador.ruta_errores}')
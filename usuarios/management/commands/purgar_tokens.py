@@ -0,0 +1,30 @@
+from django.core.management.base import CommandError
+from rest_framework_simplejwt.token_blacklist.management.commands import flushexpiredtokens
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(flushexpiredtokens.Command):
+    help = (
+        'flushexpiredtokens de simplejwt por lotes: elimina los refresh tokens vencidos de la lista '
+        'de tokens emitidos y de la blacklist sin un único DELETE sobre toda la tabla. '
+        'Pensado para ejecutarse periódicamente (cron), p. ej. cada hora'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000, help='Filas eliminadas por transacción')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+        # Todos los refresh duran lo mismo: los vencidos son los de id más bajo
+        vencidos = OutstandingToken.objects.filter(expires_at__lte=aware_utcnow()).order_by('pk')
+        total = 0
+        while True:
+            ids = list(vencidos.values_list('pk', flat=True)[:options['lote']])
+            if not ids:
+                break
+            # Las entradas de la blacklist se van en cascada
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+            total += len(ids)
+        self.stdout.write(f'Eliminados {total} tokens vencidos')
@@ -59,6 +59,13 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
         ordering = ['-date_joined']
+        indexes = [
+            models.Index(fields=['date_joined', 'id']),
+            # Listado filtrado (?rol=, ?curso=) en el orden de Meta.ordering más id
+            models.Index(fields=['rol', 'curso', 'date_joined', 'id'], name='usuario_rol_curso_idx'),
+            models.Index(fields=['rol', 'date_joined', 'id'], name='usuario_rol_idx'),
+            models.Index(fields=['curso', 'date_joined', 'id'], name='usuario_curso_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombres} {self.apellidos} ({self.get_rol_display()})"
@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth.models import update_last_login
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .authentication import token_revocado
+from .login import autenticar
 
 Usuario = get_user_model()
 
@@ -29,6 +34,7 @@ class UsuarioSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         if password:
             instance.set_password(password)
+        # Si cambian la contraseña o el rol, la señal de authentication.py revoca los tokens
         instance.save()
         return instance
 
@@ -39,11 +45,56 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
+        cls.agregar_claims(token, user)
+        return token
+
+    @staticmethod
+    def agregar_claims(token, user):
+        """Claims del usuario que JWTAutenticacionRapida usa sin leer la base de datos"""
         token['email'] = user.email
         token['rol'] = user.rol
         token['nombres'] = user.nombres
         token['apellidos'] = user.apellidos
-        return token
+        token['is_staff'] = user.is_staff
+        token['curso'] = user.curso
+
+    def validate(self, attrs):
+        # La clave se verifica en el pool acotado de login.py en vez de con
+        # authenticate(): ModelBackend es el único backend configurado
+        usuario = autenticar(attrs[self.username_field], attrs['password'])
+        return self.emitir(usuario)
+
+    def emitir(self, usuario):
+        """Par de tokens para un usuario ya autenticado (o None)"""
+        self.user = usuario
+        if not api_settings.USER_AUTHENTICATION_RULE(usuario):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        refresh = self.get_token(usuario)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, usuario)
+        return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+class TokenRefreshRevocadoSerializer(TokenRefreshSerializer):
+    """
+    Refresh que respeta la lista de revocación: sin esto, un refresh emitido
+    antes de un cambio de contraseña o rol seguiría rotando y entregando
+    access tokens con los claims anteriores. Los claims del usuario se vuelven
+    a leer de la fila actual en cada refresh.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if token_revocado(refresh):
+            raise InvalidToken('El token fue revocado')
+        usuario = Usuario.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if usuario is None:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        # Se firma de nuevo con el mismo jti: la blacklist y la rotación siguen igual
+        CustomTokenObtainPairSerializer.agregar_claims(refresh, usuario)
+        return super().validate({**attrs, 'refresh': str(refresh)})
 
 
 class UsuarioRegistroSerializer(serializers.ModelSerializer):
@@ -0,0 +1,176 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .importacion import ImportadorUsuarios
+
+Usuario = get_user_model()
+
+
+@override_settings(REPLICAS_LECTURA=[], PUBLICACION_AUTOMATICA=False)
+class RevocacionTokensTests(TestCase):
+    """Los tokens emitidos antes de un cambio de clave, rol o estado dejan de valer"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(
+            'revocacion@bienestar.local', 'clave12345', nombres='Revo', apellidos='Cación', rol='profesor'
+        )
+        respuesta = APIClient().post(
+            '/api/auth/login/', {'email': 'revocacion@bienestar.local', 'password': 'clave12345'}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.tokens = respuesta.data
+
+    def cliente(self):
+        cliente = APIClient(SERVER_NAME='localhost')
+        cliente.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        return cliente
+
+    def guardar_mas_tarde(self, **campos):
+        """Usuario.save() fuera de la API, un segundo después de emitir los tokens"""
+        for campo, valor in campos.items():
+            setattr(self.usuario, campo, valor)
+        with mock.patch('usuarios.authentication.time.time', return_value=time.time() + 2), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.usuario.save()
+
+    def refrescar(self):
+        return APIClient().post('/api/token/refresh/', {'refresh': self.tokens['refresh']}, format='json')
+
+    def test_cambio_de_rol_desde_save_revoca(self):
+        self.assertEqual(self.cliente().get('/api/auth/usuarios/perfil/').status_code, 200)
+        self.guardar_mas_tarde(rol='estudiante')
+        self.assertEqual(self.cliente().get('/api/auth/usuarios/perfil/').status_code, 401)
+        self.assertEqual(self.refrescar().status_code, 401)
+
+    def test_desactivar_revoca(self):
+        self.guardar_mas_tarde(is_active=False)
+        self.assertEqual(self.cliente().get('/api/auth/usuarios/perfil/').status_code, 401)
+
+    def test_cambio_de_clave_revoca(self):
+        self.usuario.set_password('otraclave123')
+        self.guardar_mas_tarde()
+        self.assertEqual(self.cliente().get('/api/auth/usuarios/perfil/').status_code, 401)
+
+    def test_cambio_de_nombre_no_revoca(self):
+        self.guardar_mas_tarde(nombres='Otro')
+        self.assertEqual(self.cliente().get('/api/auth/usuarios/perfil/').status_code, 200)
+
+    def test_refresh_toma_los_claims_de_la_fila_actual(self):
+        Usuario.objects.filter(pk=self.usuario.pk).update(nombres='Renombrado', curso='4A')
+        respuesta = self.refrescar()
+        self.assertEqual(respuesta.status_code, 200)
+        # El refresh anterior quedó en la blacklist al rotar
+        self.assertEqual(self.refrescar().status_code, 401)
+        self.tokens = respuesta.data
+        perfil = self.cliente().get('/api/auth/usuarios/perfil/')
+        self.assertEqual(perfil.status_code, 200)
+        self.assertEqual(perfil.data['nombres'], 'Renombrado')
+        self.assertEqual(perfil.data['curso'], '4A')
+
+
+class ImportacionTests(TestCase):
+    """Errores por fila y concurrencia de la importación masiva"""
+
+    def setUp(self):
+        cache.clear()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.importador = ImportadorUsuarios(os.path.join(directorio.name, 'datos.csv'), 'csv')
+        self.pool = ThreadPoolExecutor(1)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_usuario_creado_entre_la_verificacion_y_el_insert(self):
+        lote = [
+            (1, {'email': 'uno@bienestar.local', 'nombres': 'Uno', 'apellidos': 'A'}),
+            (2, {'email': 'choque@bienestar.local', 'nombres': 'Dos', 'apellidos': 'B'}),
+            (3, {'email': 'tres@bienestar.local', 'nombres': 'Tres', 'apellidos': 'C', 'password': 'clave12345'}),
+        ]
+        map_original = self.pool.map
+
+        def con_carrera(*args, **kwargs):
+            # Otro proceso crea el mismo email mientras se calculan los hashes,
+            # después de la verificación de unicidad y antes del INSERT del lote
+            Usuario.objects.create_user('choque@bienestar.local', nombres='Otro', apellidos='Proceso')
+            return map_original(*args, **kwargs)
+
+        with mock.patch.object(self.pool, 'map', side_effect=con_carrera):
+            creados, errores = self.importador.procesar_lote(lote, self.pool)
+
+        self.assertEqual(creados, 2)
+        self.assertEqual(errores, [{'fila': 2, 'errores': {'email': ['Ya existe un usuario con este email']}}])
+        self.assertTrue(Usuario.objects.get(email='tres@bienestar.local').check_password('clave12345'))
+        self.assertEqual(Usuario.objects.get(email='choque@bienestar.local').nombres, 'Otro')
+
+    def test_errores_por_fila_y_reanudacion(self):
+        Usuario.objects.create_user('existe@bienestar.local', nombres='Ya', apellidos='Existe')
+        with open(self.importador.ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(
+                'email,nombres,apellidos,rol,password\n'
+                'ana@bienestar.local,Ana,Uno,estudiante,clave12345\n'
+                'no-es-email,Beto,Dos,estudiante,\n'
+                'existe@bienestar.local,Carla,Tres,estudiante,\n'
+                'ana@bienestar.local,Ana,Repetida,estudiante,\n'
+                'dani@bienestar.local,Dani,Cuatro,director,\n'
+                'eli@bienestar.local,Eli,Cinco,profesor,corta\n'
+                'fran@bienestar.local,Fran,Seis,apoderado,\n'
+            )
+        self.importador.tamano_lote = 4
+        # Los hashes se calculan en hilos: los procesos no ven la transacción de la prueba
+        with mock.patch('usuarios.importacion.ProcessPoolExecutor', ThreadPoolExecutor):
+            progreso = self.importador.ejecutar()
+
+        self.assertEqual((progreso['estado'], progreso['procesadas'], progreso['creados'], progreso['errores']),
+                         ('completado', 7, 2, 5))
+        errores = self.importador.errores()
+        self.assertEqual([error['fila'] for error in errores], [2, 3, 4, 5, 6])
+        self.assertEqual(set(errores[0]['errores']), {'email'})
+        self.assertEqual(errores[1]['errores'], {'email': ['Ya existe un usuario con este email']})
+        self.assertEqual(errores[2]['errores'], {'email': ['Repetido en la fila 1']})
+        self.assertEqual(set(errores[3]['errores']), {'rol'})
+        self.assertEqual(set(errores[4]['errores']), {'password'})
+        self.assertTrue(Usuario.objects.get(email='ana@bienestar.local').check_password('clave12345'))
+        self.assertFalse(Usuario.objects.get(email='fran@bienestar.local').has_usable_password())
+
+        # Reanudar una importación completa no vuelve a procesar filas
+        with mock.patch('usuarios.importacion.ProcessPoolExecutor', ThreadPoolExecutor):
+            self.assertEqual(self.importador.ejecutar()['creados'], 2)
+        self.assertEqual(len(self.importador.errores()), 5)
+
+    def test_una_sola_reserva_por_importacion(self):
+        self.assertTrue(self.importador.reservar())
+        self.assertFalse(ImportadorUsuarios(self.importador.ruta, 'csv').reservar())
+        self.importador.liberar()
+        self.assertTrue(self.importador.reservar())
+
+
+class PurgarTokensTests(TestCase):
+    def test_elimina_por_lotes_solo_los_vencidos(self):
+        usuario = Usuario.objects.create_user('purga@bienestar.local', nombres='Pur', apellidos='Ga')
+        ahora = timezone.now()
+        for i in range(5):
+            vencido = OutstandingToken.objects.create(
+                user=usuario, jti=f'vencido-{i}', token='-', expires_at=ahora - timedelta(hours=1)
+            )
+            BlacklistedToken.objects.create(token=vencido)
+        vigente = OutstandingToken.objects.create(
+            user=usuario, jti='vigente', token='-', expires_at=ahora + timedelta(hours=1)
+        )
+        salida = StringIO()
+        call_command('purgar_tokens', lote=2, stdout=salida)
+        self.assertIn('Eliminados 5', salida.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.all()), [vigente])
+        self.assertFalse(BlacklistedToken.objects.exists())
@@ -1,20 +1,42 @@
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from bienestar_api.asincrono import LecturaAsincronaMixin, renderizar
+from bienestar_api.compacto import ListaCompactaMixin
+from bienestar_api.pagination import KeysetPagination
+from bienestar_api.replicas import LecturaReplicaMixin
+from contenido.permissions import EsProfesor
+from .filtros import FiltroUsuarios
+from .login import aautenticar
+from .importacion import iniciar_importacion, importador_para, reanudar_en_segundo_plano
 from .serializers import UsuarioSerializer, UsuarioRegistroSerializer, CustomTokenObtainPairSerializer
 
 Usuario = get_user_model()
 
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(LecturaReplicaMixin, ListaCompactaMixin, LecturaAsincronaMixin, viewsets.ModelViewSet):
     """ViewSet para gestión de usuarios"""
     
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [FiltroUsuarios]
+    pagination_class = KeysetPagination
+    # ?fields=id,email,curso: solo esas columnas (bienestar_api/compacto.py)
+    proyeccion_param = 'fields'
+    # perfil devuelve la fila completa (curso, rut, date_joined), no solo los claims del token
+    acciones_usuario_completo = ('perfil',)
+    acciones_asincronas = {'perfil': 'aperfil'}
     
     def get_permissions(self):
         """Permisos especiales según la acción"""
@@ -39,11 +61,95 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         """Obtener perfil del usuario autenticado"""
         serializer = UsuarioSerializer(request.user)
         return Response(serializer.data)
+    
+    async def aperfil(self, request, queryset):
+        """perfil para ASGI: la fila completa se lee con el ORM asíncrono"""
+        try:
+            usuario = await Usuario.objects.aget(pk=request.user.pk, is_active=True)
+        except Usuario.DoesNotExist:
+            raise AuthenticationFailed('Usuario no encontrado', code='user_not_found')
+        return Response(UsuarioSerializer(usuario).data)
+    
+    @action(detail=False, methods=['post'], url_path='importar',
+            permission_classes=[IsAuthenticated, EsProfesor], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """Importación masiva de usuarios desde un archivo CSV o JSONL"""
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({'detail': 'Debe adjuntar el archivo en el campo "archivo"'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            importacion_id = iniciar_importacion(archivo, request.data.get('formato'))
+        except ValueError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'id': importacion_id,
+            'estado': request.build_absolute_uri(f'{importacion_id}/'),
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get', 'post'], url_path=r'importar/(?P<importacion_id>[0-9a-f-]{36})',
+            permission_classes=[IsAuthenticated, EsProfesor])
+    def estado_importacion(self, request, importacion_id=None):
+        """Avance y errores de una importación; POST la reanuda si fue interrumpida"""
+        importador = importador_para(importacion_id)
+        if importador is None:
+            return Response({'detail': 'Importación no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        progreso = importador.leer_progreso()
+        if request.method == 'POST':
+            # La reserva evita que dos POST simultáneos inicien dos importaciones
+            if importador.en_curso(progreso) or not reanudar_en_segundo_plano(importador):
+                return Response({'detail': 'La importación está en curso'}, status=status.HTTP_409_CONFLICT)
+            return Response(progreso, status=status.HTTP_202_ACCEPTED)
+        try:
+            limite = min(max(int(request.query_params.get('errores', 100)), 0), 1000)
+        except ValueError:
+            limite = 100
+        return Response({**progreso, 'detalle_errores': importador.errores(limite)})
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Vista personalizada para obtener tokens JWT"""
     serializer_class = CustomTokenObtainPairSerializer
 
+    @classmethod
+    def as_view(cls, **initkwargs):
+        vista = super().as_view(**initkwargs)
+        if not getattr(settings, 'VISTAS_ASINCRONAS', False):
+            return vista
+        vista_sincrona = sync_to_async(vista)
+
+        async def vista_asincrona(request, *args, **kwargs):
+            if request.method != 'POST':
+                return await vista_sincrona(request, *args, **kwargs)
+            return await cls(**initkwargs).apost(request, *args, **kwargs)
+
+        update_wrapper(vista_asincrona, vista)
+        del vista_asincrona.__wrapped__
+        return csrf_exempt(vista_asincrona)
+
+    async def apost(self, request, *args, **kwargs):
+        """
+        Login bajo ASGI: la búsqueda del usuario va por el ORM asíncrono y la
+        clave se verifica en el pool de hashing, así que solo la emisión de
+        tokens pasa por el hilo de las vistas síncronas.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            # Sin autenticación ni permisos: initial solo negocia y aplica throttling
+            self.initial(request, *args, **kwargs)
+            serializer = self.get_serializer(data=request.data)
+            datos = serializer.to_internal_value(request.data)
+            usuario = await aautenticar(datos[serializer.username_field], datos['password'])
+            tokens = await sync_to_async(serializer.emitir)(usuario)
+            response = Response(tokens, status=status.HTTP_200_OK)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return renderizar(self.response)
+
 
 